@@ -1,10 +1,14 @@
 from django.contrib import admin
+from Quiz.admin import BackgroundDeletionAdminMixin
+from QuizBit.pagination import EstimatedCountPaginator
 from .models import User
 
 @admin.register(User)
-class UserAdmin(admin.ModelAdmin):
+class UserAdmin(BackgroundDeletionAdminMixin, admin.ModelAdmin):
     list_display = ('username', 'email', 'first_name', 'last_name', 'gender', 'phone_number', 'is_active', 'is_staff')
     search_fields = ('username', 'email', 'first_name', 'last_name', 'phone_number')
     list_filter = ('gender', 'is_active', 'is_staff', 'date_joined')
     ordering = ('-date_joined',)
     list_per_page = 25
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
@@ -4,3 +4,11 @@ from django.apps import AppConfig
 class AuthenticationConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'Authentication'
+
+    def ready(self):
+        from django.contrib.auth.password_validation import get_default_password_validators
+
+        # Instantiate the configured validators now so that their data (the
+        # common-password list in particular) is loaded once per process
+        # rather than by the first registration request.
+        get_default_password_validators()
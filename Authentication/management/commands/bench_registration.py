@@ -0,0 +1,103 @@
+import time
+import uuid
+
+from django.contrib.auth.password_validation import validate_password
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import CaptureQueriesContext, override_settings
+from rest_framework import serializers
+from rest_framework.validators import UniqueValidator
+
+from Authentication.models import User
+from Authentication.serializers import UserRegistrationSerializer
+
+# The validators this project used before the preloaded one replaced
+# Django's CommonPasswordValidator.
+STOCK_VALIDATORS = [
+    {'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator'},
+    {'NAME': 'django.contrib.auth.password_validation.MinimumLengthValidator'},
+    {'NAME': 'django.contrib.auth.password_validation.CommonPasswordValidator'},
+    {'NAME': 'django.contrib.auth.password_validation.NumericPasswordValidator'},
+]
+
+
+class StockRegistrationSerializer(serializers.ModelSerializer):
+    """
+    The registration serializer as it was before the preloaded validators
+    and the insert-as-uniqueness-check: `validate_password` with the default
+    (per-process cached) validators, and a uniqueness query per unique field.
+    """
+    email = serializers.EmailField(validators=[UniqueValidator(queryset=User.objects.all())])
+    password = serializers.CharField(write_only=True, required=True, validators=[validate_password])
+    password2 = serializers.CharField(write_only=True, required=True)
+
+    class Meta:
+        model = User
+        fields = ('username', 'email', 'password', 'password2', 'first_name', 'last_name')
+
+    def validate(self, attrs):
+        if attrs['password'] != attrs['password2']:
+            raise serializers.ValidationError({"password": "Password fields didn't match."})
+        return attrs
+
+    def create(self, validated_data):
+        validated_data.pop('password2')
+        return User.objects.create_user(**validated_data)
+
+
+class Command(BaseCommand):
+    """
+    Measure registrations per second during a burst of sign-ups.
+
+    The stock path is the registration serializer as it was before
+    (StockRegistrationSerializer) with Django's stock validators. Those are
+    cached per process, so the common-password list is read once, during a
+    warm-up registration that is not timed, exactly as in a running worker.
+    The current path is UserRegistrationSerializer with the preloaded
+    validators and the insert as the uniqueness check. Password hashing
+    dominates both unless --fast-hasher is given, which isolates validation
+    and database cost.
+    """
+    help = 'Benchmark a burst of user registrations'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=200, help='Registrations per run')
+        parser.add_argument('--fast-hasher', action='store_true', help='Hash passwords with MD5 during the run')
+
+    def handle(self, *args, **options):
+        hashers = ['django.contrib.auth.hashers.MD5PasswordHasher'] if options['fast_hasher'] else None
+        with override_settings(**({'PASSWORD_HASHERS': hashers} if hashers else {})):
+            with override_settings(AUTH_PASSWORD_VALIDATORS=STOCK_VALIDATORS):
+                self._run('stock', StockRegistrationSerializer, options['count'])
+            self._run('current', UserRegistrationSerializer, options['count'])
+
+    def _run(self, name, serializer_class, count):
+        prefix = f'bench-{name}-{uuid.uuid4().hex[:8]}'
+        payloads = [
+            {
+                'username': f'{prefix}-{i}',
+                'email': f'{prefix}-{i}@example.com',
+                'password': 'correct-horse-battery-7',
+                'password2': 'correct-horse-battery-7',
+            }
+            for i in range(count)
+        ]
+        try:
+            # Warm up: load the validators and compile the serializer fields.
+            self._register(serializer_class, {**payloads[0], 'username': f'{prefix}-warmup', 'email': f'{prefix}-warmup@example.com'})
+            with CaptureQueriesContext(connection) as queries:
+                started = time.perf_counter()
+                for payload in payloads:
+                    self._register(serializer_class, payload)
+                elapsed = time.perf_counter() - started
+            self.stdout.write(
+                f'{name}: {count / elapsed:.1f} registrations/s, '
+                f'{len(queries) / count:.1f} queries per registration'
+            )
+        finally:
+            User.objects.filter(username__startswith=prefix).delete()
+
+    def _register(self, serializer_class, payload):
+        serializer = serializer_class(data=payload)
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
@@ -1,14 +1,13 @@
 from django.db import models
+from django.db.models.functions import Lower
 from django.contrib.auth.models import AbstractUser
 from django.core.validators import EmailValidator
 
 class User(AbstractUser):
+    # Uniqueness is enforced case-insensitively by the unique index on
+    # LOWER(email) declared in Meta.constraints.
     email = models.EmailField(
-        unique=True,
         validators=[EmailValidator()],
-        error_messages={
-            'unique': 'A user with that email already exists.',
-        }
     )
     profile_picture = models.ImageField(upload_to='profile_pictures/', null=True, blank=True)
     bio = models.TextField(max_length=500, blank=True)
@@ -28,6 +27,13 @@ class User(AbstractUser):
 
     class Meta:
         ordering = ['-date_joined']
+        constraints = [
+            models.UniqueConstraint(
+                Lower('email'),
+                name='user_email_ci_unique',
+                violation_error_message='A user with that email already exists.'
+            ),
+        ]
 
     def __str__(self):
         return self.email
\ No newline at end of file
@@ -0,0 +1,30 @@
+"""
+Password validators that keep their data in memory for the whole process.
+"""
+import functools
+
+from django.contrib.auth.password_validation import CommonPasswordValidator
+
+
+@functools.lru_cache(maxsize=None)
+def load_common_passwords(password_list_path=None):
+    """
+    Read a common-password list once and return it as a frozenset.
+
+    `None` means the list shipped with Django.
+    """
+    if password_list_path is None:
+        return frozenset(CommonPasswordValidator().passwords)
+    return frozenset(CommonPasswordValidator(password_list_path).passwords)
+
+
+class PreloadedCommonPasswordValidator(CommonPasswordValidator):
+    """
+    CommonPasswordValidator sharing one preloaded frozenset per list.
+
+    The stock validator decompresses and parses its 20k-entry list every
+    time it is instantiated. This one reads each list once per process; the
+    default list is loaded when the Authentication app is ready.
+    """
+    def __init__(self, password_list_path=None):
+        self.passwords = load_common_passwords(password_list_path)
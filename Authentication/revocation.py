@@ -0,0 +1,205 @@
+"""
+Refresh-token revocation with a database-free fast path.
+
+Revoked refresh tokens live in simplejwt's blacklist tables, which stay the
+source of truth. Every worker keeps a Bloom filter of the revoked token ids
+in memory, so the common "this token is not revoked" answer needs no query;
+only a filter hit (a revoked token or a rare false positive) is confirmed
+against the database.
+
+Workers learn about revocations made elsewhere through a small log in the
+shared cache: a sequence number plus one entry per revoked id. A check reads
+the sequence number and, when it moved, fetches just the new entries. If
+entries are missing (evicted, or too many to fetch) the filter is rebuilt
+from the blacklist table.
+
+That log needs a cache shared by every worker. With a per-process cache
+(locmem, the development default) a worker would never hear of tokens
+revoked by another, so every check goes to the blacklist table instead.
+"""
+import hashlib
+import math
+import threading
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+
+from QuizBit.cache import cache_is_shared
+from Tasks.queue import enqueue
+
+SEQUENCE_KEY = 'auth.revocation:seq'
+ENTRY_KEY = 'auth.revocation:entry:%d'
+PRUNE_LOCK_KEY = 'auth.revocation:prune'
+
+# Beyond this many unseen log entries a rebuild is cheaper than catching up.
+MAX_LOG_CATCH_UP = 1000
+
+
+class BloomFilter:
+    """
+    Fixed-size Bloom filter over strings.
+
+    Sized for `capacity` items at `error_rate` false positives; it never
+    gives false negatives.
+    """
+    def __init__(self, capacity, error_rate=0.001):
+        capacity = max(capacity, 1)
+        self.size = max(int(-capacity * math.log(error_rate) / math.log(2) ** 2), 8)
+        self.hash_count = max(int(round(self.size / capacity * math.log(2))), 1)
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item):
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        first, second = int.from_bytes(digest[:8], 'little'), int.from_bytes(digest[8:], 'little') | 1
+        return ((first + i * second) % self.size for i in range(self.hash_count))
+
+    def add(self, item):
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, item):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+
+class RevocationIndex:
+    """
+    Per-process index of revoked refresh-token ids (jti).
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._filter = None
+        self._sequence = None
+
+    def is_revoked(self, jti):
+        """Whether the refresh token with this jti has been revoked."""
+        if not cache_is_shared():
+            return BlacklistedToken.objects.filter(token__jti=jti).exists()
+        self._sync()
+        if jti not in self._filter:
+            return False
+        return BlacklistedToken.objects.filter(token__jti=jti).exists()
+
+    def record(self, jtis):
+        """
+        Publish revoked ids to every worker. Call after the blacklist rows
+        are committed.
+        """
+        for jti in jtis:
+            sequence = _incr_sequence()
+            cache.set(ENTRY_KEY % sequence, jti, _entry_timeout())
+        with self._lock:
+            if self._filter is not None:
+                for jti in jtis:
+                    self._filter.add(jti)
+        _maybe_prune_expired_tokens()
+
+    def rebuild(self):
+        """Reload the filter from the unexpired rows of the blacklist table."""
+        sequence = _current_sequence()
+        jtis = list(
+            BlacklistedToken.objects.filter(token__expires_at__gt=timezone.now())
+            .values_list('token__jti', flat=True)
+        )
+        bloom = BloomFilter(max(settings.QUIZBIT_REVOCATION_FILTER_CAPACITY, 2 * len(jtis)))
+        for jti in jtis:
+            bloom.add(jti)
+        with self._lock:
+            self._filter, self._sequence = bloom, sequence
+
+    def _sync(self):
+        """Catch up with revocations logged by other workers."""
+        if self._filter is None:
+            self.rebuild()
+            return
+
+        sequence = _current_sequence()
+        seen = self._sequence
+        if sequence == seen:
+            return
+        if sequence < seen or sequence - seen > MAX_LOG_CATCH_UP:
+            self.rebuild()
+            return
+
+        keys = [ENTRY_KEY % number for number in range(seen + 1, sequence + 1)]
+        entries = cache.get_many(keys)
+        if len(entries) != len(keys):
+            self.rebuild()
+            return
+        with self._lock:
+            for jti in entries.values():
+                self._filter.add(jti)
+            self._sequence = max(self._sequence, sequence)
+
+
+revocation_index = RevocationIndex()
+
+
+def _current_sequence():
+    sequence = cache.get(SEQUENCE_KEY)
+    if sequence is None:
+        cache.add(SEQUENCE_KEY, 0, timeout=None)
+        sequence = cache.get(SEQUENCE_KEY, 0)
+    return sequence
+
+
+def _incr_sequence():
+    try:
+        return cache.incr(SEQUENCE_KEY)
+    except ValueError:
+        cache.add(SEQUENCE_KEY, 0, timeout=None)
+        return cache.incr(SEQUENCE_KEY)
+
+
+def _entry_timeout():
+    return int(api_settings.REFRESH_TOKEN_LIFETIME.total_seconds())
+
+
+def _maybe_prune_expired_tokens():
+    """
+    Queue the pruning of expired tokens, at most once per
+    QUIZBIT_REVOCATION_PRUNE_INTERVAL across all workers.
+    """
+    if not cache.add(PRUNE_LOCK_KEY, 1, settings.QUIZBIT_REVOCATION_PRUNE_INTERVAL):
+        return
+    enqueue('auth.prune_expired_tokens')
+
+
+def prune_expired_tokens(batch_size=1000):
+    """
+    Delete up to `batch_size` expired outstanding tokens and their blacklist
+    entries; expired tokens fail verification anyway. Returns the count.
+    """
+    ids = list(
+        OutstandingToken.objects.filter(expires_at__lte=timezone.now())
+        .order_by('pk').values_list('pk', flat=True)[:batch_size]
+    )
+    if ids:
+        with transaction.atomic():
+            BlacklistedToken.objects.filter(token_id__in=ids).delete()
+            OutstandingToken.objects.filter(pk__in=ids).delete()
+    return len(ids)
+
+
+def revoke_user_tokens(user):
+    """
+    Blacklist every unexpired refresh token issued to `user`.
+
+    Returns the number of tokens newly revoked.
+    """
+    with transaction.atomic():
+        outstanding = list(
+            OutstandingToken.objects.filter(user=user, expires_at__gt=timezone.now())
+            .exclude(blacklistedtoken__isnull=False)
+            .values_list('pk', 'jti')
+        )
+        BlacklistedToken.objects.bulk_create(
+            [BlacklistedToken(token_id=pk) for pk, _ in outstanding],
+            ignore_conflicts=True
+        )
+        jtis = [jti for _, jti in outstanding]
+        transaction.on_commit(lambda: revocation_index.record(jtis))
+    return len(outstanding)
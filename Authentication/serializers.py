@@ -1,7 +1,13 @@
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
 from django.contrib.auth.password_validation import validate_password
-from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from django.db import IntegrityError, transaction
+from django.db.models.functions import Lower
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import OutstandingToken
+from rest_framework_simplejwt.utils import datetime_from_epoch
+from .tokens import RevocableRefreshToken
 
 User = get_user_model()
 
@@ -15,10 +21,23 @@ class UserSerializer(serializers.ModelSerializer):
         fields = ('id', 'username', 'email', 'profile_picture', 'bio', 'date_of_birth', 'created_at')
         read_only_fields = ('created_at',)
 
+    def validate_email(self, value):
+        """Reject an email already used by another user, ignoring case."""
+        others = User.objects.alias(email_lower=Lower('email')).filter(email_lower=value.lower())
+        if self.instance is not None:
+            others = others.exclude(pk=self.instance.pk)
+        if others.exists():
+            raise serializers.ValidationError('A user with that email already exists.')
+        return value
+
 class UserRegistrationSerializer(serializers.ModelSerializer):
     """
     Serializer for user registration.
     Handles creation of new user accounts with password validation.
+
+    Username and email uniqueness are not checked with separate queries up
+    front: the insert itself is the check, against the unique indexes on
+    username and LOWER(email), and a conflict is reported as a field error.
     """
     password = serializers.CharField(write_only=True, required=True, validators=[validate_password])
     password2 = serializers.CharField(write_only=True, required=True)
@@ -26,6 +45,9 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
     class Meta:
         model = User
         fields = ('username', 'email', 'password', 'password2', 'first_name', 'last_name')
+        extra_kwargs = {
+            'username': {'validators': User._meta.get_field('username').validators},
+        }
 
     def validate(self, attrs):
         """Validate that password and password2 match."""
@@ -36,20 +58,65 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
     def create(self, validated_data):
         """Create new user instance with validated data."""
         validated_data.pop('password2')
-        user = User.objects.create_user(**validated_data)
+        try:
+            with transaction.atomic():
+                user = User.objects.create_user(**validated_data)
+        except IntegrityError:
+            errors = self.get_conflict_errors(validated_data)
+            if not errors:
+                raise
+            raise serializers.ValidationError(errors)
         return user
 
+    def get_conflict_errors(self, validated_data):
+        """Work out which unique field a failed insert collided with."""
+        errors = {}
+        if User.objects.filter(username=validated_data['username']).exists():
+            errors['username'] = [User._meta.get_field('username').error_messages['unique']]
+        email_taken = User.objects.alias(email_lower=Lower('email')).filter(
+            email_lower=User.objects.normalize_email(validated_data['email']).lower()
+        ).exists()
+        if email_taken:
+            errors['email'] = ['A user with that email already exists.']
+        return errors
+
 class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
     """
     Custom token serializer that includes user data in response.
     Extends the default JWT token serializer.
     """
+    token_class = RevocableRefreshToken
+
     def validate(self, attrs):
         """Add user data to token response."""
         data = super().validate(attrs)
         data['user'] = UserSerializer(self.user).data
         return data
 
+class RotatingTokenRefreshSerializer(TokenRefreshSerializer):
+    """
+    Refresh serializer that rotates refresh tokens and tracks the new ones.
+    Blacklisting the old token and recording the new one as outstanding
+    happen in one transaction, so that revoking all of a user's tokens also
+    covers tokens obtained through rotation.
+    """
+    token_class = RevocableRefreshToken
+
+    def validate(self, attrs):
+        """Rotate the refresh token and record the new one as outstanding."""
+        with transaction.atomic():
+            data = super().validate(attrs)
+            if 'refresh' in data:
+                refresh = self.token_class(data['refresh'], verify=False)
+                OutstandingToken.objects.create(
+                    user_id=refresh.payload.get(api_settings.USER_ID_CLAIM),
+                    jti=refresh[api_settings.JTI_CLAIM],
+                    token=data['refresh'],
+                    created_at=refresh.current_time,
+                    expires_at=datetime_from_epoch(refresh['exp'])
+                )
+        return data
+
 class ChangePasswordSerializer(serializers.Serializer):
     """
     Serializer for password change endpoint.
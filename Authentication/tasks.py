@@ -0,0 +1,16 @@
+"""
+Background tasks of the Authentication app (see Tasks.queue).
+"""
+from Tasks.queue import task
+
+from .revocation import prune_expired_tokens
+
+
+@task(name='auth.prune_expired_tokens')
+def prune_expired_tokens_task(batch_size=1000):
+    """
+    Delete expired outstanding and blacklisted tokens one batch at a time,
+    queueing the next batch while there are more.
+    """
+    if prune_expired_tokens(batch_size) == batch_size:
+        prune_expired_tokens_task.enqueue(batch_size=batch_size)
@@ -1,3 +1,145 @@
+from unittest import mock
+
+from django.core.cache import cache
 from django.test import TestCase
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+
+from . import revocation
+from .models import User
+from .revocation import ENTRY_KEY, SEQUENCE_KEY, RevocationIndex
+from .tokens import RevocableRefreshToken
+
+
+class RevocationTestCase(TestCase):
+    """
+    Runs with a fresh revocation index and, unless `shared_cache` is False,
+    as if the cache were shared by several workers.
+    """
+    shared_cache = True
+
+    def setUp(self):
+        cache.clear()
+        self.index = RevocationIndex()
+        patchers = [
+            mock.patch.object(revocation, 'cache_is_shared', lambda: self.shared_cache),
+            mock.patch.object(revocation, 'revocation_index', self.index),
+            mock.patch('Authentication.tokens.revocation_index', self.index),
+        ]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        self.user = User.objects.create_user('student', 'student@example.com', 'Old-pass-phrase-1')
+        self.client = APIClient()
+
+    def login(self):
+        response = self.client.post(
+            '/api/v1/auth/login/', {'username': 'student', 'password': 'Old-pass-phrase-1'}, format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+        return response.data['refresh']
+
+    def refresh(self, token):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post('/api/v1/auth/token/refresh/', {'refresh': token}, format='json')
+
+
+class RefreshRotationTests(RevocationTestCase):
+    """Refreshing rotates the refresh token and revokes the old one."""
+
+    def test_refresh_returns_a_new_refresh_token(self):
+        old = self.login()
+
+        response = self.refresh(old)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.data['refresh'], old)
+        self.assertEqual(self.refresh(response.data['refresh']).status_code, 200)
+
+    def test_a_rotated_token_cannot_be_used_again(self):
+        old = self.login()
+        self.refresh(old)
+
+        response = self.refresh(old)
+
+        self.assertEqual(response.status_code, 401)
+
+    def test_rotated_tokens_are_tracked_as_outstanding(self):
+        new = self.refresh(self.login()).data['refresh']
+
+        jti = RevocableRefreshToken(new)['jti']
+
+        self.assertTrue(OutstandingToken.objects.filter(jti=jti, user=self.user).exists())
+
+    def test_changing_the_password_revokes_rotated_tokens(self):
+        rotated = self.refresh(self.login()).data['refresh']
+        self.client.force_authenticate(self.user)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.put(
+                '/api/v1/auth/change-password/',
+                {'old_password': 'Old-pass-phrase-1', 'new_password': 'New-pass-phrase-2'}, format='json'
+            )
+        self.client.force_authenticate(None)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.refresh(rotated).status_code, 401)
+
+
+class RevocationIndexTests(RevocationTestCase):
+    """Workers learn about each other's revocations through the cache log."""
+
+    def revoke(self, token):
+        with self.captureOnCommitCallbacks(execute=True):
+            RevocableRefreshToken(token).blacklist()
+        return RevocableRefreshToken(token, verify=False)['jti']
+
+    def test_unrevoked_tokens_are_checked_without_queries(self):
+        jti = RevocableRefreshToken(self.login())['jti']
+        self.index.rebuild()
+
+        with self.assertNumQueries(0):
+            self.assertFalse(self.index.is_revoked(jti))
+
+    def test_other_workers_catch_up_from_the_log(self):
+        other_worker = RevocationIndex()
+        other_worker.rebuild()
+
+        jti = self.revoke(self.login())
+
+        self.assertTrue(other_worker.is_revoked(jti))
+        self.assertEqual(other_worker._sequence, cache.get(SEQUENCE_KEY))
+
+    def test_missing_log_entries_rebuild_from_the_blacklist(self):
+        other_worker = RevocationIndex()
+        other_worker.rebuild()
+
+        jti = self.revoke(self.login())
+        cache.delete(ENTRY_KEY % cache.get(SEQUENCE_KEY))
+
+        self.assertTrue(other_worker.is_revoked(jti))
+
+    def test_a_reset_log_rebuilds_from_the_blacklist(self):
+        jti = self.revoke(self.login())
+        other_worker = RevocationIndex()
+        other_worker.rebuild()
+        # Revoked while the cache lost the log, e.g. after a flush
+        second = self.revoke(self.login())
+        cache.set(SEQUENCE_KEY, 0, None)
+
+        self.assertTrue(other_worker.is_revoked(jti))
+        self.assertTrue(other_worker.is_revoked(second))
+
+
+class UnsharedCacheRevocationTests(RevocationTestCase):
+    """With a per-process cache the blacklist table is checked every time."""
+    shared_cache = False
+
+    def test_revocations_outside_the_log_are_seen(self):
+        token = self.login()
+        outstanding = OutstandingToken.objects.get(jti=RevocableRefreshToken(token)['jti'])
+
+        BlacklistedToken.objects.create(token=outstanding)
 
-# Create your tests here.
+        self.assertEqual(self.refresh(token).status_code, 401)
@@ -0,0 +1,25 @@
+from django.db import transaction
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .revocation import revocation_index
+
+
+class RevocableRefreshToken(RefreshToken):
+    """
+    Refresh token whose blacklist check goes through the in-memory
+    revocation index instead of querying the blacklist table every time.
+    """
+    def check_blacklist(self):
+        """Raise TokenError if this token has been revoked."""
+        if revocation_index.is_revoked(self.payload[api_settings.JTI_CLAIM]):
+            raise TokenError(_("Token is blacklisted"))
+
+    def blacklist(self):
+        """Blacklist this token and publish it to every worker once committed."""
+        result = super().blacklist()
+        jti = self.payload[api_settings.JTI_CLAIM]
+        transaction.on_commit(lambda: revocation_index.record([jti]))
+        return result
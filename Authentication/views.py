@@ -3,6 +3,8 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework_simplejwt.views import TokenObtainPairView
 from django.contrib.auth import get_user_model
+from QuizBit.throttling import IPTokenBucketThrottle
+from .revocation import revoke_user_tokens
 from .serializers import (
     UserSerializer,
     UserRegistrationSerializer,
@@ -52,8 +54,11 @@ class CustomTokenObtainPairView(TokenObtainPairView):
     It allows users to get an access and refresh token pair when they provide valid credentials.
 
     * The user can only POST to this endpoint with their credentials (username/password).
+    * Attempts are throttled per client IP with the 'login' rate.
     """
     serializer_class = CustomTokenObtainPairSerializer  # Custom serializer to handle token generation
+    throttle_classes = [IPTokenBucketThrottle]  # Protect the password hashing CPU from scripted clients
+    throttle_scope = 'login'
 
 class ChangePasswordView(generics.UpdateAPIView):
     """
@@ -61,6 +66,8 @@ class ChangePasswordView(generics.UpdateAPIView):
 
     This view allows an authenticated user to change their password. 
     It expects the new password data and updates the user's password in the database.
+    All refresh tokens issued to the user are revoked; access tokens already
+    issued stay valid until they expire.
 
     * The user can only PUT data to this endpoint.
     """
@@ -89,5 +96,8 @@ class ChangePasswordView(generics.UpdateAPIView):
         self.request.user.set_password(serializer.validated_data['new_password'])
         self.request.user.save()
         
+        # Sessions started with the old password must not be able to refresh
+        revoke_user_tokens(self.request.user)
+        
         # Return a success response
         return Response({'message': 'Password updated successfully'}, status=status.HTTP_200_OK)
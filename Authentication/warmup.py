@@ -0,0 +1,17 @@
+"""
+Authentication warm-up, a QuizBit.warmup step.
+"""
+from django.contrib.auth.hashers import get_hashers
+from rest_framework_simplejwt.settings import api_settings
+
+
+def load_token_backend():
+    """
+    Import what the first authenticated request and the first login load
+    lazily: the JWT backend (PyJWT and cryptography), the token classes and
+    the password hashers.
+    """
+    from rest_framework_simplejwt.state import token_backend  # noqa: F401
+
+    api_settings.AUTH_TOKEN_CLASSES
+    get_hashers()
@@ -1,22 +1,177 @@
-from django.contrib import admin
-from .models import Question, Choice, Practice
+from django.contrib import admin, messages
+from django.db import models
+from django.urls import reverse
+from django.utils.html import format_html, format_html_join
+from django.utils.safestring import mark_safe
+from django.utils.text import capfirst
+from QuizBit.pagination import EstimatedCountPaginator
+from Tasks.queue import enqueue
+from .deletion import schedule_deletion
+from .similarity import find_near_duplicates, find_near_duplicates_of_text
+from .models import Question, Choice, Practice, PracticeArchive, ExamSession, LiveSession, DeletionJob
+
+class BackgroundDeletionAdminMixin:
+    """
+    Replace the admin's synchronous cascade delete with a scheduled one.
+
+    Objects are soft-deleted right away and their Practice rows are removed
+    in batches by the background task worker. The confirmation page lists
+    only the selected objects instead of collecting every dependent row, but
+    still refuses the deletion when the user may not delete rows it would
+    cascade to, as Django's own delete does.
+    """
+    def get_deleted_objects(self, objs, request):
+        objs = list(objs)
+        opts = self.model._meta
+        deleted_objects = [f'{capfirst(opts.verbose_name)}: {obj}' for obj in objs]
+        return deleted_objects, {opts.verbose_name_plural: len(objs)}, self.get_perms_needed(objs, request), []
+
+    def get_perms_needed(self, objs, request):
+        """
+        Verbose names of the registered models the user lacks the delete
+        permission for and that have rows the deletion would cascade to.
+
+        Only models the user may not delete from are queried, one EXISTS
+        each, instead of loading the rows like Django's collector does.
+        """
+        pks = [obj.pk for obj in objs]
+        perms_needed = set()
+        if not self.has_delete_permission(request):
+            perms_needed.add(self.model._meta.verbose_name)
+        for model, lookup in _cascades(self.model, 'pk__in'):
+            model_admin = self.admin_site._registry.get(model)
+            if model_admin is None or model_admin.has_delete_permission(request):
+                continue
+            if model._base_manager.filter(**{lookup: pks}).exists():
+                perms_needed.add(model._meta.verbose_name)
+        return perms_needed
+
+    def delete_model(self, request, obj):
+        schedule_deletion(obj)
+
+    def delete_queryset(self, request, queryset):
+        # Objects already being deleted keep their job (see schedule_deletion).
+        for obj in queryset:
+            schedule_deletion(obj)
+
+def _cascades(model, lookup, path=()):
+    """
+    (model, lookup) for every model that deleting `model` rows cascades to,
+    directly or through other cascades; `lookup` selects the deleted rows.
+    """
+    for relation in model._meta.related_objects:
+        if relation.many_to_many or relation.on_delete is not models.CASCADE:
+            continue
+        related = relation.related_model
+        if related in path or related is model:
+            continue
+        related_lookup = f'{relation.field.name}__{lookup}'
+        yield related, related_lookup
+        yield from _cascades(related, related_lookup, (*path, model))
 
 @admin.register(Question)
-class QuestionAdmin(admin.ModelAdmin):
+class QuestionAdmin(BackgroundDeletionAdminMixin, admin.ModelAdmin):
     list_display = ('text', 'difficulty', 'created_at')
     list_filter = ('difficulty',)
     search_fields = ('text',)
+    readonly_fields = ('near_duplicates',)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    @admin.display(description='Near-duplicates')
+    def near_duplicates(self, obj):
+        if obj.pk is None:
+            return '-'
+        matches = find_near_duplicates(obj)
+        if not matches:
+            return 'None found'
+        return _question_links(matches, mark_safe('<br>'))
+
+    def save_model(self, request, obj, form, change):
+        # New questions have no choices yet, so only their text is compared.
+        matches = [] if change else find_near_duplicates_of_text(obj.text)
+        super().save_model(request, obj, form, change)
+        if matches:
+            messages.warning(request, format_html(
+                'Similar questions already exist: {}', _question_links(matches, ', ')
+            ))
+
+def _question_links(matches, separator):
+    """Admin links to the questions of (question_id, similarity) pairs."""
+    return format_html_join(
+        separator,
+        '<a href="{}">Question {}</a> ({} similar)',
+        (
+            (reverse('admin:Quiz_question_change', args=[question_id]), question_id, f'{score:.0%}')
+            for question_id, score in matches
+        )
+    )
 
 @admin.register(Choice)
-class ChoiceAdmin(admin.ModelAdmin):
+class ChoiceAdmin(BackgroundDeletionAdminMixin, admin.ModelAdmin):
     list_display = ('text', 'question', 'is_correct')
     list_filter = ('is_correct',)
     search_fields = ('text',)
+    list_select_related = ('question',)
+    autocomplete_fields = ('question',)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
 
 @admin.register(Practice)
 class PracticeAdmin(admin.ModelAdmin):
     list_display = ('user', 'question', 'is_correct', 'created_at')
     list_filter = ('is_correct',)
+    list_select_related = ('user', 'question')
+    autocomplete_fields = ('user', 'question', 'selected_choice')
+    date_hierarchy = 'created_at'
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+@admin.register(PracticeArchive)
+class PracticeArchiveAdmin(admin.ModelAdmin):
+    list_display = ('user', 'question', 'is_correct', 'created_at', 'archived_at')
+    list_filter = ('is_correct',)
+    list_select_related = ('user', 'question')
+    raw_id_fields = ('user', 'question', 'selected_choice')
+    date_hierarchy = 'created_at'
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+@admin.register(ExamSession)
+class ExamSessionAdmin(admin.ModelAdmin):
+    list_display = ('user', 'status', 'score', 'started_at', 'deadline')
+    list_filter = ('status',)
+    list_select_related = ('user',)
+    raw_id_fields = ('user',)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+@admin.register(LiveSession)
+class LiveSessionAdmin(admin.ModelAdmin):
+    list_display = ('code', 'host', 'status', 'current_question', 'created_at', 'closed_at')
+    list_filter = ('status',)
+    search_fields = ('code',)
+    list_select_related = ('host', 'current_question')
+    raw_id_fields = ('host', 'current_question')
+
+@admin.register(DeletionJob)
+class DeletionJobAdmin(admin.ModelAdmin):
+    list_display = ('target', 'description', 'status', 'progress_percent', 'rows_deleted', 'rows_total', 'created_at', 'finished_at')
+    list_filter = ('status', 'target')
+    readonly_fields = [field.name for field in DeletionJob._meta.fields]
+    actions = ['retry_jobs']
 
+    @admin.display(description='Progress')
+    def progress_percent(self, obj):
+        return f'{obj.progress:.0%}'
 
+    @admin.action(description='Retry selected failed or interrupted jobs')
+    def retry_jobs(self, request, queryset):
+        job_ids = list(queryset.exclude(status=DeletionJob.Status.DONE).values_list('pk', flat=True))
+        retried = DeletionJob.objects.filter(pk__in=job_ids).update(status=DeletionJob.Status.PENDING)
+        for job_id in job_ids:
+            enqueue('quiz.run_deletion_job', {'job_id': job_id})
+        self.message_user(request, f'{retried} job(s) queued again.')
 
+    def has_add_permission(self, request):
+        return False
@@ -0,0 +1,69 @@
+"""
+Archival of old Practice rows.
+
+Practice only needs to hold the recent "hot" window that most reads touch.
+Older rows are moved, unchanged and with their original ids, to
+PracticeArchive in small transactions so that neither table is locked for
+long and an interrupted run can simply be restarted.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Min
+from django.utils import timezone
+
+from .models import Practice, PracticeArchive
+
+ARCHIVED_FIELDS = ('id', 'user_id', 'question_id', 'selected_choice_id', 'is_correct', 'created_at')
+
+
+def archive_cutoff(days=None):
+    """Rows created before this moment belong in the archive."""
+    if days is None:
+        days = settings.QUIZBIT_PRACTICE_HOT_DAYS
+    return timezone.now() - timedelta(days=days)
+
+
+def archive_chunk(cutoff, chunk_size):
+    """
+    Move up to `chunk_size` of the oldest Practice rows before `cutoff`.
+
+    Rows are moved in (created_at, id) order, and never past the oldest row
+    the activity rollups have not counted yet (see Quiz.rollups), so every
+    archived row stays older than every hot one. Copy and delete happen in
+    one transaction; returns the number of rows moved.
+    """
+    pending = Practice.objects.filter(rolled_up=False).aggregate(oldest=Min('created_at'))['oldest']
+    if pending is not None:
+        cutoff = min(cutoff, pending)
+    with transaction.atomic():
+        rows = list(
+            Practice.objects.filter(created_at__lt=cutoff)
+            .order_by('created_at', 'id')
+            .values(*ARCHIVED_FIELDS)[:chunk_size]
+        )
+        if not rows:
+            return 0
+        PracticeArchive.objects.bulk_create(
+            [PracticeArchive(**row) for row in rows],
+            ignore_conflicts=True
+        )
+        Practice.objects.filter(pk__in=[row['id'] for row in rows]).delete()
+    return len(rows)
+
+
+def archive_practice(cutoff, chunk_size=5000, max_chunks=None):
+    """
+    Archive every Practice row before `cutoff`, one chunk per transaction.
+
+    Yields the running total after each chunk so callers can report progress.
+    """
+    total = chunks = 0
+    while max_chunks is None or chunks < max_chunks:
+        moved = archive_chunk(cutoff, chunk_size)
+        if not moved:
+            break
+        total += moved
+        chunks += 1
+        yield total
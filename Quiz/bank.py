@@ -0,0 +1,454 @@
+"""
+Question-bank files for exam kiosks and offline clients.
+
+A bank holds every question of one difficulty, or of all of them ('all'),
+with its choices, in one binary file that clients and the server can
+memory-map and read by question id without parsing the rest. Layout,
+little-endian, every section 8-byte aligned:
+
+    header      HEADER: magic b'QBNK', FORMAT_VERSION, flags (0), question
+                count, block count, then the file offsets of the sections
+                meta, ids, difficulty, created_at, records, blocks and data
+    meta        UTF-8 JSON padded with spaces: bank name, difficulty names
+                and the sync `watermark` (see Quiz.sync)
+    ids         uint64 per question, ascending
+    difficulty  uint8 per question, index into meta "difficulties"
+    created_at  int64 per question, microseconds since the epoch (UTC)
+    records     uint32 per question, offset of its record in its block
+    blocks      BLOCK per block: data offset, compressed size, first row,
+                row count, CRC-32 of its (id, `updated_at`) pairs and
+                newest `updated_at`
+    data        zlib-compressed blocks of consecutive questions
+
+A record is the question text and its choices: uint32 length and UTF-8
+text, uint16 choice count, then per choice a uint64 id, uint32 length and
+UTF-8 text. Answers are left out, as in the question API. Looking a question
+up is a binary search of the ids column and the decompression of one block.
+
+`build_bank` reads only the ids and timestamps of the bank's questions and
+reuses the previous file's compressed blocks whose ids and `updated_at`
+values are all unchanged (choice changes move their question's
+`updated_at`, see Quiz.signals); only changed blocks are loaded and
+compressed again. Every pair is checksummed, not just the newest
+timestamp: `updated_at` is taken when a row is saved, not when it commits,
+so an edit can become visible after a rebuild already saw a newer one. Block boundaries carry over between builds and new
+questions fill the last block, so an edit rewrites a single block. Clients
+can update the same way: fetch everything before the data section with one
+range request and download only the blocks whose CRC or timestamp changed.
+"""
+import bisect
+import functools
+import json
+import mmap
+import os
+import struct
+import sys
+import tempfile
+import zlib
+from array import array
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from Tasks.queue import enqueue
+
+from .models import Choice, Question
+from .sync import current_watermark
+
+MAGIC = b'QBNK'
+FORMAT_VERSION = 2
+HEADER = struct.Struct('<4sHHII7Q')
+BLOCK = struct.Struct('<QIIIIq')
+CHOICE = struct.Struct('<QI')
+
+ALL = 'all'
+BANKS = [ALL, *Question.Difficulty.values]
+
+# Questions per block: a lookup decompresses this many. Blocks that only
+# lost questions keep their boundaries; none grows past twice this size.
+BLOCK_ROWS = 256
+
+REBUILD_LOCK_KEY = 'quiz.bank:rebuild'
+BUILD_LOCK_KEY = 'quiz.bank:build'
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+
+class BankFormatError(ValueError):
+    """The file is not a question bank of a supported version."""
+
+
+def bank_path(name):
+    """Path of the bank file `name` ('all' or a difficulty)."""
+    return os.path.join(settings.QUIZBIT_BANK_DIR, f'questions-{name}.qbnk')
+
+
+def _microseconds(moment):
+    return (moment - _EPOCH) // timedelta(microseconds=1)
+
+
+def _column(view, offset, count, code):
+    """`count` values of type `code` at `offset`, without copying them."""
+    column = view[offset:offset + count * array(code).itemsize].cast(code)
+    if sys.byteorder == 'little':
+        return column
+    values = array(code, column.tobytes())
+    column.release()
+    values.byteswap()
+    return values
+
+
+def _pack(code, values):
+    values = array(code, values)
+    if sys.byteorder != 'little':
+        values.byteswap()
+    return values.tobytes()
+
+
+def _rows_crc(rows):
+    """CRC-32 of the (id, updated_at) pairs of `rows`."""
+    return zlib.crc32(_pack('q', [value for row in rows for value in (row[0], _microseconds(row[3]))]))
+
+
+class BankFile:
+    """
+    A memory-mapped question bank.
+
+    `ids`, `difficulty` and `created_at` are the columns as sequences; `get`
+    returns one question shaped like QuestionDetailSerializer's output (with
+    `created_at` a datetime). Recently read blocks stay decompressed. Use as
+    a context manager, or `close()` it.
+    """
+    def __init__(self, path):
+        with open(path, 'rb') as file:
+            self._map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._map)
+        self._columns = []
+        try:
+            self._parse()
+        except Exception:
+            self.close()
+            raise
+        self._block = functools.lru_cache(maxsize=8)(self._decompress_block)
+
+    def _parse(self):
+        if len(self._map) < HEADER.size:
+            raise BankFormatError('File too short')
+        magic, version, _, count, block_count, *offsets = HEADER.unpack_from(self._map)
+        if magic != MAGIC:
+            raise BankFormatError('Not a question bank')
+        if version != FORMAT_VERSION:
+            raise BankFormatError(f'Unsupported bank format version {version}')
+        meta, ids, difficulty, created_at, records, blocks, data = offsets
+        if data > len(self._map):
+            raise BankFormatError('File truncated')
+
+        self.meta = json.loads(bytes(self._view[meta:ids]))
+        self.ids = _column(self._view, ids, count, 'Q')
+        self.difficulty = _column(self._view, difficulty, count, 'B')
+        self.created_at = _column(self._view, created_at, count, 'q')
+        self.record_offsets = _column(self._view, records, count, 'I')
+        self._columns = [self.ids, self.difficulty, self.created_at, self.record_offsets]
+        self.blocks = [BLOCK.unpack_from(self._map, blocks + i * BLOCK.size) for i in range(block_count)]
+        self._first_rows = [block[2] for block in self.blocks]
+
+    @property
+    def name(self):
+        return self.meta['bank']
+
+    @property
+    def watermark(self):
+        return datetime.fromisoformat(self.meta['watermark'])
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __contains__(self, question_id):
+        return self._index(question_id) is not None
+
+    def __iter__(self):
+        return (self._question(index) for index in range(len(self.ids)))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        for column in self._columns:
+            if isinstance(column, memoryview):
+                column.release()
+        self._view.release()
+        self._map.close()
+
+    def get(self, question_id):
+        """The question with id `question_id`; raises KeyError if absent."""
+        index = self._index(question_id)
+        if index is None:
+            raise KeyError(question_id)
+        return self._question(index)
+
+    def _index(self, question_id):
+        index = bisect.bisect_left(self.ids, question_id)
+        if index < len(self.ids) and self.ids[index] == question_id:
+            return index
+        return None
+
+    def _decompress_block(self, block):
+        offset, size = self.blocks[block][:2]
+        return zlib.decompress(self._view[offset:offset + size])
+
+    def block_data(self, block):
+        """The compressed bytes of block number `block`."""
+        offset, size = self.blocks[block][:2]
+        return self._map[offset:offset + size]
+
+    def _question(self, index):
+        data = self._block(bisect.bisect_right(self._first_rows, index) - 1)
+        offset = self.record_offsets[index]
+        (length,) = struct.unpack_from('<I', data, offset)
+        offset += 4
+        text = data[offset:offset + length].decode()
+        offset += length
+        (count,) = struct.unpack_from('<H', data, offset)
+        offset += 2
+        choices = []
+        for _ in range(count):
+            choice_id, length = CHOICE.unpack_from(data, offset)
+            offset += CHOICE.size
+            choices.append({'id': choice_id, 'text': data[offset:offset + length].decode()})
+            offset += length
+        return {
+            'id': self.ids[index],
+            'text': text,
+            'difficulty': self.meta['difficulties'][self.difficulty[index]],
+            'choices': choices,
+            'created_at': _EPOCH + timedelta(microseconds=self.created_at[index]),
+        }
+
+
+def _encode_block(questions):
+    """Compress the records of `questions` [(text, [(choice id, text)])]; returns (data, record offsets)."""
+    buffer, offsets = bytearray(), []
+    for text, choices in questions:
+        offsets.append(len(buffer))
+        text = text.encode()
+        buffer += struct.pack('<I', len(text)) + text + struct.pack('<H', len(choices))
+        for choice_id, choice_text in choices:
+            choice_text = choice_text.encode()
+            buffer += CHOICE.pack(choice_id, len(choice_text)) + choice_text
+    return zlib.compress(bytes(buffer), 6), offsets
+
+
+def _plan_blocks(ids, starts, block_rows=BLOCK_ROWS):
+    """
+    Split the ascending `ids` into blocks; returns (first, stop) index pairs.
+
+    A block starts at every id of `starts` (the first ids of the previous
+    build's blocks) that is reached, and wherever a block is full: after
+    `block_rows` ids past the last previous start, 2 * `block_rows` before.
+    """
+    blocks, position = [], 0
+    for index, pk in enumerate(ids):
+        crossed = False
+        while position < len(starts) and starts[position] <= pk:
+            position += 1
+            crossed = True
+        limit = block_rows if position == len(starts) else 2 * block_rows
+        if not blocks or crossed or index - blocks[-1][0] >= limit:
+            if blocks:
+                blocks[-1][1] = index
+            blocks.append([index, None])
+    if blocks:
+        blocks[-1][1] = len(ids)
+    return [tuple(block) for block in blocks]
+
+
+def _open_previous(path):
+    try:
+        return BankFile(path)
+    except (OSError, ValueError):
+        return None
+
+
+def build_bank(name, force=False):
+    """
+    Write the bank file `name` ('all' or a difficulty), reusing the unchanged
+    blocks of the previous one.
+
+    The file is replaced atomically; readers holding the old file mapped
+    keep reading it. An unchanged bank is left alone unless `force` is set or
+    its watermark is older than half of QUIZBIT_SYNC_TOMBSTONE_DAYS, so that
+    clients can still sync from it. Returns a dict with the number of
+    `questions`, `blocks`, `rebuilt` blocks and whether it was `written`.
+    """
+    if name not in BANKS:
+        raise ValueError(f'Unknown bank {name!r}')
+    questions = Question.objects.order_by('id')
+    if name != ALL:
+        questions = questions.filter(difficulty=name)
+
+    path = bank_path(name)
+    watermark = current_watermark()
+    previous = _open_previous(path)
+    try:
+        blocks = _collect_blocks(questions, previous)
+        rebuilt = sum(block['block'] is None for block in blocks)
+        stats = {'questions': sum(len(block['rows']) for block in blocks), 'blocks': len(blocks), 'rebuilt': rebuilt}
+        stale = previous is None or previous.watermark < timezone.now() - timedelta(
+            days=settings.QUIZBIT_SYNC_TOMBSTONE_DAYS / 2
+        )
+        if not (force or stale or rebuilt or len(blocks) != len(previous.blocks)):
+            return {**stats, 'written': False}
+        _write_bank(path, name, watermark, blocks, previous)
+    finally:
+        if previous is not None:
+            previous.close()
+    return {**stats, 'written': True}
+
+
+def _collect_blocks(questions, previous):
+    """
+    The blocks of the new file, in order, as dicts of `rows` (id, difficulty,
+    created_at, updated_at) and either the previous file's `block` number to
+    copy or the `data` and record `offsets` of a freshly compressed block.
+    """
+    scan = list(questions.values_list('id', 'difficulty', 'created_at', 'updated_at'))
+    reusable = {}
+    if previous is not None:
+        for number, (_, _, first, count, crc, newest) in enumerate(previous.blocks):
+            reusable[previous.ids[first]] = (number, count, crc, newest)
+
+    plan = []
+    for first, stop in _plan_blocks([row[0] for row in scan], sorted(reusable)):
+        rows = scan[first:stop]
+        old = reusable.get(rows[0][0])
+        if old is not None and old[1:] == (len(rows), *_checksums(rows)):
+            plan.append({'rows': rows, 'block': old[0]})
+        else:
+            plan.append({'rows': rows, 'block': None})
+
+    # Consecutive changed blocks are loaded together, by id range: the run
+    # ends where the next reused block (or the bank) does.
+    blocks, run = [], []
+    for block in plan + [None]:
+        if block is not None and block['block'] is None:
+            run.append(block['rows'][0][0])
+            continue
+        if run:
+            blocks.extend(_load_blocks(questions, run, block['rows'][0][0] if block else None))
+            run = []
+        if block is not None:
+            blocks.append(block)
+    return [block for block in blocks if block['rows']]
+
+
+def _checksums(rows):
+    """(CRC-32 of the (id, updated_at) pairs, newest updated_at in microseconds) of block `rows`."""
+    return _rows_crc(rows), max(_microseconds(row[3]) for row in rows)
+
+
+def _load_blocks(questions, starts, end):
+    """
+    Load and compress the blocks starting at the ids `starts`, up to id `end`
+    (excluded; None for no limit), with one query for the questions and one
+    for their choices. Questions added since the scan join their block.
+    """
+    rows = questions.filter(id__gte=starts[0])
+    choices = Choice.objects.filter(question_id__gte=starts[0])
+    if end is not None:
+        rows, choices = rows.filter(id__lt=end), choices.filter(question_id__lt=end)
+    rows = list(rows.values_list('id', 'difficulty', 'created_at', 'updated_at', 'text'))
+
+    choices_by_question = {}
+    for question_id, choice_id, text in choices.order_by('id').values_list('question_id', 'id', 'text'):
+        choices_by_question.setdefault(question_id, []).append((choice_id, text))
+
+    grouped = [[] for _ in starts]
+    for row in rows:
+        grouped[bisect.bisect_right(starts, row[0]) - 1].append(row)
+    blocks = []
+    for group in grouped:
+        data, offsets = _encode_block([(row[4], choices_by_question.get(row[0], [])) for row in group])
+        blocks.append({'rows': [row[:4] for row in group], 'block': None, 'data': data, 'offsets': offsets})
+    return blocks
+
+
+def _write_bank(path, name, watermark, blocks, previous):
+    meta = json.dumps({
+        'bank': name,
+        'difficulties': Question.Difficulty.values,
+        'watermark': watermark.isoformat(),
+    }).encode()
+    meta += b' ' * (-len(meta) % 8)
+    rows = [row for block in blocks for row in block['rows']]
+    count = len(rows)
+    codes = {difficulty: code for code, difficulty in enumerate(Question.Difficulty.values)}
+
+    sections = [HEADER.size]
+    for size in (len(meta), 8 * count, count, 8 * count, 4 * count, BLOCK.size * len(blocks)):
+        sections.append(sections[-1] + size + -size % 8)
+    data_offset = sections[-1]
+
+    directory, offsets, contents = [], [], []
+    position, first = data_offset, 0
+    for block in blocks:
+        if block['block'] is None:
+            data, record_offsets = block['data'], block['offsets']
+        else:
+            old = previous.blocks[block['block']]
+            data = previous.block_data(block['block'])
+            record_offsets = previous.record_offsets[old[2]:old[2] + old[3]]
+        directory.append(BLOCK.pack(position, len(data), first, len(block['rows']), *_checksums(block['rows'])))
+        offsets.extend(record_offsets)
+        contents.append(data)
+        position += len(data)
+        first += len(block['rows'])
+
+    header = HEADER.pack(MAGIC, FORMAT_VERSION, 0, count, len(blocks), *sections)
+    columns = [
+        meta,
+        _pack('Q', [row[0] for row in rows]),
+        _pack('B', [codes[row[1]] for row in rows]),
+        _pack('q', [_microseconds(row[2]) for row in rows]),
+        _pack('I', offsets),
+        b''.join(directory),
+    ]
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with tempfile.NamedTemporaryFile('wb', dir=os.path.dirname(path), suffix='.tmp', delete=False) as file:
+        try:
+            file.write(header)
+            for column in columns:
+                file.write(column + bytes(-len(column) % 8))
+            for data in contents:
+                file.write(data)
+            file.flush()
+            os.fsync(file.fileno())
+        except BaseException:
+            os.unlink(file.name)
+            raise
+    os.replace(file.name, path)
+
+
+def schedule_bank_rebuild():
+    """
+    Queue the rebuild of every bank QUIZBIT_BANK_REBUILD_DELAY seconds from
+    now, unless one is already waiting: a burst of edits costs one rebuild.
+    """
+    delay = settings.QUIZBIT_BANK_REBUILD_DELAY
+    if cache.add(REBUILD_LOCK_KEY, 1, delay):
+        # Start after the lock expires, so edits that found it taken are in.
+        enqueue('quiz.build_question_banks', run_after=timezone.now() + timedelta(seconds=delay + 1))
+
+
+def request_bank_build():
+    """
+    Queue a build of every bank right away, for a download that found its
+    file missing. Requests arriving while one is queued do not add another.
+    """
+    if cache.add(BUILD_LOCK_KEY, 1, settings.QUIZBIT_BANK_REBUILD_DELAY):
+        enqueue('quiz.build_question_banks')
@@ -0,0 +1,19 @@
+"""
+Cache keys for the Quiz read endpoints.
+
+All question content (questions and their choices) lives in one versioned
+namespace; any write to a Question or Choice bumps it, see Quiz.signals.
+"""
+from QuizBit.cache import bump_namespace, versioned_key
+
+QUESTIONS_NAMESPACE = 'quiz.questions'
+
+
+def question_cache_key(*parts):
+    """Versioned cache key for data derived from question content."""
+    return versioned_key(QUESTIONS_NAMESPACE, *parts)
+
+
+def invalidate_questions():
+    """Drop every cached entry derived from question content."""
+    bump_namespace(QUESTIONS_NAMESPACE)
@@ -0,0 +1,143 @@
+import json
+
+from channels.db import database_sync_to_async
+from channels.generic.websocket import AsyncWebsocketConsumer
+
+from QuizBit.ws_auth import AUTH_SUBPROTOCOL
+
+from .live import (
+    AnswerKey, build_question_event, claim_answer, close_live_session, group_name,
+    practice_buffer, render_message, start_question
+)
+from .models import LiveSession, Practice
+
+
+class LiveQuizConsumer(AsyncWebsocketConsumer):
+    """
+    WebSocket endpoint of a live quiz session.
+    
+    ws://<host>/ws/live/<code>/
+    
+    Authentication:
+        Required (JWT access token as a subprotocol, see QuizBit.ws_auth:
+        new WebSocket(url, ['quizbit.jwt', accessToken]))
+    
+    Messages from the host:
+        {"action": "next", "question_id": int}     Show a question to everyone
+        {"action": "close"}                        End the session
+    
+    Messages from students:
+        {"action": "answer", "question_id": int, "choice_id": int}
+    
+    Messages to clients:
+        {"type": "question", "question": {...}}    Same shape as GET questions/<pk>/
+        {"type": "result", "question_id": int, "choice_id": int, "is_correct": bool}
+        {"type": "closed"}
+        {"type": "error", "error": string}
+    
+    Each student can answer the current question once, however many times
+    they reconnect.
+    """
+    async def connect(self):
+        user = self.scope.get('user')
+        if user is None or not user.is_authenticated:
+            await self.close(code=4401)
+            return
+
+        self.code = self.scope['url_route']['kwargs']['code']
+        session = await database_sync_to_async(
+            LiveSession.objects.filter(code=self.code, status=LiveSession.Status.OPEN).first
+        )()
+        if session is None:
+            await self.close(code=4404)
+            return
+
+        self.user_id = user.pk
+        self.is_host = session.host_id == user.pk
+        self.group = group_name(self.code)
+        self.answer_key = None
+        await self.channel_layer.group_add(self.group, self.channel_name)
+        # Browsers drop the connection unless one of the offered subprotocols is selected
+        await self.accept(AUTH_SUBPROTOCOL if AUTH_SUBPROTOCOL in self.scope.get('subprotocols', ()) else None)
+
+        # Late joiners get the question everyone else is looking at
+        if session.current_question_id is not None:
+            event = await database_sync_to_async(build_question_event)(session.current_question_id)
+            if event is not None:
+                await self.live_question(event)
+
+    async def disconnect(self, close_code):
+        if getattr(self, 'group', None):
+            await self.channel_layer.group_discard(self.group, self.channel_name)
+
+    async def receive(self, text_data=None, bytes_data=None):
+        try:
+            message = json.loads(text_data or bytes_data)
+        except (TypeError, ValueError):
+            await self.send_error('Messages must be JSON objects')
+            return
+        action = message.get('action') if isinstance(message, dict) else None
+
+        if action == 'answer':
+            await self.handle_answer(message)
+        elif action in ('next', 'close') and not self.is_host:
+            await self.send_error('Only the host can do that')
+        elif action == 'next':
+            await self.handle_next(message)
+        elif action == 'close':
+            await self.handle_close()
+        else:
+            await self.send_error('Unknown action')
+
+    async def handle_next(self, message):
+        """Fan the question out to every client of the session."""
+        event = await database_sync_to_async(start_question)(self.code, message.get('question_id'))
+        if event is None:
+            await self.send_error('Question not found')
+            return
+        await self.channel_layer.group_send(self.group, event)
+
+    async def handle_close(self):
+        event = await database_sync_to_async(close_live_session)(self.code)
+        await practice_buffer.flush()
+        await self.channel_layer.group_send(self.group, event)
+
+    async def handle_answer(self, message):
+        """Grade an answer from the in-memory key and buffer its Practice row."""
+        answer_key = self.answer_key
+        question_id, choice_id = message.get('question_id'), message.get('choice_id')
+        if answer_key is None or question_id != answer_key.question_id:
+            await self.send_error('This question is not being asked')
+            return
+        if choice_id not in answer_key.choice_ids:
+            await self.send_error('Invalid choice for this question')
+            return
+        if not await claim_answer(self.code, self.user_id, question_id):
+            await self.send_error('You already answered this question')
+            return
+
+        is_correct = choice_id in answer_key.correct_ids
+        await practice_buffer.add(self.code, Practice(
+            user_id=self.user_id,
+            question_id=question_id,
+            selected_choice_id=choice_id,
+            is_correct=is_correct
+        ))
+        await self.send(text_data=render_message({
+            'type': 'result',
+            'question_id': question_id,
+            'choice_id': choice_id,
+            'is_correct': is_correct,
+        }))
+
+    async def send_error(self, error):
+        await self.send(text_data=render_message({'type': 'error', 'error': error}))
+
+    async def live_question(self, event):
+        """A question was pushed: remember its key, forward the frame as is."""
+        self.answer_key = AnswerKey.from_event(event)
+        await self.send(text_data=event['text'])
+
+    async def live_closed(self, event):
+        await self.send(text_data=event['text'])
+        await self.close()
@@ -0,0 +1,205 @@
+"""
+Chunked background deletion of users, questions and choices.
+
+Deleting one of those with `Model.delete()` makes Django's collector load
+every dependent Practice row into memory and delete them all in a single
+transaction, holding locks on Practice for as long as that takes. Instead,
+`schedule_deletion` soft-deletes the object at once (it disappears from the
+API, the admin and logins) and records a DeletionJob. `run_deletion_job`
+then removes the dependent rows in bounded batches, one short transaction
+each, and finally deletes the object itself, whose cascade has nothing left
+to collect. Jobs are run by the background task worker, or by
+`manage.py process_deletions`.
+
+A running job holds a lease that every batch renews (`heartbeat_at`). When
+its worker dies, the lease runs out after QUIZBIT_DELETION_LEASE seconds and
+the job can be claimed again; it resumes where it stopped.
+"""
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from Authentication.models import User
+from Tasks.queue import enqueue
+
+from .models import Choice, DailyActiveUser, DeletionJob, ExamSession, Practice, PracticeArchive, Question
+
+logger = logging.getLogger(__name__)
+
+# Dependent rows removed in batches before the object itself, per target:
+# (model, lookup of the deleted object's id) in deletion order.
+DEPENDENTS = {
+    DeletionJob.Target.USER: [
+        (Practice, 'user_id'),
+        (PracticeArchive, 'user_id'),
+        (ExamSession, 'user_id'),
+        (DailyActiveUser, 'user_id'),
+    ],
+    DeletionJob.Target.QUESTION: [
+        (Practice, 'question_id'),
+        (PracticeArchive, 'question_id'),
+    ],
+    DeletionJob.Target.CHOICE: [
+        (Practice, 'selected_choice_id'),
+        (PracticeArchive, 'selected_choice_id'),
+    ],
+}
+
+TARGETS = {
+    User: DeletionJob.Target.USER,
+    Question: DeletionJob.Target.QUESTION,
+    Choice: DeletionJob.Target.CHOICE,
+}
+
+
+def get_target_object(job):
+    """Return the object a job deletes, soft-deleted or not, or None."""
+    managers = {
+        DeletionJob.Target.USER: User._base_manager,
+        DeletionJob.Target.QUESTION: Question.all_objects,
+        DeletionJob.Target.CHOICE: Choice.all_objects,
+    }
+    return managers[job.target].filter(pk=job.object_id).first()
+
+
+def schedule_deletion(obj):
+    """
+    Soft-delete `obj` immediately and queue the removal of its rows.
+
+    Users are deactivated, which already stops logins and token use;
+    questions and choices get `deleted_at` and vanish from their default
+    managers. The job is queued for the background task worker. Returns the
+    DeletionJob; an object already being deleted keeps its pending or running
+    job instead of getting a second one.
+    """
+    target = TARGETS[type(obj)]
+    with transaction.atomic():
+        unfinished = DeletionJob.objects.filter(
+            target=target, object_id=obj.pk,
+            status__in=[DeletionJob.Status.PENDING, DeletionJob.Status.RUNNING]
+        ).first()
+        if unfinished is not None:
+            return unfinished
+
+        if target == DeletionJob.Target.USER:
+            obj.is_active = False
+            obj.save(update_fields=['is_active'])
+        else:
+            obj.deleted_at = timezone.now()
+            obj.save()
+
+        rows_total = sum(
+            model._base_manager.filter(**{lookup: obj.pk}).count()
+            for model, lookup in DEPENDENTS[target]
+        )
+        job = DeletionJob.objects.create(
+            target=target,
+            object_id=obj.pk,
+            description=str(obj)[:200],
+            rows_total=rows_total
+        )
+        enqueue('quiz.run_deletion_job', {'job_id': job.pk})
+        return job
+
+
+def delete_in_batches(queryset, batch_size):
+    """
+    Delete the rows of `queryset` `batch_size` at a time.
+
+    Every batch is its own transaction, so locks are only ever held on one
+    batch of rows. Yields the number of rows deleted by each batch.
+    """
+    model = queryset.model
+    while True:
+        with transaction.atomic():
+            ids = list(queryset.order_by('pk').values_list('pk', flat=True)[:batch_size])
+            if not ids:
+                return
+            deleted, _ = model._base_manager.filter(pk__in=ids).delete()
+        yield deleted
+
+
+def claimable_deletion_jobs(include_failed=False):
+    """
+    Jobs a worker may claim: pending ones, running ones whose lease has
+    expired and, with `include_failed`, failed ones.
+    """
+    expired = timezone.now() - timedelta(seconds=settings.QUIZBIT_DELETION_LEASE)
+    claimable = Q(status=DeletionJob.Status.PENDING) | Q(
+        Q(heartbeat_at__lt=expired) | Q(heartbeat_at__isnull=True),
+        status=DeletionJob.Status.RUNNING
+    )
+    if include_failed:
+        claimable |= Q(status=DeletionJob.Status.FAILED)
+    return DeletionJob.objects.filter(claimable)
+
+
+def claim_deletion_job(job, include_failed=False):
+    """
+    Atomically move a claimable job to running and take its lease; False if
+    another worker holds it.
+    """
+    claimed = claimable_deletion_jobs(include_failed).filter(pk=job.pk).update(
+        status=DeletionJob.Status.RUNNING, heartbeat_at=timezone.now()
+    )
+    return bool(claimed)
+
+
+def run_deletion_job(job, batch_size=1000):
+    """
+    Remove the dependent rows of a claimed `job` in batches, then the object.
+
+    Progress is saved, and the lease renewed, after every batch. A failed or
+    interrupted job can be claimed and run again; it resumes where it stopped.
+    """
+    job.status = DeletionJob.Status.RUNNING
+    job.started_at = job.started_at or timezone.now()
+    job.heartbeat_at = timezone.now()
+    job.last_error = ''
+    job.save(update_fields=['status', 'started_at', 'heartbeat_at', 'last_error'])
+
+    try:
+        for model, lookup in DEPENDENTS[job.target]:
+            queryset = model._base_manager.filter(**{lookup: job.object_id})
+            for deleted in delete_in_batches(queryset, batch_size):
+                job.rows_deleted += deleted
+                job.heartbeat_at = timezone.now()
+                job.save(update_fields=['rows_deleted', 'heartbeat_at'])
+
+        obj = get_target_object(job)
+        if obj is not None:
+            obj.delete()
+    except Exception as exc:
+        job.status = DeletionJob.Status.FAILED
+        job.last_error = repr(exc)
+        job.save(update_fields=['status', 'last_error'])
+        raise
+
+    job.status = DeletionJob.Status.DONE
+    job.finished_at = timezone.now()
+    job.save(update_fields=['status', 'finished_at'])
+    return job
+
+
+def run_pending_deletion_jobs(batch_size=1000):
+    """
+    Claim and run every pending job, and every running job whose lease has
+    expired, oldest first; return how many succeeded.
+
+    Failures are recorded on the job and logged, and do not stop the others.
+    """
+    succeeded = 0
+    for job in claimable_deletion_jobs().order_by('created_at'):
+        if not claim_deletion_job(job):
+            continue
+        try:
+            run_deletion_job(job, batch_size)
+        except Exception:
+            logger.exception('Deletion job %s failed', job.pk)
+            continue
+        succeeded += 1
+    return succeeded
@@ -0,0 +1,138 @@
+"""
+Timed exam sessions.
+
+An exam is a fixed list of questions with a deadline. While it is running,
+the selected choices are merged into the session's `answers` JSON column;
+nothing is written to Practice. Grading looks up every selected choice of
+every session being graded in one query and bulk-inserts the resulting
+Practice rows, so many sessions can be graded together in a single pass.
+Sessions nobody submits are graded by a background task queued for just
+after their deadline.
+"""
+import random
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils import timezone
+
+from Tasks.queue import enqueue
+
+from .models import Choice, ExamSession, Practice, Question
+from .signals import practices_recorded
+
+# How long after the deadline an unsubmitted exam is graded automatically,
+# leaving room for a submit sent just before the deadline.
+GRADING_GRACE = timedelta(seconds=60)
+
+
+def create_exam_session(user, question_count, duration, difficulty=None, question_ids=None):
+    """
+    Start an exam for `user` lasting `duration`.
+
+    The questions are `question_ids` when given (ids that do not exist are
+    dropped), otherwise a random sample of `question_count` questions,
+    optionally restricted to one difficulty. Grading is queued for just
+    after the deadline in case the session is never submitted.
+    """
+    queryset = Question.objects.all()
+    if question_ids:
+        existing = set(queryset.filter(pk__in=question_ids).values_list('id', flat=True))
+        selected = [pk for pk in dict.fromkeys(question_ids) if pk in existing]
+    else:
+        if difficulty:
+            queryset = queryset.filter(difficulty=difficulty)
+        candidates = list(queryset.values_list('id', flat=True))
+        selected = random.sample(candidates, min(question_count, len(candidates)))
+
+    with transaction.atomic():
+        session = ExamSession.objects.create(
+            user=user,
+            question_ids=selected,
+            deadline=timezone.now() + duration,
+        )
+        if selected:
+            enqueue(
+                'quiz.grade_exam_sessions',
+                {'session_id': session.pk},
+                run_after=session.deadline + GRADING_GRACE
+            )
+    return session
+
+
+def record_answers(session_pk, user, answers):
+    """
+    Merge `answers` ({question_id: choice_id}) into an open session.
+
+    The session row is locked for the read-modify-write so that concurrent
+    saves from the same student do not lose each other's answers. Returns the
+    updated session, or raises ExamSession.DoesNotExist / ValueError.
+    """
+    with transaction.atomic():
+        session = ExamSession.objects.select_for_update().get(pk=session_pk, user=user)
+        if not session.is_open:
+            raise ValueError('This exam is closed')
+        unknown = set(answers) - set(session.question_ids)
+        if unknown:
+            raise ValueError(f'Questions {sorted(unknown)} are not part of this exam')
+
+        session.answers.update({str(question_id): choice_id for question_id, choice_id in answers.items()})
+        ExamSession.objects.filter(pk=session.pk).update(answers=session.answers)
+    return session
+
+
+def grade_sessions(queryset):
+    """
+    Grade every in-progress session of `queryset` in one set-based pass.
+
+    One query fetches all the selected choices, one bulk insert writes the
+    Practice rows and one bulk update stores the scores, no matter how many
+    sessions are graded. An answer only counts if the choice still exists and
+    belongs to the question it was given for; anything else is treated as
+    unanswered. Returns the graded sessions.
+    """
+    with transaction.atomic():
+        sessions = list(
+            queryset.select_for_update().filter(status=ExamSession.Status.IN_PROGRESS)
+        )
+        if not sessions:
+            return []
+
+        choice_ids = {choice_id for session in sessions for choice_id in session.answers.values()}
+        choices = {
+            choice_id: (question_id, is_correct)
+            for choice_id, question_id, is_correct in Choice.objects.filter(
+                pk__in=choice_ids
+            ).values_list('id', 'question_id', 'is_correct')
+        }
+
+        now = timezone.now()
+        practices = []
+        for session in sessions:
+            session.score = 0
+            for question_id in session.question_ids:
+                choice_id = session.answers.get(str(question_id))
+                question_and_correct = choices.get(choice_id)
+                if question_and_correct is None or question_and_correct[0] != question_id:
+                    continue
+                is_correct = question_and_correct[1]
+                practices.append(Practice(
+                    user_id=session.user_id,
+                    question_id=question_id,
+                    selected_choice_id=choice_id,
+                    is_correct=is_correct
+                ))
+                session.score += is_correct
+            session.status = ExamSession.Status.GRADED
+            session.submitted_at = now
+
+        Practice.objects.bulk_create(practices, batch_size=500)
+        ExamSession.objects.bulk_update(sessions, ['score', 'status', 'submitted_at'], batch_size=500)
+        practices_recorded.send(sender=Practice, practices=practices)
+    return sessions
+
+
+def grade_expired_sessions(grace=timedelta(0)):
+    """Grade every in-progress session whose deadline passed more than `grace` ago."""
+    return grade_sessions(
+        ExamSession.objects.filter(deadline__lt=timezone.now() - grace)
+    )
@@ -0,0 +1,241 @@
+"""
+Live quiz sessions over WebSockets.
+
+When the host moves to a question it is serialized once into the exact text
+frame every client receives and sent to the session's group on the channel
+layer, so fanning it out to hundreds of students costs one queue put and one
+socket write per connection. The same channel-layer message carries the
+question's answer key: consumers keep it in memory and grade submissions
+without touching the database. It never leaves the server.
+
+Each student's answer to a question is recorded in the cache under the
+session, user and question, so reconnecting (or opening a second socket)
+does not allow answering again. Graded answers are buffered per process and written to Practice with
+bulk_create once QUIZBIT_LIVE_FLUSH_SIZE answers are waiting or
+QUIZBIT_LIVE_FLUSH_INTERVAL seconds have passed, whichever comes first;
+answers still buffered when the process exits are written on the way out.
+"""
+import asyncio
+import atexit
+import logging
+import secrets
+
+from channels.db import database_sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from QuizBit.cache import get_or_compute
+
+from .cache import question_cache_key
+from .models import LiveSession, Practice, Question
+from .renderers import FastJSONRenderer
+from .serializers import QuestionDetailSerializer
+from .signals import practices_recorded
+
+logger = logging.getLogger(__name__)
+
+CODE_ALPHABET = 'ABCDEFGHJKLMNPQRSTUVWXYZ23456789'
+CODE_LENGTH = 6
+
+# Live sessions last minutes; answers are remembered for a day to be safe.
+ANSWERED_TIMEOUT = 24 * 60 * 60
+
+# Failed writes in a row after which the buffered answers are given up.
+MAX_FLUSH_ATTEMPTS = 5
+
+_renderer = FastJSONRenderer()
+
+
+def group_name(code):
+    """Channel-layer group of the clients connected to session `code`."""
+    return f'live.{code}'
+
+
+def render_message(data):
+    """Encode a message for the socket, the same JSON the REST API returns."""
+    return _renderer.render(data).decode()
+
+
+def create_live_session(host):
+    """Open a live session hosted by `host` with a fresh join code."""
+    while True:
+        code = ''.join(secrets.choice(CODE_ALPHABET) for _ in range(CODE_LENGTH))
+        if not LiveSession.objects.filter(code=code).exists():
+            return LiveSession.objects.create(code=code, host=host)
+
+
+def question_event_key(question_id):
+    """Cache key of the channel-layer event presenting a question."""
+    return question_cache_key('live', question_id)
+
+
+def question_event(question, data=None):
+    """
+    Channel-layer event presenting `question`, whose choices should be
+    prefetched; `data` is its QuestionDetailSerializer output, if at hand.
+
+    The event holds the pre-rendered frame sent to students (no correct
+    answers in it) and the answer key used by the consumers.
+    """
+    choices = list(question.choices.all())
+    return {
+        'type': 'live.question',
+        'question_id': question.pk,
+        'text': render_message({
+            'type': 'question',
+            'question': QuestionDetailSerializer(question).data if data is None else data,
+        }),
+        'choice_ids': [choice.pk for choice in choices],
+        'correct_ids': [choice.pk for choice in choices if choice.is_correct],
+    }
+
+
+def build_question_event(question_id):
+    """
+    The event presenting question `question_id`, or None if it does not
+    exist. It is cached in the question namespace, so edits to the question
+    are picked up.
+    """
+    def compute():
+        question = Question.objects.filter(pk=question_id).prefetch_related('choices').first()
+        return question_event(question) if question is not None else None
+    return get_or_compute(question_event_key(question_id), compute, settings.QUIZBIT_QUESTION_CACHE_TIMEOUT)
+
+
+def start_question(code, question_id):
+    """
+    Make `question_id` the current question of open session `code` and
+    return its event, or None if the session or question does not exist.
+    """
+    event = build_question_event(question_id)
+    if event is None:
+        return None
+    updated = LiveSession.objects.filter(code=code, status=LiveSession.Status.OPEN).update(
+        current_question_id=question_id
+    )
+    return event if updated else None
+
+
+def close_live_session(code):
+    """Close session `code` and return the event telling clients so."""
+    LiveSession.objects.filter(code=code, status=LiveSession.Status.OPEN).update(
+        status=LiveSession.Status.CLOSED, closed_at=timezone.now()
+    )
+    return {'type': 'live.closed', 'text': render_message({'type': 'closed'})}
+
+
+def store_practices(practices):
+    """Insert graded live answers and announce them."""
+    with transaction.atomic():
+        Practice.objects.bulk_create(practices, batch_size=500)
+        practices_recorded.send(sender=Practice, practices=practices)
+
+
+def answered_key(code, user_id, question_id):
+    """Cache key recording that `user_id` answered `question_id` in session `code`."""
+    return f'quiz.live:answered:{code}:{user_id}:{question_id}'
+
+
+async def claim_answer(code, user_id, question_id):
+    """
+    Record that `user_id` answered `question_id` in session `code`.
+
+    Returns False if they already had; the cache add is atomic, so of two
+    concurrent submissions only one is accepted.
+    """
+    return await cache.aadd(answered_key(code, user_id, question_id), 1, ANSWERED_TIMEOUT)
+
+
+class AnswerKey:
+    """
+    Valid and correct choice ids of the current question, shared by every
+    consumer of the process that received the same event.
+    """
+    _instances = {}
+
+    def __init__(self, question_id, choice_ids, correct_ids):
+        self.question_id = question_id
+        self.choice_ids = frozenset(choice_ids)
+        self.correct_ids = frozenset(correct_ids)
+
+    @classmethod
+    def from_event(cls, event):
+        key = (event['question_id'], tuple(event['choice_ids']), tuple(event['correct_ids']))
+        answer_key = cls._instances.get(key)
+        if answer_key is None:
+            if len(cls._instances) >= 1024:
+                cls._instances.clear()
+            answer_key = cls._instances[key] = cls(*key)
+        return answer_key
+
+
+class PracticeBuffer:
+    """
+    Per-process buffer of graded live answers, written with bulk_create.
+
+    A batch that cannot be written goes back to the buffer and is retried
+    QUIZBIT_LIVE_FLUSH_INTERVAL seconds later. After MAX_FLUSH_ATTEMPTS
+    failures in a row the buffered answers are dropped and their claims
+    released, so the students can answer those questions again.
+    """
+    def __init__(self):
+        self.pending = []  # (session code, Practice) pairs
+        self.failures = 0
+        self._timer = None
+
+    async def add(self, code, practice):
+        self.pending.append((code, practice))
+        if len(self.pending) >= settings.QUIZBIT_LIVE_FLUSH_SIZE:
+            await self.flush()
+        else:
+            self._schedule_flush()
+
+    def _schedule_flush(self):
+        if self._timer is None or self._timer.done():
+            self._timer = asyncio.ensure_future(self._flush_later())
+
+    async def _flush_later(self):
+        await asyncio.sleep(settings.QUIZBIT_LIVE_FLUSH_INTERVAL)
+        self._timer = None
+        await self.flush()
+
+    async def flush(self):
+        """Write every buffered answer; return how many were written."""
+        batch, self.pending = self.pending, []
+        if not batch:
+            return 0
+        try:
+            await database_sync_to_async(store_practices)([practice for _, practice in batch])
+        except Exception:
+            self.failures += 1
+            if self.failures < MAX_FLUSH_ATTEMPTS:
+                logger.exception('Could not store %d live answers, will retry', len(batch))
+                self.pending[:0] = batch
+                self._schedule_flush()
+            else:
+                logger.exception('Could not store %d live answers, giving up', len(batch))
+                self.failures = 0
+                await cache.adelete_many([
+                    answered_key(code, practice.user_id, practice.question_id) for code, practice in batch
+                ])
+            return 0
+        self.failures = 0
+        return len(batch)
+
+    def close(self):
+        """
+        Write the answers still buffered. Registered to run at exit, once
+        the server has stopped its event loop.
+        """
+        batch, self.pending = self.pending, []
+        if batch:
+            try:
+                store_practices([practice for _, practice in batch])
+            except Exception:
+                logger.exception('Could not store %d live answers at exit', len(batch))
+
+
+practice_buffer = PracticeBuffer()
+atexit.register(practice_buffer.close)
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from Quiz.archive import archive_cutoff, archive_practice
+
+
+class Command(BaseCommand):
+    """
+    Move Practice rows older than the hot window to PracticeArchive.
+
+    Safe to run repeatedly (e.g. nightly from cron) and to interrupt: every
+    chunk is its own transaction.
+    """
+    help = 'Archive Practice rows older than QUIZBIT_PRACTICE_HOT_DAYS'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, help='Override QUIZBIT_PRACTICE_HOT_DAYS')
+        parser.add_argument('--chunk-size', type=int, default=5000, help='Rows moved per transaction')
+        parser.add_argument('--max-chunks', type=int, help='Stop after this many chunks')
+
+    def handle(self, *args, **options):
+        cutoff = archive_cutoff(options['days'])
+        self.stdout.write(f'Archiving practice rows created before {cutoff.isoformat()}')
+
+        total = 0
+        for total in archive_practice(cutoff, options['chunk_size'], options['max_chunks']):
+            self.stdout.write(f'  {total} rows archived')
+        self.stdout.write(self.style.SUCCESS(f'Archived {total} practice rows'))
@@ -0,0 +1,93 @@
+import time
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Max
+
+from Authentication.models import User
+from Quiz.bank import REBUILD_LOCK_KEY
+from Quiz.deletion import DEPENDENTS, delete_in_batches, get_target_object, schedule_deletion
+from Quiz.models import Choice, DeletionJob, Practice, Question, Tombstone
+from Tasks.models import Task
+
+
+class Command(BaseCommand):
+    """
+    Compare lock time of the stock cascade delete with the chunked deletion.
+
+    Two identical questions with --rows practice rows each are created; one
+    is deleted with `Question.delete()` in a single transaction, the other is
+    soft-deleted and removed in batches. The longest transaction of each run
+    approximates how long Practice stays locked.
+
+    Everything the runs leave behind in the database (the user, tombstones of
+    the deleted questions, the deletion job and the tasks queued by the
+    deletions) is removed afterwards.
+    """
+    help = 'Benchmark cascade delete against chunked background deletion'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=100000, help='Practice rows per question')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Rows per batch for the chunked run')
+
+    def handle(self, *args, **options):
+        rows, batch_size = options['rows'], options['batch_size']
+        last_task = Task.objects.aggregate(last=Max('pk'))['last'] or 0
+        user = User.objects.create_user(username='bench-cascade', email='bench-cascade@example.com')
+        questions = []
+        try:
+            cascade_question = self._create_question(user, rows)
+            chunked_question = self._create_question(user, rows)
+            questions = [cascade_question.pk, chunked_question.pk]
+
+            started = time.perf_counter()
+            with transaction.atomic():
+                cascade_question.delete()
+            cascade_time = time.perf_counter() - started
+            self.stdout.write(f'cascade delete: one transaction of {cascade_time * 1000:.0f} ms')
+
+            started = time.perf_counter()
+            job = schedule_deletion(chunked_question)
+            longest = schedule_time = time.perf_counter() - started
+            batches = 0
+            for model, lookup in DEPENDENTS[job.target]:
+                batch_started = time.perf_counter()
+                for _ in delete_in_batches(model._base_manager.filter(**{lookup: job.object_id}), batch_size):
+                    longest = max(longest, time.perf_counter() - batch_started)
+                    batches += 1
+                    batch_started = time.perf_counter()
+            final_started = time.perf_counter()
+            get_target_object(job).delete()
+            longest = max(longest, time.perf_counter() - final_started)
+            total = time.perf_counter() - started
+
+            self.stdout.write(
+                f'chunked delete: soft delete {schedule_time * 1000:.0f} ms, {batches} batches, '
+                f'longest transaction {longest * 1000:.0f} ms, total {total * 1000:.0f} ms'
+            )
+        finally:
+            self._clean_up(user, questions, last_task)
+
+    def _clean_up(self, user, questions, last_task):
+        """Remove the rows the runs created, beyond the deleted questions themselves."""
+        user.delete()
+        Question.all_objects.filter(pk__in=questions).delete()
+        Tombstone.objects.filter(question_id__in=questions).delete()
+        jobs = DeletionJob.objects.filter(target=DeletionJob.Target.QUESTION, object_id__in=questions)
+        job_ids = list(jobs.values_list('pk', flat=True))
+        jobs.delete()
+        new_tasks = Task.objects.filter(pk__gt=last_task)
+        new_tasks.filter(name='quiz.run_deletion_job', payload__job_id__in=job_ids).delete()
+        # The question-bank rebuild the deletions queued has nothing to change.
+        if new_tasks.filter(name='quiz.build_question_banks').delete()[0]:
+            cache.delete(REBUILD_LOCK_KEY)
+
+    def _create_question(self, user, rows):
+        question = Question.objects.create(text='Benchmark cascade question')
+        choice = Choice.objects.create(question=question, text='Benchmark choice', is_correct=True)
+        Practice.objects.bulk_create(
+            (Practice(user=user, question=question, selected_choice=choice, is_correct=True) for _ in range(rows)),
+            batch_size=5000
+        )
+        return question
@@ -0,0 +1,138 @@
+import os
+import signal
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework_simplejwt.tokens import AccessToken
+
+from Authentication.models import User
+from Quiz.cache import invalidate_questions
+from QuizBit.cache import cache_is_shared
+
+# Server profiles compared, as gunicorn.conf.py environment overrides.
+PROFILES = {
+    'cold': {'QUIZBIT_GUNICORN_PRELOAD': 'false', 'QUIZBIT_GUNICORN_WARMUP': 'false'},
+    'warm-workers': {'QUIZBIT_GUNICORN_PRELOAD': 'false', 'QUIZBIT_GUNICORN_WARMUP': 'true'},
+    'preload': {'QUIZBIT_GUNICORN_PRELOAD': 'true', 'QUIZBIT_GUNICORN_WARMUP': 'true'},
+}
+
+
+class Command(BaseCommand):
+    """
+    Measure the first-request latency and memory of fresh gunicorn servers.
+
+    Each round starts gunicorn with gunicorn.conf.py in one of PROFILES
+    against the configured database, waits for the workers to boot, and
+    times the first requests to `--path` as `--user`, then a few more to get
+    the steady latency. Worker memory is read from /proc (Linux only): PSS
+    counts pages shared with the master and the other workers fractionally,
+    USS only the pages private to the worker. The question caches are
+    invalidated before every round, so like the servers it needs a shared
+    cache (QUIZBIT_CACHE_BACKEND file or redis).
+    """
+    help = 'Compare cold first-request latency and per-worker memory of the gunicorn profiles'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', help='Username the requests are made as (default: first active user)')
+        parser.add_argument('--path', default='/api/v1/quizzes/questions/', help='Endpoint to request')
+        parser.add_argument('--workers', type=int, default=4, help='Gunicorn workers per server')
+        parser.add_argument('--rounds', type=int, default=3, help='Servers started per profile; medians are reported')
+        parser.add_argument('--settle', type=float, default=3.0, help='Seconds to wait after the workers are forked')
+        parser.add_argument('--profile', action='append', choices=PROFILES, help='Profile to run (default: all)')
+
+    def handle(self, *args, **options):
+        if not cache_is_shared():
+            raise CommandError('gunicorn.conf.py needs a shared cache; set QUIZBIT_CACHE_BACKEND to file or redis')
+        users = User.objects.filter(is_active=True)
+        user = (users.filter(username=options['user']) if options['user'] else users.order_by('pk')).first()
+        if user is None:
+            raise CommandError('No active user to make the requests as; create one or pass --user')
+        token = str(AccessToken.for_user(user))
+
+        for name in options['profile'] or PROFILES:
+            results = []
+            for _ in range(options['rounds']):
+                invalidate_questions()
+                results.append(self._run_server(PROFILES[name], token, options))
+            self.stdout.write(
+                f"{name:<13} first {statistics.median(r['first'] for r in results):7.1f} ms   "
+                f"steady {statistics.median(r['steady'] for r in results):6.1f} ms   "
+                f"worker PSS {statistics.median(r['pss'] for r in results):6.1f} MB   "
+                f"worker USS {statistics.median(r['uss'] for r in results):6.1f} MB"
+            )
+
+    def _run_server(self, profile, token, options):
+        port = _free_port()
+        env = {
+            **os.environ,
+            **profile,
+            'QUIZBIT_GUNICORN_BIND': f'127.0.0.1:{port}',
+            'QUIZBIT_GUNICORN_WORKERS': str(options['workers']),
+            'QUIZBIT_ALLOWED_HOSTS': '127.0.0.1',
+        }
+        server = subprocess.Popen(
+            [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'QuizBit.wsgi'],
+            cwd=settings.BASE_DIR, env=env,
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        try:
+            deadline = time.monotonic() + 60
+            while len(_children(server.pid)) < options['workers']:
+                if server.poll() is not None or time.monotonic() > deadline:
+                    raise CommandError('gunicorn did not start; run it by hand to see why')
+                time.sleep(0.05)
+            time.sleep(options['settle'])
+
+            url = f"http://127.0.0.1:{port}{options['path']}"
+            first = _timed_get(url, token)
+            steady = statistics.median(_timed_get(url, token) for _ in range(20))
+            memory = [_memory(pid) for pid in _children(server.pid)]
+        finally:
+            server.send_signal(signal.SIGTERM)
+            server.wait(30)
+        return {
+            'first': first,
+            'steady': steady,
+            'pss': statistics.mean(pss for pss, _ in memory),
+            'uss': statistics.mean(uss for _, uss in memory),
+        }
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def _timed_get(url, token):
+    """Milliseconds taken by a GET of `url`."""
+    request = urllib.request.Request(url, headers={'Authorization': f'Bearer {token}'})
+    started = time.perf_counter()
+    with urllib.request.urlopen(request) as response:
+        response.read()
+    return (time.perf_counter() - started) * 1000
+
+
+def _children(pid):
+    try:
+        with open(f'/proc/{pid}/task/{pid}/children') as children:
+            return [int(child) for child in children.read().split()]
+    except OSError:
+        raise CommandError('Reading process memory needs Linux /proc')
+
+
+def _memory(pid):
+    """(PSS, USS) of process `pid` in MB."""
+    values = {}
+    with open(f'/proc/{pid}/smaps_rollup') as rollup:
+        for line in rollup:
+            key, _, rest = line.partition(':')
+            if rest.strip().endswith('kB'):
+                values[key] = int(rest.split()[0])
+    return values['Pss'] / 1024, (values['Private_Clean'] + values['Private_Dirty']) / 1024
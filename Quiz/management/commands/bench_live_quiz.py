@@ -0,0 +1,118 @@
+import asyncio
+import json
+import statistics
+import time
+
+from asgiref.sync import async_to_sync
+from channels.testing import WebsocketCommunicator
+from channels.routing import URLRouter
+from django.core.management.base import BaseCommand
+from rest_framework_simplejwt.tokens import AccessToken
+
+from Authentication.models import User
+from Quiz.live import create_live_session, practice_buffer
+from Quiz.models import Choice, Practice, Question
+from Quiz.routing import websocket_urlpatterns
+from QuizBit.ws_auth import AUTH_SUBPROTOCOL, JWTAuthMiddleware
+
+
+class Command(BaseCommand):
+    """
+    Measure live-quiz fan-out with many WebSocket clients in one process.
+
+    Opens --connections authenticated sockets on a new session through the
+    in-process channel layer, then for each of --rounds questions measures
+    how long it takes from the host's push until every client has the
+    question (fan-out latency) and how fast every client's answer is graded
+    and acknowledged. Benchmark users, questions and answers are removed
+    afterwards.
+    """
+    help = 'Benchmark live-quiz fan-out and answer throughput'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--connections', type=int, default=1000, help='Connected students')
+        parser.add_argument('--rounds', type=int, default=5, help='Questions pushed')
+
+    def handle(self, *args, **options):
+        connections, rounds = options['connections'], options['rounds']
+        host = User.objects.create_user(username='bench-live-host', email='bench-live-host@example.com')
+        User.objects.bulk_create(
+            User(username=f'bench-live-{i}', email=f'bench-live-{i}@example.com') for i in range(connections)
+        )
+        students = list(User.objects.filter(username__startswith='bench-live-', email__endswith='@example.com').exclude(pk=host.pk))
+        questions = []
+        try:
+            for i in range(rounds):
+                question = Question.objects.create(text=f'Benchmark live question {i}')
+                Choice.objects.bulk_create(
+                    Choice(question=question, text=f'Choice {c}', is_correct=c == 0) for c in range(4)
+                )
+                questions.append((question.pk, list(question.choices.values_list('id', flat=True))))
+            session = create_live_session(host)
+            async_to_sync(self._run)(session.code, host, students, questions)
+        finally:
+            Practice.objects.filter(user__in=students).delete()
+            Question.all_objects.filter(pk__in=[pk for pk, _ in questions]).delete()
+            User.objects.filter(pk__in=[user.pk for user in students] + [host.pk]).delete()
+
+    async def _run(self, code, host, students, questions):
+        application = JWTAuthMiddleware(URLRouter(websocket_urlpatterns))
+
+        def communicator(user):
+            return WebsocketCommunicator(
+                application, f'/ws/live/{code}/', subprotocols=[AUTH_SUBPROTOCOL, str(AccessToken.for_user(user))]
+            )
+
+        started = time.perf_counter()
+        host_socket = communicator(host)
+        clients = [communicator(user) for user in students]
+        results = await asyncio.gather(
+            host_socket.connect(timeout=60), *(client.connect(timeout=60) for client in clients)
+        )
+        if not all(connected for connected, _ in results):
+            raise RuntimeError('Some connections were refused')
+        self.stdout.write(f'{len(clients)} clients connected in {time.perf_counter() - started:.2f}s')
+
+        latencies, fanout_rates, answer_rates = [], [], []
+        for question_id, choice_ids in questions:
+            pushed = time.perf_counter()
+            await host_socket.send_json_to({'action': 'next', 'question_id': question_id})
+            arrivals = await asyncio.gather(*(self._receive_at(client) for client in clients))
+            await host_socket.receive_from(timeout=30)
+            round_latencies = [arrived - pushed for arrived in arrivals]
+            latencies.extend(round_latencies)
+            fanout_rates.append(len(clients) / max(round_latencies))
+
+            started = time.perf_counter()
+            await asyncio.gather(*(
+                client.send_to(text_data=json.dumps({
+                    'action': 'answer', 'question_id': question_id, 'choice_id': choice_ids[i % len(choice_ids)]
+                }))
+                for i, client in enumerate(clients)
+            ))
+            replies = await asyncio.gather(*(client.receive_from(timeout=30) for client in clients))
+            answer_rates.append(len(clients) / (time.perf_counter() - started))
+            if any(json.loads(reply)['type'] != 'result' for reply in replies):
+                raise RuntimeError('An answer was not graded')
+
+        started = time.perf_counter()
+        await practice_buffer.flush()
+        flush_time = time.perf_counter() - started
+
+        await host_socket.disconnect()
+        await asyncio.gather(*(client.disconnect() for client in clients))
+
+        latencies.sort()
+        self.stdout.write(
+            f'fan-out latency: p50 {statistics.median(latencies) * 1000:.1f} ms, '
+            f'p99 {latencies[int(len(latencies) * 0.99) - 1] * 1000:.1f} ms, '
+            f'max {latencies[-1] * 1000:.1f} ms'
+        )
+        self.stdout.write(f'fan-out: {statistics.mean(fanout_rates):.0f} messages/s delivered')
+        self.stdout.write(f'answers: {statistics.mean(answer_rates):.0f} messages/s graded and acknowledged')
+        self.stdout.write(f'final Practice flush: {flush_time * 1000:.0f} ms')
+
+    @staticmethod
+    async def _receive_at(client):
+        await client.receive_from(timeout=30)
+        return time.perf_counter()
@@ -0,0 +1,83 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+
+from Authentication.models import User
+from Quiz.models import Choice, Practice, Question
+from Quiz.renderers import FastJSONRenderer, orjson
+from Quiz.serializers import (
+    PracticeHistorySerializer,
+    QuestionListSerializer,
+    serialize_practice_rows,
+    serialize_question_rows,
+)
+
+
+class Command(BaseCommand):
+    """
+    Micro-benchmark of the ModelSerializer path against the fast path.
+
+    Creates throwaway questions and practice rows inside a transaction that is
+    rolled back afterwards, renders both list payloads both ways, checks the
+    bytes are identical and reports rows per second.
+    """
+    help = 'Compare rows/s of ModelSerializer + JSONRenderer with the fast serialization path'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=5000, help='Number of questions and practice rows')
+        parser.add_argument('--repeat', type=int, default=5, help='Runs per path, the best one is reported')
+
+    def handle(self, *args, **options):
+        rows, repeat = options['rows'], options['repeat']
+        self.stdout.write(f"orjson: {'available' if orjson is not None else 'not installed'}")
+
+        with transaction.atomic():
+            self._create_fixtures(rows)
+            benchmarks = [
+                (
+                    'questions',
+                    lambda: QuestionListSerializer(Question.objects.all(), many=True).data,
+                    lambda: serialize_question_rows(Question.objects.all()),
+                ),
+                (
+                    'practice-history',
+                    lambda: PracticeHistorySerializer(Practice.objects.all(), many=True).data,
+                    lambda: serialize_practice_rows(Practice.objects.all()),
+                ),
+            ]
+            for name, slow, fast in benchmarks:
+                slow_body, slow_time = self._best_of(repeat, lambda: JSONRenderer().render(slow()))
+                fast_body, fast_time = self._best_of(repeat, lambda: FastJSONRenderer().render(fast()))
+                if slow_body != fast_body:
+                    raise CommandError(f'{name}: fast path output differs from the serializer output')
+                self.stdout.write(
+                    f'{name:<18} serializer {rows / slow_time:>10.0f} rows/s   '
+                    f'fast {rows / fast_time:>10.0f} rows/s   x{slow_time / fast_time:.1f}'
+                )
+            transaction.set_rollback(True)
+
+    def _create_fixtures(self, rows):
+        user = User.objects.create_user(username='bench-serialization', email='bench-serialization@example.com')
+        questions = Question.objects.bulk_create(
+            Question(text=f'Benchmark question {i} — ünïcode text', difficulty=Question.Difficulty.EASY)
+            for i in range(rows)
+        )
+        choices = Choice.objects.bulk_create(
+            Choice(question=question, text=f'Choice for {question.pk}', is_correct=True)
+            for question in questions
+        )
+        Practice.objects.bulk_create(
+            Practice(user=user, question=choice.question, selected_choice=choice, is_correct=True)
+            for choice in choices
+        )
+
+    def _best_of(self, repeat, func):
+        best, result = None, None
+        for _ in range(repeat):
+            started = time.perf_counter()
+            result = func()
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        return result, best
@@ -0,0 +1,51 @@
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework import serializers
+
+from Quiz.bank import BANKS, BankFile, bank_path, build_bank
+from Quiz.models import Question
+from Quiz.serializers import serialize_question_detail_rows
+
+
+class Command(BaseCommand):
+    """
+    Build the question-bank files (see Quiz.bank).
+
+    They are rebuilt in the background after every content change; run this
+    once after deploying, or with --force to rewrite them from scratch.
+    --verify then reads every question back from the files and compares it
+    with the question detail API output.
+    """
+    help = 'Build the memory-mappable question-bank files for offline and exam clients'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--bank', action='append', choices=BANKS, help='Bank to build (default: all of them)')
+        parser.add_argument('--force', action='store_true', help='Compress every block again and rewrite the files')
+        parser.add_argument('--verify', action='store_true', help='Compare the files with the database afterwards')
+
+    def handle(self, *args, **options):
+        for name in options['bank'] or BANKS:
+            stats = build_bank(name, force=options['force'])
+            outcome = 'written' if stats['written'] else 'unchanged'
+            self.stdout.write(
+                f"{name}: {stats['questions']} question(s) in {stats['blocks']} block(s), "
+                f"{stats['rebuilt']} compressed again, {outcome}"
+            )
+            if options['verify']:
+                self._verify(name)
+        self.stdout.write(self.style.SUCCESS('Question banks are up to date'))
+
+    def _verify(self, name):
+        questions = Question.objects.order_by('id')
+        if name != 'all':
+            questions = questions.filter(difficulty=name)
+        expected = serialize_question_detail_rows(questions)
+        to_datetime = serializers.DateTimeField().to_representation
+        with BankFile(bank_path(name)) as bank:
+            if len(bank) != len(expected):
+                raise CommandError(f'{name}: {len(bank)} question(s) in the file, {len(expected)} in the database')
+            for question in expected:
+                stored = bank.get(question['id'])
+                stored['created_at'] = to_datetime(stored['created_at'])
+                if stored != question:
+                    raise CommandError(f"{name}: question {question['id']} differs from the database")
+        self.stdout.write(f'{name}: verified')
@@ -0,0 +1,54 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Prefetch
+
+from Quiz.models import Choice, Question
+from Quiz.similarity import DEFAULT_THRESHOLD, find_similar, index_questions, question_signature
+
+
+class Command(BaseCommand):
+    """
+    Build the near-duplicate index for existing questions (see Quiz.similarity).
+
+    New and edited questions are indexed as they are saved; this backfills
+    the rest in batches. --report then lists every question that has
+    near-duplicates, one indexed lookup per question.
+    """
+    help = 'Backfill the MinHash/LSH near-duplicate index of questions'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Questions indexed per transaction')
+        parser.add_argument('--missing-only', action='store_true', help='Skip questions already indexed')
+        parser.add_argument('--report', action='store_true', help='List near-duplicate questions afterwards')
+        parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD, help='Similarity reported as duplicate')
+
+    def handle(self, *args, **options):
+        queryset = Question.objects.order_by('pk').prefetch_related(
+            Prefetch('choices', queryset=Choice.objects.only('question_id', 'text'))
+        ).only('id', 'text')
+        if options['missing_only']:
+            queryset = queryset.filter(signature__isnull=True)
+
+        indexed, last_pk = 0, 0
+        while True:
+            batch = list(queryset.filter(pk__gt=last_pk)[:options['batch_size']])
+            if not batch:
+                break
+            indexed += index_questions(batch)
+            last_pk = batch[-1].pk
+            self.stdout.write(f'Indexed {indexed} question(s)')
+
+        if options['report']:
+            self._report(options['threshold'])
+
+    def _report(self, threshold):
+        seen = set()
+        for question in Question.objects.order_by('pk').prefetch_related('choices').iterator(chunk_size=1000):
+            duplicates = [
+                (question_id, score)
+                for question_id, score in find_similar(question_signature(question), threshold, exclude_id=question.pk)
+                if (min(question.pk, question_id), max(question.pk, question_id)) not in seen
+            ]
+            for question_id, score in duplicates:
+                seen.add((min(question.pk, question_id), max(question.pk, question_id)))
+                self.stdout.write(f'{question.pk} ~ {question_id}: {score:.2f}')
+        self.stdout.write(f'{len(seen)} near-duplicate pair(s)')
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from QuizBit.docs import DRF_YASG_AVAILABLE, write_schema
+
+
+class Command(BaseCommand):
+    """
+    Generate the OpenAPI document served by the docs endpoints.
+
+    Run it at build/deploy time, after the code is final; workers then serve
+    the file instead of introspecting every serializer on the first docs hit.
+    """
+    help = 'Write the OpenAPI schema to QUIZBIT_OPENAPI_SCHEMA'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', help='Write to this path instead of QUIZBIT_OPENAPI_SCHEMA')
+
+    def handle(self, *args, **options):
+        if not DRF_YASG_AVAILABLE:
+            raise CommandError('Generating the API schema requires drf_yasg')
+        path = write_schema(options['output'])
+        self.stdout.write(self.style.SUCCESS(f'OpenAPI schema written to {path}'))
@@ -0,0 +1,25 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from Quiz.exams import grade_expired_sessions
+
+
+class Command(BaseCommand):
+    """
+    Grade exam sessions whose deadline passed without a submit.
+
+    Meant to run periodically (cron or a scheduler); all expired sessions are
+    graded together in one set-based pass.
+    """
+    help = 'Grade every in-progress exam session past its deadline'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--grace-seconds', type=int, default=60,
+            help='Leave sessions alone until this long after their deadline'
+        )
+
+    def handle(self, *args, **options):
+        sessions = grade_expired_sessions(grace=timedelta(seconds=options['grace_seconds']))
+        self.stdout.write(f'Graded {len(sessions)} expired exam session(s)')
@@ -0,0 +1,28 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from Quiz.deletion import run_pending_deletion_jobs
+
+
+class Command(BaseCommand):
+    """
+    Background worker for scheduled deletions (see Quiz.deletion).
+
+    Runs pending DeletionJobs once, or keeps polling for new ones with --loop.
+    """
+    help = 'Delete the rows of soft-deleted users, questions and choices in batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Rows deleted per transaction')
+        parser.add_argument('--loop', action='store_true', help='Keep running and poll for new jobs')
+        parser.add_argument('--interval', type=float, default=5.0, help='Seconds between polls with --loop')
+
+    def handle(self, *args, **options):
+        while True:
+            count = run_pending_deletion_jobs(options['batch_size'])
+            if count:
+                self.stdout.write(f'Completed {count} deletion job(s)')
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from Quiz.sync import prune_tombstones, tombstone_cutoff
+
+
+class Command(BaseCommand):
+    """
+    Delete sync tombstones older than QUIZBIT_SYNC_TOMBSTONE_DAYS.
+
+    Safe to run repeatedly (e.g. nightly from cron); clients whose watermark
+    is older than the cutoff are told to download a new snapshot.
+    """
+    help = 'Delete question sync tombstones older than QUIZBIT_SYNC_TOMBSTONE_DAYS'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Rows deleted per transaction')
+
+    def handle(self, *args, **options):
+        self.stdout.write(f'Pruning tombstones older than {tombstone_cutoff().isoformat()}')
+        total = sum(prune_tombstones(options['batch_size']))
+        self.stdout.write(self.style.SUCCESS(f'Deleted {total} tombstones'))
@@ -0,0 +1,40 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from Quiz.rollups import first_activity_day, rebuild_rollups
+
+
+class Command(BaseCommand):
+    """
+    Recompute the daily and hourly activity rollups from the answer history.
+
+    Backfills the rollups after they were added, or repairs a range of days.
+    Every chunk of days is recomputed from scratch in its own transaction,
+    so the command is idempotent, can be interrupted and re-run, and is
+    safe to run while answers are being recorded.
+    """
+    help = 'Rebuild the activity rollups from Practice and PracticeArchive'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--start', type=date.fromisoformat, help='First day (default: the oldest answer)')
+        parser.add_argument('--end', type=date.fromisoformat, help='Last day, included (default: today)')
+        parser.add_argument('--chunk-days', type=int, default=1, help='Days rebuilt per transaction')
+
+    def handle(self, *args, **options):
+        start = options['start'] or first_activity_day()
+        end = options['end'] or timezone.localdate()
+        if start is None:
+            self.stdout.write('No answers recorded yet')
+            return
+        if end < start:
+            raise CommandError('--end must not be before --start')
+        if options['chunk_days'] < 1:
+            raise CommandError('--chunk-days must be at least 1')
+
+        self.stdout.write(f'Rebuilding activity rollups from {start} to {end}')
+        total = 0
+        for day, total in rebuild_rollups(start, end, options['chunk_days']):
+            self.stdout.write(f'  up to {day}: {total} answers')
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt activity rollups from {total} answers'))
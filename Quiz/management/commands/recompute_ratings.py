@@ -0,0 +1,82 @@
+import heapq
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+
+from Quiz.models import Practice, PracticeArchive, Question, UserSkill
+from Quiz.ratings import replay_practices
+
+
+class Command(BaseCommand):
+    """
+    Recompute every user skill and question rating from the answer history.
+
+    Practice and PracticeArchive are streamed in chronological order, read
+    --batch-size rows at a time, and replayed exactly as the per-answer
+    updates would have applied them (see Quiz.ratings.replay_practices).
+    The results replace the stored ratings in one transaction. Increments made by
+    submissions while the replay runs are overwritten, so run it when
+    traffic is low; those answers are counted again by the next recompute.
+    """
+    help = 'Replay all answers to recompute Elo skill and difficulty ratings'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=10000, help='Answers read from the database at a time')
+        parser.add_argument('--dry-run', action='store_true', help='Compute but do not save the ratings')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        user_ids = sorted(
+            set(Practice.objects.order_by().values_list('user_id', flat=True).distinct())
+            | set(PracticeArchive.objects.order_by().values_list('user_id', flat=True).distinct())
+        )
+        question_ids = list(Question.all_objects.order_by('pk').values_list('pk', flat=True))
+
+        user_ratings, question_ratings = replay_practices(
+            self._history(options['batch_size']), user_ids, question_ids
+        )
+        self.stdout.write(
+            f'Replayed answers of {len(user_ratings)} user(s) on {len(question_ratings)} question(s) '
+            f'in {time.perf_counter() - started:.1f}s'
+        )
+        if options['dry_run']:
+            return
+
+        with transaction.atomic():
+            # An anti-join rather than NOT IN (<every user id>), which would
+            # bind one parameter per user and exceed SQLite's limit
+            UserSkill.objects.exclude(
+                Exists(Practice.objects.filter(user_id=OuterRef('user_id')))
+                | Exists(PracticeArchive.objects.filter(user_id=OuterRef('user_id')))
+            ).delete()
+            UserSkill.objects.bulk_create(
+                [UserSkill(user_id=user_id) for user_id in user_ids], ignore_conflicts=True, batch_size=1000
+            )
+            UserSkill.objects.bulk_update(
+                [
+                    UserSkill(user_id=user_id, rating=rating, rated_answers=count)
+                    for user_id, (rating, count) in user_ratings.items()
+                ],
+                ['rating', 'rated_answers'], batch_size=1000
+            )
+            Question.all_objects.bulk_update(
+                [
+                    Question(pk=question_id, rating=rating, rated_answers=count)
+                    for question_id, (rating, count) in question_ratings.items()
+                ],
+                ['rating', 'rated_answers'], batch_size=1000
+            )
+        self.stdout.write('Ratings saved')
+
+    @staticmethod
+    def _history(batch_size):
+        """(user_id, question_id, is_correct) of every answer, oldest first."""
+        fields = ('created_at', 'id', 'user_id', 'question_id', 'is_correct')
+        streams = [
+            model.objects.order_by('created_at', 'id').values_list(*fields).iterator(chunk_size=batch_size)
+            for model in (PracticeArchive, Practice)
+        ]
+        for _, _, user_id, question_id, is_correct in heapq.merge(*streams):
+            yield user_id, question_id, is_correct
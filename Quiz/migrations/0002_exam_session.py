@@ -0,0 +1,37 @@
+# Generated by Django 4.2 on 2026-10-19 12:34
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('Quiz', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExamSession',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('question_ids', models.JSONField(default=list)),
+                ('answers', models.JSONField(blank=True, default=dict)),
+                ('status', models.CharField(choices=[('in_progress', 'In progress'), ('graded', 'Graded')], default='in_progress', max_length=20)),
+                ('score', models.PositiveIntegerField(blank=True, null=True)),
+                ('started_at', models.DateTimeField(auto_now_add=True)),
+                ('deadline', models.DateTimeField()),
+                ('submitted_at', models.DateTimeField(blank=True, null=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='exam_sessions', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-started_at'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='examsession',
+            index=models.Index(fields=['status', 'deadline'], name='Quiz_examse_status_422603_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2 on 2026-10-19 12:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Quiz', '0002_exam_session'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='question',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True),
+        ),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 4.2 on 2026-10-19 12:38
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('Quiz', '0003_question_updated_at_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PracticeArchive',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('is_correct', models.BooleanField()),
+                ('created_at', models.DateTimeField()),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.AlterField(
+            model_name='practice',
+            name='created_at',
+            field=models.DateTimeField(auto_now_add=True, db_index=True),
+        ),
+        migrations.AddIndex(
+            model_name='practice',
+            index=models.Index(fields=['user', '-created_at'], name='Quiz_practi_user_id_5dc78a_idx'),
+        ),
+        migrations.AddField(
+            model_name='practicearchive',
+            name='question',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_practices', to='Quiz.question'),
+        ),
+        migrations.AddField(
+            model_name='practicearchive',
+            name='selected_choice',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_practices', to='Quiz.choice'),
+        ),
+        migrations.AddField(
+            model_name='practicearchive',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_practices', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='practicearchive',
+            index=models.Index(fields=['user', '-created_at'], name='Quiz_practi_user_id_1ce317_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2 on 2026-10-19 12:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Quiz', '0005_soft_delete_and_deletion_jobs'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='practicearchive',
+            name='created_at',
+            field=models.DateTimeField(db_index=True),
+        ),
+    ]
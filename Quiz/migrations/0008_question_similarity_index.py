@@ -0,0 +1,39 @@
+# Generated by Django 4.2 on 2026-10-19 12:55
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Quiz', '0007_live_session'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QuestionSignature',
+            fields=[
+                ('question', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='signature', serialize=False, to='Quiz.question')),
+                ('signature', models.BinaryField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='QuestionBucket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('band', models.PositiveSmallIntegerField()),
+                ('bucket', models.BigIntegerField()),
+                ('question', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='lsh_buckets', to='Quiz.question')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='questionbucket',
+            index=models.Index(fields=['band', 'bucket'], name='Quiz_questi_band_b1d9db_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='questionbucket',
+            constraint=models.UniqueConstraint(fields=('question', 'band'), name='question_bucket_unique_band'),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 4.2 on 2026-10-19 12:57
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Authentication', '0002_user_email_ci_unique'),
+        ('Quiz', '0008_question_similarity_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserSkill',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='skill', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('rating', models.FloatField(default=1500.0)),
+                ('rated_answers', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='question',
+            name='rated_answers',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='question',
+            name='rating',
+            field=models.FloatField(db_index=True, default=1500.0, editable=False),
+        ),
+    ]
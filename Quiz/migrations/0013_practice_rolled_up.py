@@ -0,0 +1,30 @@
+# Generated by Django 4.2 on 2026-10-19 15:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Quiz', '0012_deletion_job_heartbeat'),
+    ]
+
+    operations = [
+        # Answers recorded so far are already counted by the rollups.
+        migrations.AddField(
+            model_name='practice',
+            name='rolled_up',
+            field=models.BooleanField(default=True),
+        ),
+        migrations.AlterField(
+            model_name='practice',
+            name='rolled_up',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddIndex(
+            model_name='practice',
+            index=models.Index(
+                condition=models.Q(('rolled_up', False)), fields=['id'], name='practice_pending_rollup_idx'
+            ),
+        ),
+    ]
@@ -1,6 +1,16 @@
 from django.db import models
+from django.db.models import Q
+from django.utils import timezone
 from Authentication.models import User
 
+class SoftDeleteManager(models.Manager):
+    """
+    Default manager hiding rows that are soft-deleted and waiting for the
+    background deletion worker (see Quiz.deletion).
+    """
+    def get_queryset(self):
+        return super().get_queryset().filter(deleted_at__isnull=True)
+
 class Question(models.Model):
     """
     Model to store quiz questions.
@@ -8,12 +18,21 @@ class Question(models.Model):
     Fields:
         text (TextField): The main content of the question
         created_at (DateTimeField): When the question was created
-        updated_at (DateTimeField): When the question was last updated
+        updated_at (DateTimeField): When the question or one of its choices was last updated
+        deleted_at (DateTimeField): When the question was scheduled for deletion
         difficulty (CharField): Difficulty level of the question (easy/medium/hard)
+        rating (FloatField): Elo-style difficulty estimated from answers, see Quiz.ratings
+        rated_answers (PositiveIntegerField): Number of answers the rating is based on
     """
     text = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
-    updated_at = models.DateTimeField(auto_now=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+    deleted_at = models.DateTimeField(null=True, blank=True, editable=False)
+    rating = models.FloatField(default=1500.0, db_index=True, editable=False)
+    rated_answers = models.PositiveIntegerField(default=0, editable=False)
+
+    objects = SoftDeleteManager()
+    all_objects = models.Manager()
     
     class Difficulty(models.TextChoices):
         EASY = 'easy', 'Easy'
@@ -26,9 +45,24 @@ class Question(models.Model):
         default=Difficulty.MEDIUM
     )
     
+    # Updated concurrently with F() expressions by Quiz.ratings
+    RATING_FIELDS = ('rating', 'rated_answers')
+
     def __str__(self):
         return f"Question {self.id}: {self.text[:50]}..."
 
+    def save(self, *args, **kwargs):
+        """
+        Save the question without writing back its rating, which may have
+        moved since the instance was loaded.
+        """
+        if not self._state.adding and kwargs.get('update_fields') is None and not kwargs.get('force_insert'):
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.RATING_FIELDS
+            ]
+        super().save(*args, **kwargs)
+
 class Choice(models.Model):
     """
     Model to store answer choices for questions.
@@ -37,14 +71,63 @@ class Choice(models.Model):
         question (ForeignKey): Related question
         text (CharField): The text of the choice
         is_correct (BooleanField): Indicates if this is the correct answer
+        deleted_at (DateTimeField): When the choice was scheduled for deletion
     """
     question = models.ForeignKey(Question, related_name='choices', on_delete=models.CASCADE)
     text = models.CharField(max_length=200)
     is_correct = models.BooleanField(default=False)
+    deleted_at = models.DateTimeField(null=True, blank=True, editable=False)
+
+    objects = SoftDeleteManager()
+    all_objects = models.Manager()
     
     def __str__(self):
         return self.text
 
+class QuestionSignature(models.Model):
+    """
+    Model to store the MinHash signature of a question (see Quiz.similarity).
+
+    Fields:
+        question (OneToOneField): The question, also the primary key
+        signature (BinaryField): Packed MinHash values of the question's text and choices
+        updated_at (DateTimeField): When the signature was last computed
+    """
+    question = models.OneToOneField(
+        Question, primary_key=True, related_name='signature', on_delete=models.CASCADE
+    )
+    signature = models.BinaryField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Signature of question {self.question_id}"
+
+class QuestionBucket(models.Model):
+    """
+    Model to file a question under one LSH bucket per signature band.
+
+    Questions sharing a (band, bucket) pair are near-duplicate candidates.
+
+    Fields:
+        question (ForeignKey): The question
+        band (PositiveSmallIntegerField): Which band of the signature
+        bucket (BigIntegerField): Hash of the band's values
+    """
+    question = models.ForeignKey(Question, related_name='lsh_buckets', on_delete=models.CASCADE)
+    band = models.PositiveSmallIntegerField()
+    bucket = models.BigIntegerField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['band', 'bucket']),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['question', 'band'], name='question_bucket_unique_band'),
+        ]
+
+    def __str__(self):
+        return f"Question {self.question_id} in band {self.band}"
+
 class Practice(models.Model):
     """
     Model to track user practice sessions.
@@ -55,14 +138,302 @@ class Practice(models.Model):
         selected_choice (ForeignKey): The answer choice selected
         is_correct (BooleanField): Whether the answer was correct
         created_at (DateTimeField): When the practice occurred
+        rolled_up (BooleanField): Whether the activity rollups count the answer yet
     """
     user = models.ForeignKey(User, related_name='practices', on_delete=models.CASCADE)
     question = models.ForeignKey(Question, related_name='practices', on_delete=models.CASCADE)
     selected_choice = models.ForeignKey(Choice, on_delete=models.CASCADE)
     is_correct = models.BooleanField()
-    created_at = models.DateTimeField(auto_now_add=True)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    rolled_up = models.BooleanField(default=False)
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', '-created_at']),
+            models.Index(fields=['id'], condition=Q(rolled_up=False), name='practice_pending_rollup_idx'),
+        ]
+
+class PracticeArchive(models.Model):
+    """
+    Model to store Practice rows older than the hot window.
+
+    Rows are moved here unchanged by the `archive_practice` command, keeping
+    their original id, so the history endpoint can read past the hot window
+    transparently and aggregates over both tables stay exact.
+
+    Fields:
+        id (BigIntegerField): The id the row had in Practice
+        user (ForeignKey): The user practicing
+        question (ForeignKey): The question being practiced
+        selected_choice (ForeignKey): The answer choice selected
+        is_correct (BooleanField): Whether the answer was correct
+        created_at (DateTimeField): When the practice occurred
+        archived_at (DateTimeField): When the row was moved to the archive
+    """
+    id = models.BigIntegerField(primary_key=True)
+    user = models.ForeignKey(User, related_name='archived_practices', on_delete=models.CASCADE)
+    question = models.ForeignKey(Question, related_name='archived_practices', on_delete=models.CASCADE)
+    selected_choice = models.ForeignKey(Choice, related_name='archived_practices', on_delete=models.CASCADE)
+    is_correct = models.BooleanField()
+    created_at = models.DateTimeField(db_index=True)
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', '-created_at']),
+        ]
+
+class ExamSession(models.Model):
+    """
+    Model to track a timed exam taken by a user.
+
+    In-progress answers are kept in a single JSON column instead of one row
+    per click; the session is graded in one pass when it is submitted and
+    only then written out as Practice rows.
+
+    Fields:
+        user (ForeignKey): The user taking the exam
+        question_ids (JSONField): Ordered list of the exam's question ids
+        answers (JSONField): Mapping of question id (as string) to selected choice id
+        status (CharField): Whether the exam is still in progress or graded
+        score (PositiveIntegerField): Number of correct answers once graded
+        started_at (DateTimeField): When the exam started
+        deadline (DateTimeField): After this moment answers are no longer accepted
+        submitted_at (DateTimeField): When the exam was graded
+    """
+    class Status(models.TextChoices):
+        IN_PROGRESS = 'in_progress', 'In progress'
+        GRADED = 'graded', 'Graded'
+
+    user = models.ForeignKey(User, related_name='exam_sessions', on_delete=models.CASCADE)
+    question_ids = models.JSONField(default=list)
+    answers = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=20, choices=Status.choices, default=Status.IN_PROGRESS)
+    score = models.PositiveIntegerField(null=True, blank=True)
+    started_at = models.DateTimeField(auto_now_add=True)
+    deadline = models.DateTimeField()
+    submitted_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-started_at']
+        indexes = [
+            models.Index(fields=['status', 'deadline']),
+        ]
+
+    def __str__(self):
+        return f"Exam {self.id} of {self.user}"
+
+    @property
+    def is_open(self):
+        """Whether answers can still be recorded."""
+        return self.status == self.Status.IN_PROGRESS and timezone.now() < self.deadline
+
+class UserSkill(models.Model):
+    """
+    Model to store a user's Elo-style ability estimate (see Quiz.ratings).
+
+    Kept apart from the User row so that profile updates and rating updates
+    never overwrite each other.
+
+    Fields:
+        user (OneToOneField): The user, also the primary key
+        rating (FloatField): Ability on the same scale as Question.rating
+        rated_answers (PositiveIntegerField): Number of answers the rating is based on
+        updated_at (DateTimeField): When the rating last changed
+    """
+    user = models.OneToOneField(User, primary_key=True, related_name='skill', on_delete=models.CASCADE)
+    rating = models.FloatField(default=1500.0)
+    rated_answers = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Skill of {self.user_id}: {self.rating:.0f}"
+
+class LiveSession(models.Model):
+    """
+    Model to represent an instructor-led live quiz.
+
+    The host pushes questions over a WebSocket and every connected student
+    receives them at once; answers are graded in memory and stored as
+    Practice rows (see Quiz.live).
+
+    Fields:
+        code (CharField): Short code students use to join the session
+        host (ForeignKey): The user running the session
+        current_question (ForeignKey): The question currently shown, if any
+        status (CharField): Whether the session is open or closed
+        created_at (DateTimeField): When the session was created
+        closed_at (DateTimeField): When the host closed the session
+    """
+    class Status(models.TextChoices):
+        OPEN = 'open', 'Open'
+        CLOSED = 'closed', 'Closed'
+
+    code = models.CharField(max_length=12, unique=True)
+    host = models.ForeignKey(User, related_name='hosted_live_sessions', on_delete=models.CASCADE)
+    current_question = models.ForeignKey(
+        Question, related_name='+', null=True, blank=True, on_delete=models.SET_NULL
+    )
+    status = models.CharField(max_length=20, choices=Status.choices, default=Status.OPEN)
+    created_at = models.DateTimeField(auto_now_add=True)
+    closed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"Live session {self.code}"
+
+class DailyActivity(models.Model):
+    """
+    Model to store answer counts per day and difficulty, see Quiz.rollups.
+
+    Fields:
+        day (DateField): The day the answers were given
+        difficulty (CharField): Difficulty of the questions answered, or 'all'
+        attempts (PositiveIntegerField): Number of answers
+        correct (PositiveIntegerField): Number of correct answers
+        active_users (PositiveIntegerField): Number of distinct users who answered
+    """
+    day = models.DateField()
+    difficulty = models.CharField(max_length=10)
+    attempts = models.PositiveIntegerField(default=0)
+    correct = models.PositiveIntegerField(default=0)
+    active_users = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['difficulty', 'day'], name='daily_activity_unique'),
+        ]
+
+    def __str__(self):
+        return f"{self.day} {self.difficulty}: {self.correct}/{self.attempts}"
+
+class HourlyActivity(models.Model):
+    """
+    Model to store answer counts per hour and difficulty, see Quiz.rollups.
+
+    Fields:
+        hour (DateTimeField): Start of the hour the answers were given in
+        difficulty (CharField): Difficulty of the questions answered, or 'all'
+        attempts (PositiveIntegerField): Number of answers
+        correct (PositiveIntegerField): Number of correct answers
+    """
+    hour = models.DateTimeField()
+    difficulty = models.CharField(max_length=10)
+    attempts = models.PositiveIntegerField(default=0)
+    correct = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['difficulty', 'hour'], name='hourly_activity_unique'),
+        ]
+
+    def __str__(self):
+        return f"{self.hour:%Y-%m-%d %H:00} {self.difficulty}: {self.correct}/{self.attempts}"
+
+class DailyActiveUser(models.Model):
+    """
+    Model to record that a user answered on a given day, so that
+    DailyActivity.active_users counts every user once.
+
+    Fields:
+        day (DateField): The day
+        difficulty (CharField): Difficulty of the questions answered, or 'all'
+        user (ForeignKey): The user who answered
+    """
+    day = models.DateField()
+    difficulty = models.CharField(max_length=10)
+    user = models.ForeignKey(User, related_name='active_days', on_delete=models.CASCADE)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['day', 'difficulty', 'user'], name='daily_active_user_unique'),
+        ]
+
+class Tombstone(models.Model):
+    """
+    Model to record deleted questions and choices for client delta sync.
+
+    Soft deletes and hard deletes both leave a tombstone, so clients that
+    cached the object learn to drop it (see Quiz.sync).
+
+    Fields:
+        kind (CharField): Whether a question or a choice was deleted
+        object_id (BigIntegerField): Id of the deleted question or choice
+        question_id (BigIntegerField): Id of the question the object belonged to
+        deleted_at (DateTimeField): When it was deleted
+    """
+    class Kind(models.TextChoices):
+        QUESTION = 'question', 'Question'
+        CHOICE = 'choice', 'Choice'
+
+    kind = models.CharField(max_length=10, choices=Kind.choices)
+    object_id = models.BigIntegerField()
+    question_id = models.BigIntegerField()
+    deleted_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    class Meta:
+        ordering = ['deleted_at', 'id']
+
+    def __str__(self):
+        return f"Deleted {self.kind} {self.object_id}"
+
+class DeletionJob(models.Model):
+    """
+    Model to track the background deletion of a user, question or choice.
+
+    Deleting one of those cascades to every Practice row referencing it. The
+    target is soft-deleted at once and its dependent rows are then removed in
+    bounded batches by the deletion worker, recording progress here.
+
+    Fields:
+        target (CharField): Kind of object being deleted
+        object_id (BigIntegerField): Primary key of the object being deleted
+        description (CharField): String form of the object, kept for display
+        status (CharField): pending, running, done or failed
+        rows_total (PositiveBigIntegerField): Dependent rows counted when scheduled
+        rows_deleted (PositiveBigIntegerField): Dependent rows deleted so far
+        last_error (TextField): Error of the last failed run
+        created_at (DateTimeField): When the deletion was requested
+        started_at (DateTimeField): When the worker first picked the job up
+        heartbeat_at (DateTimeField): When the running worker last reported progress
+        finished_at (DateTimeField): When the object itself was deleted
+    """
+    class Target(models.TextChoices):
+        USER = 'user', 'User'
+        QUESTION = 'question', 'Question'
+        CHOICE = 'choice', 'Choice'
+
+    class Status(models.TextChoices):
+        PENDING = 'pending', 'Pending'
+        RUNNING = 'running', 'Running'
+        DONE = 'done', 'Done'
+        FAILED = 'failed', 'Failed'
+
+    target = models.CharField(max_length=20, choices=Target.choices)
+    object_id = models.BigIntegerField()
+    description = models.CharField(max_length=200, blank=True)
+    status = models.CharField(max_length=20, choices=Status.choices, default=Status.PENDING, db_index=True)
+    rows_total = models.PositiveBigIntegerField(default=0)
+    rows_deleted = models.PositiveBigIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"Delete {self.target} {self.object_id}"
 
-# Create your models here.
+    @property
+    def progress(self):
+        """Fraction of the dependent rows deleted so far."""
+        if not self.rows_total:
+            return 1.0 if self.status == self.Status.DONE else 0.0
+        return min(self.rows_deleted / self.rows_total, 1.0)
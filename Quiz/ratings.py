@@ -0,0 +1,166 @@
+"""
+Elo-style ratings for users and questions.
+
+Every user has a skill and every question a difficulty on the same scale.
+An answer is a match between the two: the expected score of the user is
+1 / (1 + 10 ** ((difficulty - skill) / SCALE)), and after the answer both
+ratings move by K * (actual - expected) in opposite directions. K starts
+high so that new users and questions converge quickly and shrinks as the
+rating accumulates answers.
+
+`apply_practices` updates ratings for newly recorded Practice rows in O(1)
+per row. Ratings are written as increments with F() expressions, so
+concurrent submissions never overwrite each other; at worst an expectation
+is computed from a rating that was a few answers old. `replay_practices`
+recomputes everything from the full answer history offline.
+
+The replay is a plain sequential loop. Vectorizing it does not pay off:
+summing a batch's updates computed from the same starting ratings diverges
+for questions answered many times per batch, and splitting batches into
+independent layers costs as much as the arithmetic it saves.
+"""
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Question, UserSkill
+
+DEFAULT_RATING = 1500.0
+SCALE = 400.0
+K_MAX = 64.0
+K_MIN = 16.0
+# Number of answers after which K is halfway between K_MAX and K_MIN
+K_HALF_LIFE = 20
+
+
+def expected_score(skill, difficulty):
+    """Probability that a user of `skill` answers a question of `difficulty` correctly."""
+    return 1.0 / (1.0 + 10.0 ** ((difficulty - skill) / SCALE))
+
+
+def k_factor(rated_answers):
+    """Step size for a rating based on `rated_answers` answers so far."""
+    return K_MIN + (K_MAX - K_MIN) * K_HALF_LIFE / (K_HALF_LIFE + rated_answers)
+
+
+def apply_practices(practices):
+    """
+    Update user skills and question ratings for newly recorded answers.
+
+    `practices` are Practice instances (saved or not) in the order they were
+    given. Two queries read the current ratings, then each affected user and
+    question gets one increment.
+    """
+    practices = list(practices)
+    if not practices:
+        return
+
+    user_ids = {practice.user_id for practice in practices}
+    question_ids = {practice.question_id for practice in practices}
+    with transaction.atomic():
+        UserSkill.objects.bulk_create(
+            [UserSkill(user_id=user_id) for user_id in sorted(user_ids)], ignore_conflicts=True
+        )
+        skills = {
+            user_id: [rating, count] for user_id, rating, count in UserSkill.objects.filter(
+                user_id__in=user_ids
+            ).values_list('user_id', 'rating', 'rated_answers')
+        }
+        difficulties = {
+            question_id: [rating, count] for question_id, rating, count in Question.all_objects.filter(
+                pk__in=question_ids
+            ).values_list('id', 'rating', 'rated_answers')
+        }
+
+        user_deltas = {user_id: 0.0 for user_id in skills}
+        question_deltas = {question_id: 0.0 for question_id in difficulties}
+        for practice in practices:
+            skill, difficulty = skills.get(practice.user_id), difficulties.get(practice.question_id)
+            if skill is None or difficulty is None:
+                continue
+            surprise = float(practice.is_correct) - expected_score(skill[0], difficulty[0])
+            user_step, question_step = k_factor(skill[1]) * surprise, k_factor(difficulty[1]) * surprise
+            skill[0] += user_step
+            skill[1] += 1
+            difficulty[0] -= question_step
+            difficulty[1] += 1
+            user_deltas[practice.user_id] += user_step
+            question_deltas[practice.question_id] -= question_step
+
+        # Rows are always locked in the same (sorted) order, so concurrent
+        # batches cannot deadlock on them.
+        counts = _count_by(practices, 'user_id')
+        now = timezone.now()
+        for user_id, delta in sorted(user_deltas.items()):
+            UserSkill.objects.filter(user_id=user_id).update(
+                rating=F('rating') + delta,
+                rated_answers=F('rated_answers') + counts[user_id],
+                updated_at=now
+            )
+        counts = _count_by(practices, 'question_id')
+        for question_id, delta in sorted(question_deltas.items()):
+            Question.all_objects.filter(pk=question_id).update(
+                rating=F('rating') + delta,
+                rated_answers=F('rated_answers') + counts[question_id]
+            )
+
+
+def _count_by(practices, attribute):
+    counts = {}
+    for practice in practices:
+        key = getattr(practice, attribute)
+        counts[key] = counts.get(key, 0) + 1
+    return counts
+
+
+def get_user_skill(user):
+    """The user's current skill rating, DEFAULT_RATING if they never answered."""
+    rating = UserSkill.objects.filter(user=user).values_list('rating', flat=True).first()
+    return DEFAULT_RATING if rating is None else rating
+
+
+def recommend_questions(skill, limit=10, window=200.0):
+    """
+    Questions rated closest to `skill`, at most `window` points away.
+
+    Two range scans of the rating index, one upwards and one downwards from
+    `skill`, each reading at most `limit` rows; the nearest `limit` of them
+    are returned, closest first.
+    """
+    queryset = Question.objects.all()
+    harder = list(queryset.filter(rating__gte=skill, rating__lte=skill + window).order_by('rating')[:limit])
+    easier = list(queryset.filter(rating__lt=skill, rating__gte=skill - window).order_by('-rating')[:limit])
+    return sorted(harder + easier, key=lambda question: abs(question.rating - skill))[:limit]
+
+
+def replay_practices(rows, user_ids, question_ids):
+    """
+    Recompute every rating from scratch by replaying answers in order.
+
+    `rows` yields (user_id, question_id, is_correct) tuples in chronological
+    order; answers of unknown users or questions are skipped. The ratings are
+    held in flat lists indexed by position, and the result equals applying
+    the answers one at a time with `apply_practices`. Returns
+    ({user_id: (rating, count)}, {question_id: (rating, count)}).
+    """
+    user_index = {user_id: i for i, user_id in enumerate(user_ids)}
+    question_index = {question_id: i for i, question_id in enumerate(question_ids)}
+    user_rating = [DEFAULT_RATING] * len(user_index)
+    user_count = [0] * len(user_index)
+    question_rating = [DEFAULT_RATING] * len(question_index)
+    question_count = [0] * len(question_index)
+
+    for user_id, question_id, is_correct in rows:
+        u, q = user_index.get(user_id), question_index.get(question_id)
+        if u is None or q is None:
+            continue
+        surprise = float(is_correct) - expected_score(user_rating[u], question_rating[q])
+        user_rating[u] += k_factor(user_count[u]) * surprise
+        question_rating[q] -= k_factor(question_count[q]) * surprise
+        user_count[u] += 1
+        question_count[q] += 1
+
+    return (
+        {user_id: (user_rating[i], user_count[i]) for user_id, i in user_index.items()},
+        {question_id: (question_rating[i], question_count[i]) for question_id, i in question_index.items()},
+    )
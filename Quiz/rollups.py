@@ -0,0 +1,282 @@
+"""
+Daily and hourly activity rollups for the dashboards.
+
+DailyActivity and HourlyActivity hold the number of answers and correct
+answers per day or hour and per question difficulty, plus an 'all' bucket
+across difficulties; the daily rows also count distinct active users, with
+DailyActiveUser recording who was already counted. Days and hours follow
+settings.TIME_ZONE.
+
+Recording answers only queues an update (see Quiz.signals): new Practice
+rows start with `rolled_up` unset, and `update_rollups`, run by the task
+worker QUIZBIT_ROLLUP_DELAY seconds later, counts every answer recorded in
+the meantime with one increment per touched row, setting the flag in the
+same transaction. Submissions therefore never write the shared rows.
+`rebuild_rollups` recomputes whole days from the counted answers of
+Practice and PracticeArchive, one chunk of days per transaction, so it can
+backfill history or repair drift and be re-run at will; answers still
+waiting are added by the next update. Both take the rollup lock (see
+`_lock_rollups`), so a rebuild never races an update. A range of N days is
+then read back with one index range scan of N rows instead of a GROUP BY
+over every answer.
+"""
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import Count, F, Min, Q
+from django.db.models.functions import TruncHour
+from django.utils import timezone
+
+from Tasks.queue import enqueue
+
+from .models import DailyActiveUser, DailyActivity, HourlyActivity, Practice, PracticeArchive, Question
+
+ALL = 'all'
+DIFFICULTIES = [ALL, *Question.Difficulty.values]
+
+# Longest range served per request, in days, for each granularity.
+MAX_RANGE_DAYS = {'day': 731, 'hour': 31}
+
+UPDATE_LOCK_KEY = 'quiz.rollups:update'
+
+
+def _hour_of(moment):
+    return timezone.localtime(moment).replace(minute=0, second=0, microsecond=0)
+
+
+def _start_of(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def schedule_rollup_update():
+    """
+    Queue an update of the rollups QUIZBIT_ROLLUP_DELAY seconds from now,
+    unless one is already waiting: the answers of a burst are counted once.
+    """
+    delay = settings.QUIZBIT_ROLLUP_DELAY
+    if cache.add(UPDATE_LOCK_KEY, 1, delay):
+        # Start after the lock expires, so answers that found it taken are in.
+        enqueue('quiz.update_activity_rollups', run_after=timezone.now() + timedelta(seconds=delay + 1))
+
+
+def _lock_rollups():
+    """
+    Hold the rollup tables against other writers until the transaction ends.
+
+    Serializes updates and rebuilds: a rebuild replaces rows an update could
+    otherwise recreate under it, and must not count answers an update is
+    about to add. Readers are not blocked. SQLite allows one writing
+    transaction at a time anyway.
+    """
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute(f'LOCK TABLE {DailyActivity._meta.db_table} IN EXCLUSIVE MODE')
+
+
+def update_rollups(batch_size=5000):
+    """
+    Add the answers not counted yet to the rollups, `batch_size` per
+    transaction; returns the number of answers added.
+
+    A batch is counted and flagged in the same transaction, so an update
+    that fails or runs twice never counts an answer twice.
+    """
+    total = 0
+    while True:
+        with transaction.atomic():
+            _lock_rollups()
+            answers = list(
+                Practice.objects.filter(rolled_up=False).order_by('id')
+                .values('id', 'user_id', 'is_correct', 'created_at', 'question__difficulty')[:batch_size]
+            )
+            _add_answers(answers)
+            Practice.objects.filter(pk__in=[answer['id'] for answer in answers]).update(rolled_up=True)
+        total += len(answers)
+        if len(answers) < batch_size:
+            return total
+
+
+def _add_answers(answers):
+    """Add the answers (dicts of Practice values) to the rollups, one increment per row."""
+    daily, hourly = defaultdict(lambda: [0, 0]), defaultdict(lambda: [0, 0])
+    users = defaultdict(set)
+    for answer in answers:
+        hour = _hour_of(answer['created_at'])
+        for bucket in (answer['question__difficulty'], ALL):
+            for counts in (daily[hour.date(), bucket], hourly[hour, bucket]):
+                counts[0] += 1
+                counts[1] += answer['is_correct']
+            users[hour.date(), bucket].add(answer['user_id'])
+
+    new_users = _add_active_users(users)
+    for (day, bucket), (attempts, correct) in sorted(daily.items()):
+        _increment(
+            DailyActivity, {'day': day, 'difficulty': bucket},
+            attempts=attempts, correct=correct, active_users=new_users[day, bucket]
+        )
+    for (hour, bucket), (attempts, correct) in sorted(hourly.items()):
+        _increment(HourlyActivity, {'hour': hour, 'difficulty': bucket}, attempts=attempts, correct=correct)
+
+
+def _increment(model, lookup, **amounts):
+    """Add `amounts` to the counters of the `lookup` row, creating it if needed."""
+    increments = {field: F(field) + amount for field, amount in amounts.items() if amount}
+    if not model.objects.filter(**lookup).update(**increments):
+        model.objects.bulk_create([model(**lookup)], ignore_conflicts=True)
+        model.objects.filter(**lookup).update(**increments)
+
+
+def _add_active_users(users):
+    """
+    Record the users of {(day, bucket): user ids} as active and return the
+    number of newly active ones per (day, bucket).
+
+    Users already recorded are found with one lookup per day; only the
+    first answer of a user on a day inserts.
+    """
+    by_day = defaultdict(set)
+    for day, bucket in users:
+        by_day[day].add(bucket)
+
+    new_users = defaultdict(int)
+    for day, buckets in sorted(by_day.items()):
+        user_ids = set().union(*(users[day, bucket] for bucket in buckets))
+        known = set(
+            DailyActiveUser.objects.filter(day=day, difficulty__in=buckets, user_id__in=user_ids)
+            .values_list('difficulty', 'user_id')
+        )
+        for bucket in sorted(buckets):
+            for user_id in sorted(users[day, bucket]):
+                if (bucket, user_id) in known:
+                    continue
+                DailyActiveUser.objects.create(day=day, difficulty=bucket, user_id=user_id)
+                new_users[day, bucket] += 1
+    return new_users
+
+
+def rebuild_days(start, end):
+    """
+    Recompute the rollups of the days from `start` to `end` (exclusive)
+    from the counted answers given on them; returns the number of answers.
+
+    Runs in one transaction under the rollup lock, so an update either
+    committed before and its answers are recounted here, or waits and adds
+    its answers to the rebuilt rows.
+    """
+    start_at, end_at = _start_of(start), _start_of(end)
+    hourly, users = defaultdict(lambda: [0, 0]), defaultdict(set)
+    with transaction.atomic():
+        _lock_rollups()
+        DailyActivity.objects.filter(day__gte=start, day__lt=end).delete()
+        HourlyActivity.objects.filter(hour__gte=start_at, hour__lt=end_at).delete()
+        DailyActiveUser.objects.filter(day__gte=start, day__lt=end).delete()
+
+        for answers in (Practice.objects.filter(rolled_up=True), PracticeArchive.objects.all()):
+            answers = answers.filter(created_at__gte=start_at, created_at__lt=end_at).order_by()
+            rows = answers.annotate(hour=TruncHour('created_at')).values(
+                'hour', 'question__difficulty', 'user_id'
+            ).annotate(attempts=Count('id'), correct=Count('id', filter=Q(is_correct=True)))
+            for row in rows:
+                hour = timezone.localtime(row['hour'])
+                for bucket in (row['question__difficulty'], ALL):
+                    counts = hourly[hour, bucket]
+                    counts[0] += row['attempts']
+                    counts[1] += row['correct']
+                    users[hour.date(), bucket].add(row['user_id'])
+
+        daily = defaultdict(lambda: [0, 0])
+        for (hour, bucket), (attempts, correct) in hourly.items():
+            counts = daily[hour.date(), bucket]
+            counts[0] += attempts
+            counts[1] += correct
+
+        HourlyActivity.objects.bulk_create(
+            [
+                HourlyActivity(hour=hour, difficulty=bucket, attempts=attempts, correct=correct)
+                for (hour, bucket), (attempts, correct) in hourly.items()
+            ],
+            batch_size=1000
+        )
+        DailyActivity.objects.bulk_create(
+            [
+                DailyActivity(
+                    day=day, difficulty=bucket, attempts=attempts, correct=correct,
+                    active_users=len(users[day, bucket])
+                )
+                for (day, bucket), (attempts, correct) in daily.items()
+            ],
+            batch_size=1000
+        )
+        DailyActiveUser.objects.bulk_create(
+            [
+                DailyActiveUser(day=day, difficulty=bucket, user_id=user_id)
+                for (day, bucket), user_ids in users.items() for user_id in user_ids
+            ],
+            batch_size=1000
+        )
+    return sum(attempts for (_, bucket), (attempts, _) in daily.items() if bucket == ALL)
+
+
+def first_activity_day():
+    """The day of the oldest recorded answer, or None."""
+    oldest = [
+        model.objects.aggregate(oldest=Min('created_at'))['oldest'] for model in (Practice, PracticeArchive)
+    ]
+    oldest = [moment for moment in oldest if moment is not None]
+    return timezone.localtime(min(oldest)).date() if oldest else None
+
+
+def rebuild_rollups(start, end, chunk_days=1):
+    """
+    Rebuild the rollups from `start` to `end` (both included), `chunk_days`
+    days per transaction.
+
+    Yields (last day rebuilt, answers counted so far) after every chunk.
+    """
+    total = 0
+    day = start
+    while day <= end:
+        chunk_end = min(day + timedelta(days=chunk_days), end + timedelta(days=1))
+        total += rebuild_days(day, chunk_end)
+        yield chunk_end - timedelta(days=1), total
+        day = chunk_end
+
+
+def activity_series(start, end, difficulty=ALL, granularity='day'):
+    """
+    Activity from day `start` to `end` (both included), one entry per day
+    or hour with zeros where nothing happened, oldest first.
+
+    Entries hold `attempts`, `correct` and `correct_rate` (None without
+    attempts); daily entries also `active_users`.
+    """
+    if granularity == 'day':
+        rows = {
+            row['day']: row for row in DailyActivity.objects.filter(
+                difficulty=difficulty, day__gte=start, day__lte=end
+            ).values('day', 'attempts', 'correct', 'active_users')
+        }
+        periods = [start + timedelta(days=offset) for offset in range((end - start).days + 1)]
+        empty = {'attempts': 0, 'correct': 0, 'active_users': 0}
+    else:
+        start_at, end_at = _start_of(start), _start_of(end + timedelta(days=1))
+        rows = {
+            row['hour']: row for row in HourlyActivity.objects.filter(
+                difficulty=difficulty, hour__gte=start_at, hour__lt=end_at
+            ).values('hour', 'attempts', 'correct')
+        }
+        # Stepping in absolute time keeps days with a DST change 23 or 25 hours long.
+        hours = int((end_at - start_at) / timedelta(hours=1))
+        periods = [timezone.localtime(start_at + timedelta(hours=offset)) for offset in range(hours)]
+        empty = {'attempts': 0, 'correct': 0}
+
+    series = []
+    for period in periods:
+        row = rows.get(period, empty)
+        entry = {granularity: period, **{key: row[key] for key in empty}}
+        entry['correct_rate'] = row['correct'] / row['attempts'] if row['attempts'] else None
+        series.append(entry)
+    return series
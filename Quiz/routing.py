@@ -0,0 +1,6 @@
+from django.urls import path
+from .consumers import LiveQuizConsumer
+
+websocket_urlpatterns = [
+    path('ws/live/<str:code>/', LiveQuizConsumer.as_asgi()),
+]
@@ -1,5 +1,6 @@
 from rest_framework import serializers
-from .models import Question, Choice, Practice
+from .models import Question, Choice, Practice, ExamSession, LiveSession
+from .rollups import DIFFICULTIES, MAX_RANGE_DAYS
 
 class ChoiceSerializer(serializers.ModelSerializer):
     """
@@ -44,6 +45,64 @@ class QuestionDetailSerializer(serializers.ModelSerializer):
         model = Question
         fields = ['id', 'text', 'difficulty', 'choices', 'created_at']
 
+class RecommendedQuestionSerializer(QuestionListSerializer):
+    """
+    Question list serializer extended with the question's rating.
+    
+    Fields:
+        id, text, difficulty, created_at: As in QuestionListSerializer
+        rating (float): Difficulty estimated from the answers given so far
+    """
+    class Meta(QuestionListSerializer.Meta):
+        fields = QuestionListSerializer.Meta.fields + ['rating']
+
+class RecommendedQuestionsQuerySerializer(serializers.Serializer):
+    """
+    Serializer for the recommended questions query parameters.
+    
+    Fields:
+        limit (int): Number of questions to return
+        window (float): Largest rating distance from the user's skill
+    """
+    limit = serializers.IntegerField(required=False, min_value=1, max_value=50, default=10)
+    window = serializers.FloatField(required=False, min_value=1, max_value=2000, default=200)
+
+class QuestionSyncQuerySerializer(serializers.Serializer):
+    """
+    Serializer for the question sync query parameters.
+    
+    Fields:
+        since (datetime): Watermark returned by the previous sync or snapshot
+        limit (int): Maximum number of changed questions to return
+    """
+    since = serializers.DateTimeField(required=False)
+    limit = serializers.IntegerField(required=False, min_value=1, max_value=1000, default=500)
+
+class ActivityStatsQuerySerializer(serializers.Serializer):
+    """
+    Serializer for the activity statistics query parameters.
+    
+    Fields:
+        start (date): First day of the range
+        end (date): Last day of the range, included
+        difficulty (str): Difficulty level, or 'all' across difficulties
+        granularity (str): One entry per 'day' or per 'hour'
+    """
+    start = serializers.DateField()
+    end = serializers.DateField()
+    difficulty = serializers.ChoiceField(choices=DIFFICULTIES, default='all')
+    granularity = serializers.ChoiceField(choices=list(MAX_RANGE_DAYS), default='day')
+
+    def validate(self, attrs):
+        days = (attrs['end'] - attrs['start']).days + 1
+        if days < 1:
+            raise serializers.ValidationError({'end': 'Must not be before start'})
+        if days > MAX_RANGE_DAYS[attrs['granularity']]:
+            raise serializers.ValidationError(
+                {'end': f"At most {MAX_RANGE_DAYS[attrs['granularity']]} days per {attrs['granularity']} request"}
+            )
+        return attrs
+
 class AnswerSubmissionSerializer(serializers.Serializer):
     """
     Serializer for submitting answers to questions.
@@ -76,3 +135,188 @@ class PracticeHistorySerializer(serializers.ModelSerializer):
     class Meta:
         model = Practice
         fields = ['id', 'question', 'selected_choice', 'is_correct', 'created_at']
+
+class PracticeHistoryQuerySerializer(serializers.Serializer):
+    """
+    Serializer for the practice history query parameters.
+    
+    Fields:
+        before (datetime): Only include attempts made before this moment
+        before_id (int): With `before`, also include attempts made at that
+            very moment whose id is lower (the id of the last attempt received)
+        limit (int): Maximum number of attempts to return
+    """
+    before = serializers.DateTimeField(required=False)
+    before_id = serializers.IntegerField(required=False)
+    limit = serializers.IntegerField(required=False, min_value=1, max_value=1000)
+
+    def validate(self, attrs):
+        if 'before_id' in attrs and 'before' not in attrs:
+            raise serializers.ValidationError({'before_id': 'Only valid together with before.'})
+        return attrs
+
+class ExamSessionCreateSerializer(serializers.Serializer):
+    """
+    Serializer for starting a timed exam.
+
+    Fields:
+        question_ids (list): Optional fixed list of question ids for the exam
+        question_count (int): Number of random questions when no ids are given
+        difficulty (str): Optional difficulty the random questions are drawn from
+        duration_minutes (int): Time allowed before the exam closes
+    """
+    question_ids = serializers.ListField(child=serializers.IntegerField(), required=False, max_length=200)
+    question_count = serializers.IntegerField(min_value=1, max_value=200, default=20)
+    difficulty = serializers.ChoiceField(choices=Question.Difficulty.choices, required=False)
+    duration_minutes = serializers.IntegerField(min_value=1, max_value=600, default=30)
+
+class ExamSessionSerializer(serializers.ModelSerializer):
+    """
+    Serializer for an exam session and its questions.
+
+    Fields:
+        id (int): The unique identifier of the exam session
+        questions (list): The exam questions, in exam order, with their choices
+        answers (dict): Choices selected so far, keyed by question id
+        status (str): in_progress or graded
+        score (int): Number of correct answers once graded
+        started_at (datetime): When the exam started
+        deadline (datetime): When the exam closes
+        submitted_at (datetime): When the exam was graded
+    """
+    questions = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ExamSession
+        fields = ['id', 'questions', 'answers', 'status', 'score', 'started_at', 'deadline', 'submitted_at']
+
+    def get_questions(self, session):
+        """Return the exam questions in the order stored on the session."""
+        questions = Question.objects.filter(pk__in=session.question_ids).prefetch_related('choices').in_bulk()
+        return QuestionDetailSerializer(
+            [questions[pk] for pk in session.question_ids if pk in questions],
+            many=True
+        ).data
+
+class ExamAnswersSerializer(serializers.Serializer):
+    """
+    Serializer for saving exam answers.
+
+    Fields:
+        answers (dict): Mapping of question id to the selected choice id
+    """
+    answers = serializers.DictField(child=serializers.IntegerField())
+
+    def validate_answers(self, value):
+        """Convert the question ids used as JSON keys back to integers."""
+        try:
+            return {int(question_id): choice_id for question_id, choice_id in value.items()}
+        except ValueError:
+            raise serializers.ValidationError("Question ids must be integers.")
+
+class LiveSessionSerializer(serializers.ModelSerializer):
+    """
+    Serializer for a live quiz session.
+
+    Fields:
+        code (str): Code students use to join the session
+        host (int): Id of the user running the session
+        current_question (int): Id of the question currently shown, if any
+        status (str): open or closed
+        created_at (datetime): When the session was created
+        closed_at (datetime): When the host closed the session
+    """
+    class Meta:
+        model = LiveSession
+        fields = ['code', 'host', 'current_question', 'status', 'created_at', 'closed_at']
+        read_only_fields = fields
+
+
+# Fast-path serialization
+#
+# The functions below build the same representation as the serializers above
+# straight from `.values()` rows, skipping ModelSerializer field introspection
+# and per-field method dispatch. They are used by the high-volume list views
+# when QUIZBIT_FAST_SERIALIZATION is enabled and must be kept in sync with
+# QuestionListSerializer, QuestionDetailSerializer and PracticeHistorySerializer.
+
+_datetime_field = serializers.DateTimeField()
+
+
+def serialize_question_rows(queryset):
+    """
+    Fast equivalent of QuestionListSerializer(queryset, many=True).data.
+    """
+    to_datetime = _datetime_field.to_representation
+    return [
+        {
+            'id': row['id'],
+            'text': row['text'],
+            'difficulty': row['difficulty'],
+            'created_at': to_datetime(row['created_at']),
+        }
+        for row in queryset.values('id', 'text', 'difficulty', 'created_at')
+    ]
+
+
+def serialize_question_detail_rows(queryset, choices=None):
+    """
+    Fast equivalent of QuestionDetailSerializer(queryset, many=True).data.
+
+    Choices are loaded with one more query: by default those of the listed
+    questions, or the `choices` queryset when given (e.g. all of them, for
+    the whole bank, to avoid a huge IN list).
+    """
+    to_datetime = _datetime_field.to_representation
+    rows = list(queryset.values('id', 'text', 'difficulty', 'created_at'))
+    if choices is None:
+        choices = Choice.objects.filter(question_id__in=[row['id'] for row in rows])
+
+    choices_by_question = {}
+    for choice in choices.order_by('id').values('id', 'text', 'question_id'):
+        choices_by_question.setdefault(choice['question_id'], []).append(
+            {'id': choice['id'], 'text': choice['text']}
+        )
+    return [
+        {
+            'id': row['id'],
+            'text': row['text'],
+            'difficulty': row['difficulty'],
+            'choices': choices_by_question.get(row['id'], []),
+            'created_at': to_datetime(row['created_at']),
+        }
+        for row in rows
+    ]
+
+
+def serialize_practice_rows(queryset):
+    """
+    Fast equivalent of PracticeHistorySerializer(queryset, many=True).data.
+
+    The related question and choice come from the same joined query instead
+    of one query per row.
+    """
+    to_datetime = _datetime_field.to_representation
+    rows = queryset.values(
+        'id', 'is_correct', 'created_at',
+        'question_id', 'question__text', 'question__difficulty', 'question__created_at',
+        'selected_choice_id', 'selected_choice__text',
+    )
+    return [
+        {
+            'id': row['id'],
+            'question': {
+                'id': row['question_id'],
+                'text': row['question__text'],
+                'difficulty': row['question__difficulty'],
+                'created_at': to_datetime(row['question__created_at']),
+            },
+            'selected_choice': {
+                'id': row['selected_choice_id'],
+                'text': row['selected_choice__text'],
+            },
+            'is_correct': row['is_correct'],
+            'created_at': to_datetime(row['created_at']),
+        }
+        for row in rows
+    ]
@@ -0,0 +1,107 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import Signal, receiver
+from django.utils import timezone
+
+from .bank import schedule_bank_rebuild
+from .cache import invalidate_questions
+from .models import Choice, Question, Tombstone
+from .ratings import apply_practices
+from .rollups import schedule_rollup_update
+from .similarity import schedule_index
+
+# Sent with `practices` (a list of Practice instances) whenever answers are
+# recorded: single submissions, graded exams and live-quiz batches. Bulk
+# inserts send no post_save, so this is the one hook for per-answer work.
+practices_recorded = Signal()
+
+
+@receiver(post_save, sender=Question)
+@receiver(post_delete, sender=Question)
+@receiver(post_save, sender=Choice)
+@receiver(post_delete, sender=Choice)
+def invalidate_question_cache(sender, **kwargs):
+    """
+    Invalidate cached question content once the write is committed.
+
+    Bumping before the commit would let a concurrent reader repopulate the
+    new version with the data it can still see from before the write.
+    """
+    transaction.on_commit(invalidate_questions)
+
+
+@receiver(post_save, sender=Question)
+@receiver(post_delete, sender=Question)
+@receiver(post_save, sender=Choice)
+@receiver(post_delete, sender=Choice)
+def rebuild_question_banks(sender, **kwargs):
+    """Queue a rebuild of the question-bank files once the write commits."""
+    transaction.on_commit(schedule_bank_rebuild)
+
+
+@receiver(post_save, sender=Choice)
+@receiver(post_delete, sender=Choice)
+def touch_question(sender, instance, **kwargs):
+    """
+    Move the question's `updated_at` when one of its choices changes.
+
+    Conditional GET validators of the question endpoints rely on it. `update()`
+    does not send signals, so this does not re-enter the Question receivers.
+    """
+    Question.objects.filter(pk=instance.question_id).update(updated_at=timezone.now())
+
+
+@receiver(post_save, sender=Question)
+@receiver(post_save, sender=Choice)
+@receiver(post_delete, sender=Choice)
+def update_similarity_index(sender, instance, **kwargs):
+    """
+    Refresh the question's near-duplicate index entry once the write commits.
+
+    Soft-deleting a question saves it too, which drops it from the index;
+    hard deletes cascade to the index rows.
+    """
+    schedule_index(instance.pk if sender is Question else instance.question_id)
+
+
+@receiver(practices_recorded)
+def update_ratings(sender, practices, **kwargs):
+    """Move user skills and question ratings for the recorded answers."""
+    apply_practices(practices)
+
+
+@receiver(practices_recorded)
+def update_activity_rollups(sender, practices, **kwargs):
+    """
+    Queue the update that counts the recorded answers in the daily and hourly
+    activity rollups, once they are committed.
+    """
+    transaction.on_commit(schedule_rollup_update)
+
+
+def log_tombstone(sender, instance):
+    """Record the deletion of a question or choice for delta sync."""
+    if sender is Question:
+        kind, question_id = Tombstone.Kind.QUESTION, instance.pk
+    else:
+        kind, question_id = Tombstone.Kind.CHOICE, instance.question_id
+    Tombstone.objects.create(kind=kind, object_id=instance.pk, question_id=question_id)
+
+
+@receiver(post_save, sender=Question)
+@receiver(post_save, sender=Choice)
+def record_soft_delete(sender, instance, created, **kwargs):
+    """Log a tombstone when a question or choice is soft-deleted."""
+    if instance.deleted_at is not None and not created:
+        log_tombstone(sender, instance)
+
+
+@receiver(post_delete, sender=Question)
+@receiver(post_delete, sender=Choice)
+def record_delete(sender, instance, **kwargs):
+    """
+    Log a tombstone when a question or choice is deleted outright. Objects
+    removed by the deletion worker were logged when they were soft-deleted.
+    """
+    if instance.deleted_at is None:
+        log_tombstone(sender, instance)
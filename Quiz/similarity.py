@@ -0,0 +1,221 @@
+"""
+Near-duplicate detection for questions with MinHash and LSH.
+
+Each question's text and choice texts are normalized and cut into character
+shingles. A MinHash signature of NUM_PERM values summarizes the shingle set:
+the fraction of positions where two signatures agree estimates the Jaccard
+similarity of the two sets. The signature is split into BANDS bands of ROWS
+values and every band is hashed into a bucket; questions sharing at least
+one (band, bucket) pair are candidates. With 16 bands of 4 rows, pairs above
+roughly 0.5 similarity become candidates with high probability, and
+candidates are then confirmed against the stored signatures.
+
+Looking up a question costs one indexed query for its BANDS buckets and one
+for the candidates' signatures, independent of the size of the bank. The
+index is kept current by Quiz.signals whenever a question or choice changes,
+once per question and transaction (see `schedule_index`).
+"""
+import hashlib
+import random
+import re
+import struct
+import threading
+
+from django.db import transaction
+from django.db.models import Count, Q
+
+from .models import Question, QuestionBucket, QuestionSignature
+
+SHINGLE_SIZE = 5
+NUM_PERM = 64
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+DEFAULT_THRESHOLD = 0.7
+
+# Questions sharing a bucket with more than this many others are not all
+# compared, only those sharing the most bands; it keeps lookups bounded when
+# a bank has huge duplicate clusters.
+MAX_CANDIDATES = 500
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_rng = random.Random(20241121)
+_PERMUTATIONS = [
+    (_rng.randrange(1, _MERSENNE_PRIME), _rng.randrange(0, _MERSENNE_PRIME))
+    for _ in range(NUM_PERM)
+]
+_SIGNATURE_FORMAT = f'<{NUM_PERM}Q'
+_NON_WORD = re.compile(r'[\W_]+')
+
+# Question ids waiting for their on-commit reindex, per thread.
+_pending = threading.local()
+
+
+def normalize(text):
+    """Lowercase `text` and reduce punctuation and whitespace to single spaces."""
+    return _NON_WORD.sub(' ', text.lower()).strip()
+
+
+def shingles(text, choices=()):
+    """Character shingles of a question's text and its choice texts."""
+    parts = [normalize(text)] + sorted(normalize(choice) for choice in choices)
+    result = set()
+    for part in parts:
+        if len(part) <= SHINGLE_SIZE:
+            if part:
+                result.add(part)
+            continue
+        result.update(part[i:i + SHINGLE_SIZE] for i in range(len(part) - SHINGLE_SIZE + 1))
+    return result
+
+
+def minhash(shingle_set):
+    """MinHash signature (a tuple of NUM_PERM ints) of a set of strings."""
+    hashed = [
+        int.from_bytes(hashlib.blake2b(shingle.encode(), digest_size=8).digest(), 'little') & _MERSENNE_PRIME
+        for shingle in shingle_set
+    ] or [0]
+    return tuple(
+        min((a * x + b) % _MERSENNE_PRIME for x in hashed)
+        for a, b in _PERMUTATIONS
+    )
+
+
+def band_buckets(signature):
+    """The (band, bucket) pairs a signature is filed under."""
+    buckets = []
+    for band in range(BANDS):
+        rows = struct.pack(f'<{ROWS}Q', *signature[band * ROWS:(band + 1) * ROWS])
+        bucket = int.from_bytes(hashlib.blake2b(rows, digest_size=8).digest(), 'little', signed=True)
+        buckets.append((band, bucket))
+    return buckets
+
+
+def similarity(signature, other):
+    """Estimated Jaccard similarity of the sets behind two signatures."""
+    return sum(a == b for a, b in zip(signature, other)) / NUM_PERM
+
+
+def pack_signature(signature):
+    return struct.pack(_SIGNATURE_FORMAT, *signature)
+
+
+def unpack_signature(data):
+    return struct.unpack(_SIGNATURE_FORMAT, bytes(data))
+
+
+def question_signature(question):
+    """Signature of a saved question, including its current choices."""
+    return minhash(shingles(question.text, [choice.text for choice in question.choices.all()]))
+
+
+def index_question(question_id):
+    """
+    (Re)build the signature and buckets of one question.
+
+    Questions that no longer exist or are soft-deleted are dropped from the
+    index.
+    """
+    question = Question.objects.filter(pk=question_id).first()
+    with transaction.atomic():
+        QuestionBucket.objects.filter(question_id=question_id).delete()
+        if question is None:
+            QuestionSignature.objects.filter(question_id=question_id).delete()
+            return None
+        signature = question_signature(question)
+        QuestionSignature.objects.update_or_create(
+            question_id=question_id, defaults={'signature': pack_signature(signature)}
+        )
+        QuestionBucket.objects.bulk_create(
+            QuestionBucket(question_id=question_id, band=band, bucket=bucket)
+            for band, bucket in band_buckets(signature)
+        )
+    return signature
+
+
+def schedule_index(question_id):
+    """
+    Reindex a question once the current transaction commits.
+
+    Saving a question with its choices fires one signal per row; only the
+    first of their on-commit callbacks indexes the question, the others find
+    it done. Ids left behind by a rolled-back transaction are indexed by the
+    next commit that schedules them.
+    """
+    question_ids = getattr(_pending, 'question_ids', None)
+    if question_ids is None:
+        question_ids = _pending.question_ids = set()
+    question_ids.add(question_id)
+    transaction.on_commit(lambda: _index_pending(question_id))
+
+
+def _index_pending(question_id):
+    if question_id in _pending.question_ids:
+        _pending.question_ids.discard(question_id)
+        index_question(question_id)
+
+
+def index_questions(questions):
+    """
+    Index many questions at once (for the backfill), with bulk writes.
+
+    `questions` is an iterable of Question objects with their choices
+    prefetched. Returns the number indexed.
+    """
+    signatures, buckets = [], []
+    for question in questions:
+        signature = question_signature(question)
+        signatures.append(QuestionSignature(question_id=question.pk, signature=pack_signature(signature)))
+        buckets.extend(
+            QuestionBucket(question_id=question.pk, band=band, bucket=bucket)
+            for band, bucket in band_buckets(signature)
+        )
+    ids = [signature.question_id for signature in signatures]
+    with transaction.atomic():
+        QuestionBucket.objects.filter(question_id__in=ids).delete()
+        QuestionSignature.objects.filter(question_id__in=ids).delete()
+        QuestionSignature.objects.bulk_create(signatures, batch_size=1000)
+        QuestionBucket.objects.bulk_create(buckets, batch_size=1000)
+    return len(ids)
+
+
+def find_similar(signature, threshold=DEFAULT_THRESHOLD, exclude_id=None, limit=10):
+    """
+    Indexed questions whose estimated similarity to `signature` is at least
+    `threshold`, as (question_id, similarity) pairs, most similar first.
+
+    At most MAX_CANDIDATES candidates are compared, those sharing the most
+    bands with `signature` first: more shared bands means a higher expected
+    similarity.
+    """
+    condition = Q()
+    for band, bucket in band_buckets(signature):
+        condition |= Q(band=band, bucket=bucket)
+    candidates = QuestionBucket.objects.filter(condition)
+    if exclude_id is not None:
+        candidates = candidates.exclude(question_id=exclude_id)
+    candidate_ids = list(
+        candidates.values('question_id').annotate(bands=Count('id'))
+        .order_by('-bands', 'question_id').values_list('question_id', flat=True)[:MAX_CANDIDATES]
+    )
+
+    matches = []
+    rows = QuestionSignature.objects.filter(
+        question_id__in=candidate_ids,
+        question__deleted_at__isnull=True
+    ).values_list('question_id', 'signature')
+    for question_id, packed in rows:
+        score = similarity(signature, unpack_signature(packed))
+        if score >= threshold:
+            matches.append((question_id, score))
+    matches.sort(key=lambda match: (-match[1], match[0]))
+    return matches[:limit]
+
+
+def find_near_duplicates(question, threshold=DEFAULT_THRESHOLD, limit=10):
+    """Near-duplicates of a saved question, as (question_id, similarity) pairs."""
+    return find_similar(question_signature(question), threshold, exclude_id=question.pk, limit=limit)
+
+
+def find_near_duplicates_of_text(text, choices=(), threshold=DEFAULT_THRESHOLD, limit=10):
+    """Near-duplicates of a question that is not saved yet, e.g. during an import."""
+    return find_similar(minhash(shingles(text, choices)), threshold, limit=limit)
@@ -0,0 +1,132 @@
+"""
+Delta sync of the question bank for clients that cache it.
+
+A client keeps the `watermark` of its last sync and sends it back as
+`since`. The response holds every question created or changed after it, with
+all of its current choices, and the ids of the questions and choices
+deleted after it. Editing, adding or removing a choice moves its question's
+`updated_at` (see Quiz.signals), so a changed question is always sent whole.
+Both lookups are range scans on indexed timestamps, so a sync costs
+O(changes), not O(bank).
+
+Timestamps are taken when a row is written but only become visible when its
+transaction commits, so a change could show up with an `updated_at` older
+than a watermark already handed out. A sync therefore only covers changes up
+to QUIZBIT_SYNC_SAFETY_MARGIN seconds ago; newer ones are picked up by the
+next sync.
+
+First-time clients download `build_snapshot()` instead: the whole bank as
+one gzip-compressed JSON document, with the watermark to sync from.
+"""
+import gzip
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from .deletion import delete_in_batches
+from .models import Choice, Question, Tombstone
+from .renderers import FastJSONRenderer
+from .serializers import serialize_question_detail_rows
+
+DEFAULT_LIMIT = 500
+
+
+class WatermarkExpired(Exception):
+    """The watermark is older than the retained tombstones."""
+
+
+def current_watermark():
+    """The newest moment whose changes are safe to hand out."""
+    return timezone.now() - timedelta(seconds=settings.QUIZBIT_SYNC_SAFETY_MARGIN)
+
+
+def tombstone_cutoff():
+    """Tombstones older than this are pruned; so are watermarks older than it."""
+    return timezone.now() - timedelta(days=settings.QUIZBIT_SYNC_TOMBSTONE_DAYS)
+
+
+def get_changes(since=None, limit=DEFAULT_LIMIT):
+    """
+    Collect the changes to the question bank after the `since` watermark.
+
+    Returns a dict with `questions` (serialized like QuestionDetailSerializer,
+    oldest change first), `deleted` question and choice ids, the new
+    `watermark` and `has_more`. At most `limit` questions are returned; when
+    there are more, the watermark stops at the last one sent and `has_more`
+    is set, so the client syncs again from there.
+
+    Raises WatermarkExpired when tombstones after `since` may have been
+    pruned; the client has to start over from a snapshot.
+    """
+    if since is not None and since < tombstone_cutoff():
+        raise WatermarkExpired(since)
+
+    watermark = current_watermark()
+    if since is not None and since >= watermark:
+        return {'watermark': since, 'has_more': False, 'questions': [], 'deleted': _deleted([])}
+
+    changed = Question.objects.filter(updated_at__lte=watermark).order_by('updated_at', 'id')
+    if since is not None:
+        changed = changed.filter(updated_at__gt=since)
+    rows = list(changed.values_list('id', 'updated_at')[:limit + 1])
+
+    has_more = len(rows) > limit
+    if has_more:
+        # Cut the page between two timestamps, so that resuming from the
+        # watermark neither skips nor repeats a question.
+        boundary = rows[limit][1]
+        rows = [row for row in rows[:limit] if row[1] < boundary]
+        if rows:
+            watermark = rows[-1][1]
+        else:
+            # More than `limit` questions share one timestamp: send them all.
+            rows = list(changed.filter(updated_at=boundary).values_list('id', 'updated_at'))
+            watermark = boundary
+
+    ids = [pk for pk, _ in rows]
+    tombstones = Tombstone.objects.filter(deleted_at__lte=watermark)
+    if since is not None:
+        tombstones = tombstones.filter(deleted_at__gt=since)
+
+    return {
+        'watermark': watermark,
+        'has_more': has_more,
+        'questions': serialize_question_detail_rows(
+            Question.objects.filter(pk__in=ids).order_by('updated_at', 'id')
+        ),
+        'deleted': _deleted(tombstones.values_list('kind', 'object_id')),
+    }
+
+
+def _deleted(tombstones):
+    deleted = {'questions': [], 'choices': []}
+    for kind, object_id in tombstones:
+        deleted['questions' if kind == Tombstone.Kind.QUESTION else 'choices'].append(object_id)
+    return deleted
+
+
+def build_snapshot():
+    """
+    The whole question bank as gzip-compressed JSON.
+
+    Returns (content, watermark). The document is {"watermark": ...,
+    "questions": [...]}, questions serialized like QuestionDetailSerializer.
+    It may already include changes made after the watermark; syncing from
+    the watermark sends those again, which clients apply idempotently.
+    """
+    watermark = current_watermark()
+    questions = serialize_question_detail_rows(
+        Question.objects.order_by('id'),
+        choices=Choice.objects.filter(question__deleted_at__isnull=True)
+    )
+    document = FastJSONRenderer().render({'watermark': watermark, 'questions': questions})
+    return gzip.compress(document, compresslevel=6, mtime=0), watermark
+
+
+def prune_tombstones(batch_size=1000):
+    """
+    Delete tombstones older than QUIZBIT_SYNC_TOMBSTONE_DAYS, one batch per
+    transaction. Yields the number of rows deleted by each batch.
+    """
+    yield from delete_in_batches(Tombstone.objects.filter(deleted_at__lt=tombstone_cutoff()), batch_size)
@@ -0,0 +1,54 @@
+"""
+Background tasks of the Quiz app (see Tasks.queue).
+"""
+from django.utils import timezone
+
+from Tasks.queue import task
+
+from .bank import BANKS, build_bank
+from .deletion import claim_deletion_job, run_deletion_job
+from .exams import grade_sessions
+from .models import DeletionJob, ExamSession
+from .rollups import update_rollups
+
+
+@task(name='quiz.run_deletion_job', max_attempts=5, retry_delay=30)
+def run_deletion_job_task(job_id, batch_size=1000):
+    """
+    Run a scheduled DeletionJob. A failed run is retried; it resumes where it
+    stopped. Jobs held by another live worker are left alone; a job whose
+    worker died is taken over once its lease expires.
+    """
+    job = DeletionJob.objects.filter(pk=job_id).first()
+    if job is not None and claim_deletion_job(job, include_failed=True):
+        run_deletion_job(job, batch_size)
+
+
+@task(name='quiz.grade_exam_sessions', batch=True)
+def grade_exam_sessions_task(payloads):
+    """
+    Grade exam sessions left open past their deadline, all sessions of the
+    batch in one pass. Sessions submitted in time are already graded and
+    skipped.
+    """
+    session_ids = [payload['session_id'] for payload in payloads]
+    grade_sessions(ExamSession.objects.filter(pk__in=session_ids, deadline__lte=timezone.now()))
+
+
+@task(name='quiz.build_question_banks', batch=True)
+def build_question_banks_task(payloads):
+    """
+    Rebuild the question-bank files after content changes, reusing their
+    unchanged blocks. Rebuilds queued together run once.
+    """
+    for name in BANKS:
+        build_bank(name)
+
+
+@task(name='quiz.update_activity_rollups', batch=True)
+def update_activity_rollups_task(payloads):
+    """
+    Count the answers recorded since the last update in the activity rollups.
+    Updates queued together run once.
+    """
+    update_rollups()
@@ -1,3 +1,1358 @@
-from django.test import TestCase
+import os
+import random
+import shutil
+import tempfile
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from channels.db import database_sync_to_async
+from channels.routing import URLRouter
+from channels.testing import WebsocketCommunicator
+from django.conf import settings
+from django.contrib.auth.models import Permission
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.fields import DateTimeField
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from Authentication.models import User
+from QuizBit.throttling import TokenBucketThrottle
+from QuizBit.ws_auth import AUTH_SUBPROTOCOL, JWTAuthMiddleware
+from Tasks.models import Task
+from Tasks.worker import Worker
+
+from .archive import ARCHIVED_FIELDS, archive_chunk, archive_practice
+from .bank import BLOCK_ROWS, BankFile, BankFormatError, bank_path, build_bank
+from .deletion import claim_deletion_job, delete_in_batches, run_deletion_job, run_pending_deletion_jobs, schedule_deletion
+from .exams import create_exam_session, grade_expired_sessions
+from .live import MAX_FLUSH_ATTEMPTS, PracticeBuffer, claim_answer, create_live_session
+from .models import (
+    Choice, DailyActiveUser, DailyActivity, DeletionJob, ExamSession, HourlyActivity, Practice, PracticeArchive,
+    Question, QuestionBucket, QuestionSignature, Tombstone, UserSkill
+)
+from .ratings import DEFAULT_RATING, K_HALF_LIFE, K_MAX, K_MIN, k_factor, recommend_questions
+from .rollups import ALL, activity_series, first_activity_day, rebuild_days, rebuild_rollups, update_rollups
+from .routing import websocket_urlpatterns
+from .serializers import serialize_question_detail_rows
+from .signals import practices_recorded
+from .similarity import (
+    BANDS, band_buckets, find_near_duplicates, find_near_duplicates_of_text, find_similar, index_question,
+    pack_signature, question_signature
+)
+from .sync import WatermarkExpired, get_changes, prune_tombstones
+
+
+def create_question(text, difficulty=Question.Difficulty.EASY, correct=1, wrong=2):
+    """A question with `correct` correct and `wrong` wrong choices."""
+    question = Question.objects.create(text=text, difficulty=difficulty)
+    Choice.objects.bulk_create(
+        [Choice(question=question, text=f'right {i}', is_correct=True) for i in range(correct)]
+        + [Choice(question=question, text=f'wrong {i}', is_correct=False) for i in range(wrong)]
+    )
+    return question
+
+
+def correct_choice(question):
+    return question.choices.filter(is_correct=True).first()
+
+
+def wrong_choice(question):
+    return question.choices.filter(is_correct=False).first()
+
+
+class ExamGradingTests(TestCase):
+    """Exam sessions keep answers in one row and are graded in one pass."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('student', 'student@example.com', 'password')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.questions = [create_question(f'Question {i}') for i in range(4)]
+
+    def start_exam(self, user=None, duration=timedelta(minutes=30)):
+        return create_exam_session(
+            user or self.user, question_count=len(self.questions), duration=duration,
+            question_ids=[question.pk for question in self.questions]
+        )
+
+    def test_saving_answers_writes_no_practice(self):
+        session = self.start_exam()
+        first, second = self.questions[:2]
+
+        response = self.client.patch(
+            f'/api/v1/quizzes/exams/{session.pk}/answers/',
+            {'answers': {str(first.pk): correct_choice(first).pk}}, format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+        response = self.client.patch(
+            f'/api/v1/quizzes/exams/{session.pk}/answers/',
+            {'answers': {str(second.pk): wrong_choice(second).pk}}, format='json'
+        )
+
+        self.assertEqual(response.data['answers'], {
+            str(first.pk): correct_choice(first).pk,
+            str(second.pk): wrong_choice(second).pk,
+        })
+        self.assertFalse(Practice.objects.exists())
+
+    def test_submit_grades_the_answered_questions(self):
+        session = self.start_exam()
+        right, wrong, other, _unanswered = self.questions
+        session.answers = {
+            str(right.pk): correct_choice(right).pk,
+            str(wrong.pk): wrong_choice(wrong).pk,
+            # A choice of another question does not count as an answer
+            str(other.pk): correct_choice(right).pk,
+        }
+        session.save()
+
+        response = self.client.post(f'/api/v1/quizzes/exams/{session.pk}/submit/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.data['score'], response.data['total']), (1, 4))
+        self.assertEqual(
+            set(Practice.objects.values_list('question_id', 'is_correct')),
+            {(right.pk, True), (wrong.pk, False)}
+        )
+        session.refresh_from_db()
+        self.assertEqual(session.status, ExamSession.Status.GRADED)
+        self.assertIsNotNone(session.submitted_at)
+
+    def test_submitting_twice_grades_once(self):
+        session = self.start_exam()
+        question = self.questions[0]
+        session.answers = {str(question.pk): correct_choice(question).pk}
+        session.save()
+
+        self.client.post(f'/api/v1/quizzes/exams/{session.pk}/submit/')
+        response = self.client.post(f'/api/v1/quizzes/exams/{session.pk}/submit/')
+
+        self.assertEqual(response.data['score'], 1)
+        self.assertEqual(Practice.objects.count(), 1)
+
+    def test_answers_are_refused_once_the_exam_is_closed(self):
+        session = self.start_exam()
+        ExamSession.objects.filter(pk=session.pk).update(deadline=timezone.now() - timedelta(seconds=1))
+        question = self.questions[0]
+
+        response = self.client.patch(
+            f'/api/v1/quizzes/exams/{session.pk}/answers/',
+            {'answers': {str(question.pk): correct_choice(question).pk}}, format='json'
+        )
+
+        self.assertEqual(response.status_code, 400)
+
+    def test_answers_to_questions_outside_the_exam_are_refused(self):
+        session = self.start_exam()
+        outsider = create_question('Not in the exam')
+
+        response = self.client.patch(
+            f'/api/v1/quizzes/exams/{session.pk}/answers/',
+            {'answers': {str(outsider.pk): correct_choice(outsider).pk}}, format='json'
+        )
+
+        self.assertEqual(response.status_code, 400)
+
+    def test_other_users_exams_are_not_found(self):
+        other = User.objects.create_user('other', 'other@example.com', 'password')
+        session = self.start_exam(user=other)
+
+        self.assertEqual(self.client.get(f'/api/v1/quizzes/exams/{session.pk}/').status_code, 404)
+        self.assertEqual(self.client.post(f'/api/v1/quizzes/exams/{session.pk}/submit/').status_code, 404)
+        session.refresh_from_db()
+        self.assertEqual(session.status, ExamSession.Status.IN_PROGRESS)
+
+    def test_expired_sessions_are_graded_together(self):
+        expired = [self.start_exam(), self.start_exam()]
+        running = self.start_exam()
+        for session in expired:
+            question = self.questions[0]
+            session.answers = {str(question.pk): correct_choice(question).pk}
+            session.deadline = timezone.now() - timedelta(minutes=1)
+            session.save()
+
+        graded = grade_expired_sessions()
+
+        self.assertEqual({session.pk for session in graded}, {session.pk for session in expired})
+        self.assertEqual(Practice.objects.count(), 2)
+        running.refresh_from_db()
+        self.assertEqual(running.status, ExamSession.Status.IN_PROGRESS)
+
+
+class SubmitThrottleTests(TestCase):
+    """Answer submissions are limited by a token bucket per user."""
+
+    def setUp(self):
+        cache.clear()
+        self.now = 1_000_000.0
+        patchers = [
+            mock.patch.object(TokenBucketThrottle, 'THROTTLE_RATES', {'submit': '3/min'}),
+            mock.patch.object(TokenBucketThrottle, 'timer', lambda throttle: self.now),
+        ]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        self.question = create_question('Throttled')
+        self.user = User.objects.create_user('student', 'student@example.com', 'password')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def submit(self, client=None):
+        return (client or self.client).post(
+            f'/api/v1/quizzes/questions/{self.question.pk}/submit/',
+            {'choice_id': correct_choice(self.question).pk}, format='json'
+        )
+
+    def test_a_full_bucket_allows_a_burst(self):
+        self.assertEqual([self.submit().status_code for _ in range(3)], [200, 200, 200])
+
+        response = self.submit()
+
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response['Retry-After'], '20')
+        self.assertEqual(Practice.objects.count(), 3)
+
+    def test_rejected_requests_do_not_delay_the_next_token(self):
+        for _ in range(3):
+            self.submit()
+        for _ in range(5):
+            self.assertEqual(self.submit()['Retry-After'], '20')
+
+        self.now += 20
+        self.assertEqual(self.submit().status_code, 200)
+        self.assertEqual(self.submit().status_code, 429)
+
+    def test_retry_after_counts_down(self):
+        for _ in range(3):
+            self.submit()
+
+        self.now += 15
+
+        self.assertEqual(self.submit()['Retry-After'], '5')
+
+    def test_idle_time_refills_the_bucket_up_to_capacity(self):
+        for _ in range(3):
+            self.submit()
+
+        self.now += 600
+
+        self.assertEqual([self.submit().status_code for _ in range(4)], [200, 200, 200, 429])
+
+    def test_users_have_separate_buckets(self):
+        for _ in range(3):
+            self.submit()
+        other = APIClient()
+        other.force_authenticate(User.objects.create_user('other', 'other@example.com', 'password'))
+
+        self.assertEqual(self.submit().status_code, 429)
+        self.assertEqual(self.submit(other).status_code, 200)
+
+
+@override_settings(QUIZBIT_SYNC_SAFETY_MARGIN=0)
+class QuestionSyncTests(TestCase):
+    """Clients page through the changes after their watermark."""
+
+    def setUp(self):
+        cache.clear()
+        self.start = timezone.now() - timedelta(hours=1)
+
+    def create_questions(self, *offsets):
+        """One question per offset, last changed `offset` seconds after self.start."""
+        questions = []
+        for offset in offsets:
+            question = create_question(f'Question at {offset}')
+            Question.objects.filter(pk=question.pk).update(updated_at=self.start + timedelta(seconds=offset))
+            questions.append(question.pk)
+        return questions
+
+    def sync_all(self, since=None, limit=3):
+        """Follow `has_more` to the end; returns the pages of question ids and the last result."""
+        pages = []
+        while True:
+            changes = get_changes(since, limit)
+            pages.append([question['id'] for question in changes['questions']])
+            since = changes['watermark']
+            if not changes['has_more']:
+                return pages, changes
+
+    def test_paging_sends_every_question_once(self):
+        questions = self.create_questions(1, 2, 3, 4, 5, 6, 7)
+
+        pages, last = self.sync_all()
+
+        self.assertEqual(pages, [questions[:3], questions[3:6], questions[6:]])
+        self.assertEqual(self.sync_all(last['watermark'])[0], [[]])
+
+    def test_pages_are_not_cut_between_equal_timestamps(self):
+        questions = self.create_questions(1, 2, 3, 3, 3)
+
+        pages, _ = self.sync_all()
+
+        self.assertEqual(pages, [questions[:2], questions[2:]])
+
+    def test_a_page_grows_when_more_than_limit_questions_share_a_timestamp(self):
+        questions = self.create_questions(1, 1, 1, 1, 2)
+
+        pages, _ = self.sync_all(limit=2)
+
+        self.assertEqual(pages, [questions[:4], questions[4:]])
+
+    def test_changed_choices_resend_their_question(self):
+        first, _ = self.create_questions(1, 2)
+        _, synced = self.sync_all()
+
+        Choice.objects.filter(question_id=first, is_correct=False).first().delete()
+        changes = get_changes(synced['watermark'])
+
+        self.assertEqual([question['id'] for question in changes['questions']], [first])
+        self.assertEqual(len(changes['questions'][0]['choices']), 2)
+        self.assertEqual(len(changes['deleted']['choices']), 1)
+
+    def test_deleted_questions_are_sent_as_tombstones_once(self):
+        first, _ = self.create_questions(1, 2)
+        _, synced = self.sync_all()
+
+        schedule_deletion(Question.objects.get(pk=first))
+        changes = get_changes(synced['watermark'])
+
+        self.assertEqual(changes['questions'], [])
+        self.assertEqual(changes['deleted'], {'questions': [first], 'choices': []})
+        self.assertEqual(get_changes(changes['watermark'])['deleted'], {'questions': [], 'choices': []})
+
+    @override_settings(QUIZBIT_SYNC_SAFETY_MARGIN=60)
+    def test_changes_within_the_safety_margin_wait_for_the_next_sync(self):
+        old, recent = self.create_questions(0, 3570)
+
+        changes = get_changes()
+
+        self.assertEqual([question['id'] for question in changes['questions']], [old])
+        self.assertLess(changes['watermark'], Question.objects.get(pk=recent).updated_at)
+
+    @override_settings(QUIZBIT_SYNC_TOMBSTONE_DAYS=30)
+    def test_watermarks_older_than_the_tombstones_expire(self):
+        client = APIClient()
+        client.force_authenticate(User.objects.create_user('student', 'student@example.com', 'password'))
+        since = timezone.now() - timedelta(days=31)
+
+        with self.assertRaises(WatermarkExpired):
+            get_changes(since)
+        response = client.get('/api/v1/quizzes/questions/sync/', {'since': since.isoformat()})
+
+        self.assertEqual(response.status_code, 410)
+
+    @override_settings(QUIZBIT_SYNC_TOMBSTONE_DAYS=30)
+    def test_old_tombstones_are_pruned(self):
+        Tombstone.objects.create(
+            kind=Tombstone.Kind.QUESTION, object_id=1, question_id=1,
+            deleted_at=timezone.now() - timedelta(days=31)
+        )
+        kept = Tombstone.objects.create(kind=Tombstone.Kind.QUESTION, object_id=2, question_id=2)
+
+        self.assertEqual(sum(prune_tombstones()), 1)
+        self.assertEqual(list(Tombstone.objects.all()), [kept])
+
+
+class ActivityRollupTests(TestCase):
+    """Incremental rollups agree with a rebuild from the answers."""
+
+    def setUp(self):
+        cache.clear()
+        self.users = [
+            User.objects.create_user(f'student{i}', f'student{i}@example.com', 'password') for i in range(3)
+        ]
+        self.questions = [
+            create_question(f'{difficulty} question', difficulty) for difficulty in Question.Difficulty.values
+        ]
+        self.start = timezone.now().replace(minute=0, second=0, microsecond=0) - timedelta(days=3)
+
+    def answer(self, count, seed=0):
+        """`count` answers spread over three days, recorded as they would arrive."""
+        rng = random.Random(seed)
+        practices = []
+        for _ in range(count):
+            question = rng.choice(self.questions)
+            choice = rng.choice(list(question.choices.all()))
+            practices.append(Practice(
+                user=rng.choice(self.users), question=question, selected_choice=choice, is_correct=choice.is_correct
+            ))
+        Practice.objects.bulk_create(practices)
+        for practice in practices:
+            practice.created_at = self.start + timedelta(minutes=rng.randrange(3 * 24 * 60))
+        Practice.objects.bulk_update(practices, ['created_at'])
+        return practices
+
+    def rollups(self):
+        return (
+            set(DailyActivity.objects.values_list('day', 'difficulty', 'attempts', 'correct', 'active_users')),
+            set(HourlyActivity.objects.values_list('hour', 'difficulty', 'attempts', 'correct')),
+            set(DailyActiveUser.objects.values_list('day', 'difficulty', 'user_id')),
+        )
+
+    def assert_matches_rebuild(self):
+        incremental = self.rollups()
+        list(rebuild_rollups(first_activity_day(), timezone.localdate(), chunk_days=2))
+        self.assertEqual(incremental, self.rollups())
+
+    def total_attempts(self):
+        return sum(DailyActivity.objects.filter(difficulty=ALL).values_list('attempts', flat=True))
+
+    def test_incremental_batches_match_a_rebuild(self):
+        for seed in range(3):
+            self.answer(40, seed)
+            update_rollups(batch_size=15)
+
+        self.assertEqual(self.total_attempts(), 120)
+        self.assertFalse(Practice.objects.filter(rolled_up=False).exists())
+        self.assert_matches_rebuild()
+
+    def test_updates_count_each_answer_once(self):
+        self.answer(30)
+
+        self.assertEqual(update_rollups(), 30)
+        self.assertEqual(update_rollups(), 0)
+        self.assertEqual(self.total_attempts(), 30)
+
+    def test_a_rebuild_before_the_update_leaves_pending_answers_to_it(self):
+        update_rollups()
+        counted = self.answer(40, seed=1)
+        update_rollups()
+        pending = self.answer(40, seed=2)
+
+        # The rebuild replaces the rows the pending update will add to.
+        for day in {timezone.localtime(practice.created_at).date() for practice in counted + pending}:
+            self.assertEqual(rebuild_days(day, day + timedelta(days=1)), sum(
+                timezone.localtime(practice.created_at).date() == day for practice in counted
+            ))
+        self.assertEqual(self.total_attempts(), 40)
+        self.assertEqual(update_rollups(), 40)
+
+        self.assertEqual(self.total_attempts(), 80)
+        self.assert_matches_rebuild()
+
+    def test_archiving_waits_for_the_update(self):
+        self.answer(20)
+        self.assertEqual(list(archive_practice(timezone.now())), [])
+
+        update_rollups()
+        # A late row older than the counted ones holds them back too, so the
+        # archive never gets ahead of the hot table.
+        late = self.answer(1, seed=1)[0]
+        Practice.objects.filter(pk=late.pk).update(created_at=self.start - timedelta(hours=1))
+        self.assertEqual(list(archive_practice(timezone.now())), [])
+        update_rollups()
+
+        self.assertEqual(list(archive_practice(timezone.now())), [21])
+
+    def test_archived_answers_are_counted_by_the_rebuild(self):
+        self.answer(60)
+        update_rollups()
+        list(archive_practice(self.start + timedelta(days=1, hours=12)))
+
+        self.assert_matches_rebuild()
+
+    @override_settings(TIME_ZONE='Asia/Kolkata')
+    def test_days_and_hours_follow_the_time_zone(self):
+        self.answer(60)
+        update_rollups()
+
+        self.assert_matches_rebuild()
+
+    def test_answers_submitted_through_the_api_are_rolled_up(self):
+        client = APIClient()
+        client.force_authenticate(self.users[0])
+        question = self.questions[0]
+        for choice in (correct_choice(question), wrong_choice(question)):
+            with self.captureOnCommitCallbacks(execute=True):
+                client.post(
+                    f'/api/v1/quizzes/questions/{question.pk}/submit/', {'choice_id': choice.pk}, format='json'
+                )
+        self.assertEqual(DailyActivity.objects.count(), 0)
+
+        # One update, due once the burst is over, counts both answers.
+        task = Task.objects.get(name='quiz.update_activity_rollups')
+        self.assertGreater(task.run_after, timezone.now())
+        Task.objects.update(run_after=timezone.now())
+        self.assertEqual(Worker(batch_size=10).run(burst=True), 1)
+
+        today = timezone.localdate()
+        series = activity_series(today - timedelta(days=1), today)
+
+        self.assertEqual(series, [
+            {'day': today - timedelta(days=1), 'attempts': 0, 'correct': 0, 'active_users': 0, 'correct_rate': None},
+            {'day': today, 'attempts': 2, 'correct': 1, 'active_users': 1, 'correct_rate': 0.5},
+        ])
+        self.assert_matches_rebuild()
+
+
+class RatingTests(TestCase):
+    """Ratings updated as answers arrive equal a replay of the history."""
+
+    def setUp(self):
+        self.users = [
+            User.objects.create_user(f'student{i}', f'student{i}@example.com', 'password') for i in range(4)
+        ]
+        self.questions = [create_question(f'question {i}') for i in range(5)]
+
+    def record(self, count, batch_size, seed=0):
+        """`count` random answers, sent through `practices_recorded` `batch_size` at a time."""
+        rng = random.Random(seed)
+        for start in range(0, count, batch_size):
+            practices = []
+            for _ in range(min(batch_size, count - start)):
+                question = rng.choice(self.questions)
+                choice = rng.choice(list(question.choices.all()))
+                practices.append(Practice.objects.create(
+                    user=rng.choice(self.users), question=question, selected_choice=choice,
+                    is_correct=choice.is_correct
+                ))
+            practices_recorded.send(sender=Practice, practices=practices)
+
+    def ratings(self):
+        return (
+            dict(UserSkill.objects.values_list('user_id', 'rating')),
+            dict(UserSkill.objects.values_list('user_id', 'rated_answers')),
+            dict(Question.all_objects.values_list('id', 'rating')),
+            dict(Question.all_objects.values_list('id', 'rated_answers')),
+        )
+
+    def assert_ratings_equal(self, first, second):
+        for online, replayed in zip(first, second):
+            self.assertEqual(online.keys(), replayed.keys())
+            for key, value in online.items():
+                self.assertAlmostEqual(value, replayed[key], places=6)
+
+    def test_online_updates_match_a_recompute(self):
+        self.record(30, batch_size=1)
+        self.record(45, batch_size=7, seed=1)
+        online = self.ratings()
+
+        call_command('recompute_ratings', stdout=StringIO())
+
+        self.assertEqual(sum(online[1].values()), 75)
+        self.assert_ratings_equal(online, self.ratings())
+
+    def test_recompute_resets_drifted_ratings(self):
+        self.record(20, batch_size=3)
+        online = self.ratings()
+        Question.all_objects.update(rating=DEFAULT_RATING, rated_answers=0)
+        UserSkill.objects.update(rating=0.0)
+
+        call_command('recompute_ratings', stdout=StringIO())
+
+        self.assert_ratings_equal(online, self.ratings())
+
+    def test_k_factor_decays_from_k_max_towards_k_min(self):
+        factors = [k_factor(answers) for answers in range(1000)]
+
+        self.assertEqual(factors[0], K_MAX)
+        self.assertEqual(k_factor(K_HALF_LIFE), (K_MAX + K_MIN) / 2)
+        self.assertTrue(all(earlier > later for earlier, later in zip(factors, factors[1:])))
+        self.assertGreater(factors[-1], K_MIN)
+        self.assertLess(factors[-1] - K_MIN, 1)
+
+    def test_ratings_of_experienced_users_move_less(self):
+        question = self.questions[0]
+        steps = []
+        for rated_answers in (0, 200):
+            UserSkill.objects.update_or_create(
+                user=self.users[0], defaults={'rating': DEFAULT_RATING, 'rated_answers': rated_answers}
+            )
+            Question.all_objects.filter(pk=question.pk).update(rating=DEFAULT_RATING, rated_answers=0)
+            practice = Practice.objects.create(
+                user=self.users[0], question=question, selected_choice=correct_choice(question), is_correct=True
+            )
+            practices_recorded.send(sender=Practice, practices=[practice])
+            steps.append(UserSkill.objects.get(user=self.users[0]).rating - DEFAULT_RATING)
+
+        # An even match expects half a point; the correct answer scores one.
+        self.assertAlmostEqual(steps[0], K_MAX / 2)
+        self.assertAlmostEqual(steps[1], k_factor(200) / 2)
+
+    def test_recommendations_stay_within_the_window_closest_first(self):
+        offsets = [-250, -150, -40, 0, 30, 120, 199, 201]
+        questions = [create_question(f'rated {offset}') for offset in offsets]
+        for question, offset in zip(questions, offsets):
+            Question.all_objects.filter(pk=question.pk).update(rating=1000.0 + offset)
+        Question.all_objects.filter(pk__in=[question.pk for question in self.questions]).update(rating=2500.0)
+        schedule_deletion(questions[4])
+
+        recommended = recommend_questions(1000.0, limit=10, window=200.0)
+
+        self.assertEqual([question.rating - 1000.0 for question in recommended], [0, -40, 120, -150, 199])
+        self.assertEqual(
+            [question.rating - 1000.0 for question in recommend_questions(1000.0, limit=3, window=200.0)],
+            [0, -40, 120]
+        )
+        self.assertEqual(recommend_questions(1000.0, limit=10, window=20.0)[0].rating, 1000.0)
+        self.assertEqual(len(recommend_questions(1000.0, limit=10, window=20.0)), 1)
+
+
+@override_settings(QUIZBIT_LIVE_FLUSH_SIZE=3, QUIZBIT_LIVE_FLUSH_INTERVAL=60)
+class LiveQuizTests(TestCase):
+    """Live answers are graded in memory, accepted once and written in batches."""
+
+    def setUp(self):
+        cache.clear()
+        self.host = User.objects.create_user('host', 'host@example.com', 'password')
+        self.students = [
+            User.objects.create_user(f'student{i}', f'student{i}@example.com', 'password') for i in range(3)
+        ]
+        self.question = create_question('live question')
+        self.right, self.wrong = correct_choice(self.question).pk, wrong_choice(self.question).pk
+        self.code = create_live_session(self.host).code
+        self.buffer = PracticeBuffer()
+        patcher = mock.patch('Quiz.consumers.practice_buffer', self.buffer)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.application = JWTAuthMiddleware(URLRouter(websocket_urlpatterns))
+
+    async def connect(self, user):
+        socket = WebsocketCommunicator(
+            self.application, f'/ws/live/{self.code}/',
+            subprotocols=[AUTH_SUBPROTOCOL, str(AccessToken.for_user(user))]
+        )
+        connected, _ = await socket.connect()
+        self.assertTrue(connected)
+        return socket
+
+    async def ask(self, students):
+        """Connect the host and `students` and show them the question."""
+        host = await self.connect(self.host)
+        sockets = [await self.connect(student) for student in students]
+        await host.send_json_to({'action': 'next', 'question_id': self.question.pk})
+        for socket in [host, *sockets]:
+            self.assertEqual((await socket.receive_json_from())['type'], 'question')
+        return host, sockets
+
+    async def answer(self, socket, choice_id):
+        await socket.send_json_to({'action': 'answer', 'question_id': self.question.pk, 'choice_id': choice_id})
+        return await socket.receive_json_from()
+
+    async def finish(self, *sockets):
+        for socket in sockets:
+            await socket.disconnect()
+        if self.buffer._timer is not None:
+            self.buffer._timer.cancel()
+
+    def add_practice(self, user):
+        return self.buffer.add(self.code, Practice(
+            user=user, question=self.question, selected_choice_id=self.right, is_correct=True
+        ))
+
+    async def stored(self):
+        return await database_sync_to_async(Practice.objects.count)()
+
+    async def test_answers_are_graded_from_the_answer_key(self):
+        host, (first, second) = await self.ask(self.students[:2])
+
+        wrong = await self.answer(first, self.wrong)
+        right = await self.answer(second, self.right)
+        invalid = await self.answer(second, self.right + self.wrong + 1000)
+
+        self.assertEqual(wrong, {
+            'type': 'result', 'question_id': self.question.pk, 'choice_id': self.wrong, 'is_correct': False
+        })
+        self.assertTrue(right['is_correct'])
+        self.assertEqual(invalid, {'type': 'error', 'error': 'Invalid choice for this question'})
+        await self.finish(host, first, second)
+
+    async def test_a_question_is_answered_once_across_sockets(self):
+        host, (first,) = await self.ask(self.students[:1])
+        await self.answer(first, self.wrong)
+        again = await self.connect(self.students[0])
+        self.assertEqual((await again.receive_json_from())['type'], 'question')
+
+        replies = [await self.answer(first, self.right), await self.answer(again, self.right)]
+
+        self.assertEqual(replies, [{'type': 'error', 'error': 'You already answered this question'}] * 2)
+        self.assertEqual(len(self.buffer.pending), 1)
+        await self.finish(host, first, again)
+
+    async def test_answers_are_written_in_batches(self):
+        host, sockets = await self.ask(self.students)
+
+        for socket in sockets[:2]:
+            await self.answer(socket, self.right)
+        self.assertEqual(await self.stored(), 0)
+        await self.answer(sockets[2], self.right)
+
+        self.assertEqual(await self.stored(), 3)
+        self.assertEqual(self.buffer.pending, [])
+        await self.finish(host, *sockets)
+
+    async def test_closing_the_session_writes_buffered_answers(self):
+        host, (student,) = await self.ask(self.students[:1])
+        await self.answer(student, self.right)
+
+        await host.send_json_to({'action': 'close'})
+
+        self.assertEqual((await student.receive_json_from())['type'], 'closed')
+        self.assertEqual(await self.stored(), 1)
+        await self.finish(host, student)
+
+    async def test_a_failed_write_is_retried(self):
+        await self.add_practice(self.students[0])
+
+        with mock.patch('Quiz.live.store_practices', side_effect=RuntimeError('database down')):
+            with self.assertLogs('Quiz.live', 'ERROR'):
+                self.assertEqual(await self.buffer.flush(), 0)
+        self.assertEqual(len(self.buffer.pending), 1)
+        self.assertFalse(self.buffer._timer.done())
+
+        self.assertEqual(await self.buffer.flush(), 1)
+        self.assertEqual(await self.stored(), 1)
+        await self.finish()
+
+    async def test_answers_are_released_after_repeated_failures(self):
+        user = self.students[0]
+        self.assertTrue(await claim_answer(self.code, user.pk, self.question.pk))
+        await self.add_practice(user)
+
+        with mock.patch('Quiz.live.store_practices', side_effect=RuntimeError('bad row')):
+            with self.assertLogs('Quiz.live', 'ERROR'):
+                for _ in range(MAX_FLUSH_ATTEMPTS):
+                    await self.buffer.flush()
+
+        self.assertEqual(self.buffer.pending, [])
+        self.assertTrue(await claim_answer(self.code, user.pk, self.question.pk))
+        await self.finish()
+
+    def test_buffered_answers_are_written_at_exit(self):
+        self.buffer.pending = [(self.code, Practice(
+            user=self.students[0], question=self.question, selected_choice_id=self.right, is_correct=True
+        ))]
+
+        self.buffer.close()
+
+        self.assertEqual(Practice.objects.count(), 1)
+        self.assertEqual(self.buffer.pending, [])
+
+
+class PracticeHistoryTests(TestCase):
+    """History pages continue seamlessly from the hot table into the archive."""
+
+    def setUp(self):
+        self.user = User.objects.create_user('student', 'student@example.com', 'password')
+        other = User.objects.create_user('other', 'other@example.com', 'password')
+        question = create_question('history question')
+        choices = list(question.choices.all())
+        self.start = timezone.now().replace(microsecond=0) - timedelta(days=30)
+        # Ten moments with one to three answers each, often sharing a timestamp.
+        practices = []
+        for moment in range(10):
+            for n in range(moment % 3 + 1):
+                for user in (self.user, other):
+                    choice = choices[(moment + n) % len(choices)]
+                    practices.append(Practice(
+                        user=user, question=question, selected_choice=choice, is_correct=choice.is_correct,
+                        rolled_up=True
+                    ))
+        Practice.objects.bulk_create(practices)
+        for practice, moment in zip(
+            Practice.objects.order_by('id'),
+            [moment for moment in range(10) for _ in range(moment % 3 + 1) for _ in range(2)]
+        ):
+            practice.created_at = self.start + timedelta(hours=moment)
+            practice.save(update_fields=['created_at'])
+        self.expected = list(
+            Practice.objects.filter(user=self.user).order_by('-created_at', '-id').values_list('id', flat=True)
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def page_through(self, limit):
+        """Ids of every page of the history, `limit` at a time, following the cursor."""
+        pages, params = [], {'limit': limit}
+        while True:
+            response = self.client.get('/api/v1/quizzes/practice-history/', params)
+            self.assertEqual(response.status_code, 200)
+            if not response.data:
+                return pages
+            pages.append([row['id'] for row in response.data])
+            params = {'limit': limit, 'before': response.data[-1]['created_at'], 'before_id': response.data[-1]['id']}
+
+    def test_archive_chunk_moves_the_oldest_rows_unchanged(self):
+        oldest = list(Practice.objects.order_by('created_at', 'id').values(*ARCHIVED_FIELDS)[:4])
+
+        self.assertEqual(archive_chunk(self.start + timedelta(hours=5), chunk_size=4), 4)
+
+        self.assertEqual(list(PracticeArchive.objects.order_by('created_at', 'id').values(*ARCHIVED_FIELDS)), oldest)
+        self.assertFalse(Practice.objects.filter(pk__in=[row['id'] for row in oldest]).exists())
+
+    def test_archive_chunk_stops_at_the_cutoff(self):
+        cutoff = self.start + timedelta(hours=2)
+        before_cutoff = Practice.objects.filter(created_at__lt=cutoff).count()
+
+        self.assertEqual(archive_chunk(cutoff, chunk_size=100), before_cutoff)
+        self.assertEqual(archive_chunk(cutoff, chunk_size=100), 0)
+        self.assertFalse(PracticeArchive.objects.filter(created_at__gte=cutoff).exists())
+        self.assertEqual(list(archive_practice(timezone.now(), chunk_size=10, max_chunks=2)), [10, 20])
+
+    def test_pages_cross_the_archive_boundary(self):
+        list(archive_practice(self.start + timedelta(hours=6), chunk_size=5))
+        self.assertTrue(PracticeArchive.objects.filter(user=self.user).exists())
+
+        for limit in (1, 3, 4, 100):
+            pages = self.page_through(limit)
+            self.assertEqual([row_id for page in pages for row_id in page], self.expected)
+
+    def test_ties_split_between_the_tables_are_paged_in_order(self):
+        # Chunks of five split the rows sharing a timestamp between the tables.
+        archive_chunk(self.start + timedelta(hours=9), chunk_size=5)
+        boundary = PracticeArchive.objects.order_by('-created_at', '-id').first()
+        self.assertTrue(Practice.objects.filter(created_at=boundary.created_at).exists())
+
+        pages = self.page_through(2)
+
+        self.assertEqual([row_id for page in pages for row_id in page], self.expected)
+
+    def test_only_the_users_history_is_returned(self):
+        list(archive_practice(timezone.now()))
+
+        response = self.client.get('/api/v1/quizzes/practice-history/')
+
+        self.assertEqual([row['id'] for row in response.data], self.expected)
+
+
+@override_settings(QUIZBIT_FAST_SERIALIZATION=False)
+class SerializedPracticeHistoryTests(PracticeHistoryTests):
+    """The same pages through PracticeHistorySerializer."""
+
+
+class DeletionTests(TestCase):
+    """Deletions hide the object at once and remove its rows in background batches."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('student', 'student@example.com', 'password')
+        self.other = User.objects.create_user('other', 'other@example.com', 'password')
+        self.question = create_question('doomed question')
+        self.kept = create_question('kept question')
+        for user in (self.user, self.other):
+            for question in (self.question, self.kept):
+                for choice in question.choices.all():
+                    Practice.objects.create(
+                        user=user, question=question, selected_choice=choice, is_correct=choice.is_correct
+                    )
+        for practice in Practice.objects.filter(user=self.user)[:2]:
+            PracticeArchive.objects.create(
+                id=practice.pk + 1000, user=practice.user, question=practice.question,
+                selected_choice=practice.selected_choice, is_correct=practice.is_correct,
+                created_at=practice.created_at
+            )
+        create_exam_session(self.user, 1, timedelta(minutes=10))
+        DailyActiveUser.objects.create(day=timezone.localdate(), difficulty=ALL, user=self.user)
+
+    def test_soft_deleted_objects_leave_the_default_managers(self):
+        choice = wrong_choice(self.kept)
+        schedule_deletion(self.question)
+        schedule_deletion(choice)
+        schedule_deletion(self.user)
+
+        self.assertFalse(Question.objects.filter(pk=self.question.pk).exists())
+        self.assertTrue(Question.all_objects.filter(pk=self.question.pk).exists())
+        self.assertFalse(Choice.objects.filter(pk=choice.pk).exists())
+        self.assertTrue(Choice.all_objects.filter(pk=choice.pk).exists())
+        self.assertFalse(User.objects.get(pk=self.user.pk).is_active)
+        # Rows are only removed by the job.
+        self.assertEqual(Practice.objects.filter(question=self.question).count(), 6)
+
+        client = APIClient()
+        client.force_authenticate(self.other)
+        self.assertEqual(client.get(f'/api/v1/quizzes/questions/{self.question.pk}/').status_code, 404)
+
+    def test_deleting_twice_keeps_one_job(self):
+        first = schedule_deletion(self.question)
+        second = schedule_deletion(Question.all_objects.get(pk=self.question.pk))
+
+        self.assertEqual(first.pk, second.pk)
+        self.assertEqual(DeletionJob.objects.count(), 1)
+        self.assertEqual(Task.objects.filter(name='quiz.run_deletion_job').count(), 1)
+
+    def test_a_finished_deletion_can_be_scheduled_again(self):
+        job = schedule_deletion(self.user)
+        DeletionJob.objects.filter(pk=job.pk).update(status=DeletionJob.Status.DONE)
+
+        self.assertNotEqual(schedule_deletion(self.user).pk, job.pk)
+
+    def test_a_job_whose_lease_expired_is_reclaimed(self):
+        job = schedule_deletion(self.question)
+        self.assertTrue(claim_deletion_job(job))
+        self.assertFalse(claim_deletion_job(job))
+        self.assertEqual(run_pending_deletion_jobs(), 0)
+
+        expired = timezone.now() - timedelta(seconds=settings.QUIZBIT_DELETION_LEASE + 1)
+        DeletionJob.objects.filter(pk=job.pk).update(heartbeat_at=expired)
+
+        self.assertEqual(run_pending_deletion_jobs(), 1)
+        job.refresh_from_db()
+        self.assertEqual(job.status, DeletionJob.Status.DONE)
+        self.assertFalse(Question.all_objects.filter(pk=self.question.pk).exists())
+
+    def test_a_failed_job_resumes_where_it_stopped(self):
+        job = schedule_deletion(self.user)
+        claim_deletion_job(job)
+
+        def fail_on_the_archive(queryset, batch_size):
+            if queryset.model is PracticeArchive:
+                raise RuntimeError('connection lost')
+            yield from delete_in_batches(queryset, batch_size)
+
+        with mock.patch('Quiz.deletion.delete_in_batches', fail_on_the_archive):
+            with self.assertRaises(RuntimeError):
+                run_deletion_job(job, batch_size=2)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.rows_deleted), (DeletionJob.Status.FAILED, 6))
+        self.assertIn('connection lost', job.last_error)
+        self.assertEqual(PracticeArchive.objects.filter(user=self.user).count(), 2)
+
+        Worker(batch_size=10).run(burst=True)
+
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.rows_deleted), (DeletionJob.Status.DONE, job.rows_total))
+        self.assertFalse(User.objects.filter(pk=self.user.pk).exists())
+
+    def test_jobs_remove_every_dependent_row(self):
+        user_job = schedule_deletion(self.user)
+        question_job = schedule_deletion(self.question)
+        self.assertEqual(user_job.rows_total, 6 + 2 + 1 + 1)
+
+        self.assertEqual(Worker(batch_size=10).run(burst=True), 2)
+
+        for job in (user_job, question_job):
+            job.refresh_from_db()
+            self.assertEqual(job.status, DeletionJob.Status.DONE)
+            self.assertIsNotNone(job.finished_at)
+        self.assertEqual(user_job.rows_deleted, user_job.rows_total)
+        self.assertFalse(User.objects.filter(pk=self.user.pk).exists())
+        self.assertFalse(Question.all_objects.filter(pk=self.question.pk).exists())
+        self.assertFalse(Choice.all_objects.filter(question_id=self.question.pk).exists())
+        for model in (Practice, PracticeArchive, ExamSession, DailyActiveUser):
+            self.assertFalse(model.objects.filter(user_id=self.user.pk).exists())
+        self.assertFalse(Practice.objects.filter(question_id=self.question.pk).exists())
+        # Answers of other users on other questions stay.
+        self.assertEqual(Practice.objects.filter(user=self.other, question=self.kept).count(), 3)
+
+
+class DeletionAdminTests(TestCase):
+    """The admin schedules background deletions instead of cascading."""
+
+    def setUp(self):
+        self.admin = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        self.question = create_question('admin question')
+        Practice.objects.create(
+            user=self.admin, question=self.question, selected_choice=correct_choice(self.question), is_correct=True
+        )
+        self.client.force_login(self.admin)
+
+    def test_deleting_from_the_change_page_schedules_a_job(self):
+        url = f'/admin/Quiz/question/{self.question.pk}/delete/'
+
+        with CaptureQueriesContext(connection) as queries:
+            confirmation = self.client.get(url)
+        response = self.client.post(url, {'post': 'yes'})
+
+        self.assertEqual(confirmation.status_code, 200)
+        # The confirmation page does not collect the cascaded rows.
+        self.assertFalse([query for query in queries if 'quiz_practice' in query['sql'].lower()])
+        self.assertContains(confirmation, 'admin question')
+        self.assertEqual(response.status_code, 302)
+        self.assertTrue(Question.all_objects.get(pk=self.question.pk).deleted_at)
+        self.assertTrue(Practice.objects.filter(question=self.question).exists())
+        self.assertEqual(DeletionJob.objects.get().object_id, self.question.pk)
+
+    def test_the_delete_action_schedules_one_job_per_object(self):
+        other = create_question('second admin question')
+        selected = [self.question.pk, other.pk]
+
+        self.client.post('/admin/Quiz/question/', {
+            'action': 'delete_selected', '_selected_action': selected, 'post': 'yes'
+        })
+        self.client.post('/admin/Quiz/question/', {
+            'action': 'delete_selected', '_selected_action': selected, 'post': 'yes'
+        })
+
+        self.assertEqual(sorted(DeletionJob.objects.values_list('object_id', flat=True)), sorted(selected))
+        self.assertFalse(Question.objects.filter(pk__in=selected).exists())
+
+    def test_missing_permissions_on_cascaded_rows_block_the_deletion(self):
+        staff = User.objects.create_user('staff', 'staff@example.com', 'password', is_staff=True)
+        staff.user_permissions.add(*Permission.objects.filter(
+            content_type__app_label='Quiz', codename__in=['view_question', 'delete_question', 'view_practice']
+        ))
+        self.client.force_login(staff)
+
+        response = self.client.get(f'/admin/Quiz/question/{self.question.pk}/delete/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('practice', response.context['perms_lacking'])
+        self.client.post(f'/admin/Quiz/question/{self.question.pk}/delete/', {'post': 'yes'})
+        self.assertFalse(DeletionJob.objects.exists())
+
+
+class SimilarityTests(TestCase):
+    """The MinHash index finds near-duplicate questions and follows edits."""
+    TEXT = 'Which planet of the solar system is known as the red planet because of its iron oxide surface?'
+
+    def create(self, text, choices=('Mars', 'Venus', 'Jupiter', 'Saturn')):
+        """A question and its choices, saved in one transaction as the admin and imports do."""
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                question = Question.objects.create(text=text)
+                for i, choice in enumerate(choices):
+                    Choice.objects.create(question=question, text=choice, is_correct=i == 0)
+        return question
+
+    def test_near_duplicates_are_found(self):
+        original = self.create(self.TEXT)
+        reworded = self.create(self.TEXT.replace('known as', 'called'))
+        self.create('What is the boiling point of water at sea level in degrees Celsius?', ('100', '90', '80'))
+
+        matches = find_near_duplicates(original)
+
+        self.assertEqual([question_id for question_id, _ in matches], [reworded.pk])
+        self.assertGreater(matches[0][1], 0.7)
+
+    def test_unsaved_text_is_compared_with_the_index(self):
+        original = self.create(self.TEXT, choices=())
+
+        self.assertEqual(find_near_duplicates_of_text(self.TEXT.upper() + '!!'), [(original.pk, 1.0)])
+        self.assertEqual(find_near_duplicates_of_text('How many legs does a spider have?'), [])
+
+    def test_the_admin_warns_about_similar_new_questions(self):
+        original = self.create(self.TEXT, choices=())
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'password'))
+
+        response = self.client.post(
+            '/admin/Quiz/question/add/', {'text': self.TEXT, 'difficulty': Question.Difficulty.EASY}, follow=True
+        )
+
+        self.assertContains(response, 'Similar questions already exist')
+        self.assertContains(response, f'Question {original.pk}</a> (100% similar)')
+        self.assertEqual(Question.objects.filter(text=self.TEXT).count(), 2)
+
+    def test_edits_and_deletions_update_the_index(self):
+        question = self.create(self.TEXT)
+        before = bytes(QuestionSignature.objects.get(question=question).signature)
+        choice = question.choices.get(text='Venus')
+        choice.text = 'The second planet from the sun, wrapped in thick clouds of sulphuric acid'
+        with self.captureOnCommitCallbacks(execute=True):
+            choice.save()
+
+        after = bytes(QuestionSignature.objects.get(question=question).signature)
+        self.assertNotEqual(after, before)
+        self.assertEqual(after, pack_signature(question_signature(question)))
+        self.assertEqual(QuestionBucket.objects.filter(question=question).count(), BANDS)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            schedule_deletion(question)
+
+        self.assertFalse(QuestionSignature.objects.filter(question=question).exists())
+        self.assertFalse(QuestionBucket.objects.filter(question=question).exists())
+
+    def test_a_question_saved_with_its_choices_is_indexed_once(self):
+        with mock.patch('Quiz.similarity.index_question', wraps=index_question) as indexed:
+            first = self.create(self.TEXT)
+            second = self.create(self.TEXT + ' Pick one.')
+
+        self.assertEqual(sorted(call.args[0] for call in indexed.call_args_list), [first.pk, second.pk])
+
+    def test_a_rolled_back_reindex_runs_on_the_next_commit(self):
+        question = self.create(self.TEXT)
+        with self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    Question.objects.filter(pk=question.pk).update(text='Name the red planet.')
+                    Question.objects.get(pk=question.pk).save()
+                    raise RuntimeError('rolled back')
+            except RuntimeError:
+                pass
+            question.text = 'Name the fourth planet from the sun, also called the red planet.'
+            question.save()
+
+        question.refresh_from_db()
+        self.assertEqual(
+            bytes(QuestionSignature.objects.get(question=question).signature),
+            pack_signature(question_signature(question))
+        )
+
+    def test_candidates_sharing_the_most_bands_are_compared_first(self):
+        signature = question_signature(self.create(self.TEXT))
+        weak, strong = self.create('weak candidate', ()), self.create('strong candidate', ())
+        QuestionSignature.objects.filter(question__in=[weak, strong]).update(signature=pack_signature(signature))
+        QuestionBucket.objects.filter(question__in=[weak, strong]).delete()
+        buckets = band_buckets(signature)
+        QuestionBucket.objects.bulk_create(
+            [QuestionBucket(question=weak, band=band, bucket=bucket) for band, bucket in buckets[:1]]
+            + [QuestionBucket(question=strong, band=band, bucket=bucket) for band, bucket in buckets]
+        )
+
+        with mock.patch('Quiz.similarity.MAX_CANDIDATES', 2):
+            matches = find_similar(signature)
+
+        self.assertEqual(len(matches), 2)
+        self.assertNotIn(weak.pk, [question_id for question_id, _ in matches])
+
+
+class ConditionalGetTests(TestCase):
+    """Question endpoints answer conditional requests with 304 and stay private to the user."""
+
+    def setUp(self):
+        cache.clear()
+        self.question = create_question('cached question')
+        # Edits made in the same second must still move Last-Modified.
+        Question.objects.filter(pk=self.question.pk).update(updated_at=timezone.now() - timedelta(minutes=1))
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user('student', 'student@example.com', 'password'))
+        self.detail_url = f'/api/v1/quizzes/questions/{self.question.pk}/'
+
+    def test_responses_carry_validators_and_private_caching_headers(self):
+        for url, max_age in ((self.detail_url, 300), ('/api/v1/quizzes/questions/', 60)):
+            response = self.client.get(url)
+
+            self.assertEqual(response.status_code, 200)
+            self.assertTrue(response.headers['ETag'])
+            self.assertTrue(response.headers['Last-Modified'])
+            self.assertEqual(
+                sorted(response.headers['Cache-Control'].split(', ')), [f'max-age={max_age}', 'private']
+            )
+            self.assertIn('Authorization', response.headers['Vary'])
+
+    def test_a_matching_etag_gets_304(self):
+        for url in (self.detail_url, '/api/v1/quizzes/questions/?difficulty=easy'):
+            etag = self.client.get(url).headers['ETag']
+
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+            self.assertEqual(response.status_code, 304)
+            self.assertEqual(response.content, b'')
+            self.assertEqual(response.headers['ETag'], etag)
+            self.assertIn('private', response.headers['Cache-Control'])
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH='"stale"').status_code, 200)
+
+    def test_if_modified_since_gets_304_until_the_question_changes(self):
+        last_modified = self.client.get(self.detail_url).headers['Last-Modified']
+
+        self.assertEqual(self.client.get(self.detail_url, HTTP_IF_MODIFIED_SINCE=last_modified).status_code, 304)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.question.text = 'edited question'
+            self.question.save()
+        response = self.client.get(self.detail_url, HTTP_IF_MODIFIED_SINCE=last_modified)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['text'], 'edited question')
+
+    def test_editing_a_choice_changes_the_etag(self):
+        etag = self.client.get(self.detail_url).headers['ETag']
+        list_etag = self.client.get('/api/v1/quizzes/questions/').headers['ETag']
+
+        choice = wrong_choice(self.question)
+        choice.text = 'edited choice'
+        with self.captureOnCommitCallbacks(execute=True):
+            choice.save()
+        response = self.client.get(self.detail_url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.headers['ETag'], etag)
+        self.assertIn('edited choice', [choice['text'] for choice in response.data['choices']])
+        self.assertNotEqual(self.client.get('/api/v1/quizzes/questions/').headers['ETag'], list_etag)
+
+    def test_deleting_a_question_changes_the_list_etag(self):
+        other = create_question('second question')
+        # Older than the remaining question, so only the count can change the ETag.
+        Question.objects.filter(pk=other.pk).update(updated_at=timezone.now() - timedelta(minutes=2))
+        etag = self.client.get('/api/v1/quizzes/questions/').headers['ETag']
+
+        with self.captureOnCommitCallbacks(execute=True):
+            schedule_deletion(other)
+
+        self.assertEqual(self.client.get('/api/v1/quizzes/questions/', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+
+class QuestionBankTests(TestCase):
+    """Bank files serve questions by id and are rebuilt block by block."""
+
+    def setUp(self):
+        cache.clear()
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        settings_override = override_settings(QUIZBIT_BANK_DIR=directory)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        difficulties = Question.Difficulty.values
+        questions = Question.objects.bulk_create([
+            Question(text=f'Question {i}', difficulty=difficulties[i % len(difficulties)])
+            for i in range(2 * BLOCK_ROWS + 50)
+        ])
+        Choice.objects.bulk_create([
+            Choice(question=question, text=f'{question.text} choice {j}', is_correct=j == 0)
+            for question in questions for j in range(3)
+        ])
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user('student', 'student@example.com', 'password'))
+
+    def assert_bank_matches_database(self, name):
+        questions = Question.objects.order_by('id')
+        if name != ALL:
+            questions = questions.filter(difficulty=name)
+        expected = serialize_question_detail_rows(questions)
+        with BankFile(bank_path(name)) as bank:
+            stored = list(bank)
+        for question in stored:
+            question['created_at'] = DateTimeField().to_representation(question['created_at'])
+        self.assertEqual(stored, expected)
+
+    def test_every_bank_holds_its_questions(self):
+        for name in [ALL, *Question.Difficulty.values]:
+            self.assertTrue(build_bank(name)['written'])
+            self.assert_bank_matches_database(name)
+
+    def test_questions_are_looked_up_by_id(self):
+        build_bank(ALL)
+        question = Question.objects.order_by('?').first()
+
+        with BankFile(bank_path(ALL)) as bank:
+            stored = bank.get(question.pk)
+            self.assertNotIn(0, bank)
+            with self.assertRaises(KeyError):
+                bank.get(0)
+
+        self.assertEqual(stored['text'], question.text)
+        self.assertEqual(stored['created_at'], question.created_at)
+        self.assertEqual(
+            stored['choices'], [{'id': choice.pk, 'text': choice.text} for choice in question.choices.order_by('id')]
+        )
+
+    def test_an_unchanged_bank_is_not_rewritten(self):
+        build_bank(ALL)
+
+        self.assertEqual(
+            build_bank(ALL), {'questions': 2 * BLOCK_ROWS + 50, 'blocks': 3, 'rebuilt': 0, 'written': False}
+        )
+
+    def test_an_edit_recompresses_one_block(self):
+        build_bank(ALL)
+        question = Question.objects.order_by('id')[BLOCK_ROWS + 5]
+        question.text = 'Edited'
+        question.save()
+
+        stats = build_bank(ALL)
+
+        self.assertEqual((stats['blocks'], stats['rebuilt'], stats['written']), (3, 1, True))
+        self.assert_bank_matches_database(ALL)
+
+    def test_an_edit_committed_after_a_newer_one_is_picked_up(self):
+        first, second = Question.objects.order_by('id')[:2]
+        saved_at = timezone.now()
+        # Edit B, saved after edit A but committed first, is in the file...
+        Question.objects.filter(pk=second.pk).update(text='Edit B', updated_at=saved_at)
+        build_bank(ALL)
+        # ...then edit A commits, with an older updated_at than B's.
+        Question.objects.filter(pk=first.pk).update(text='Edit A', updated_at=saved_at - timedelta(seconds=1))
+
+        stats = build_bank(ALL)
+
+        self.assertEqual(stats['rebuilt'], 1)
+        with BankFile(bank_path(ALL)) as bank:
+            self.assertEqual(bank.get(first.pk)['text'], 'Edit A')
+        self.assert_bank_matches_database(ALL)
+
+    def test_deleted_and_new_questions_are_picked_up(self):
+        build_bank(ALL)
+        deleted = Question.objects.order_by('id').first()
+        schedule_deletion(deleted)
+        added = create_question('Added later')
+
+        stats = build_bank(ALL)
+
+        self.assertEqual(stats['rebuilt'], 2)
+        with BankFile(bank_path(ALL)) as bank:
+            self.assertNotIn(deleted.pk, bank)
+            self.assertEqual(bank.get(added.pk)['text'], 'Added later')
+        self.assert_bank_matches_database(ALL)
+
+    def test_other_files_are_rejected(self):
+        path = bank_path(ALL)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as file:
+            file.write(b'not a bank' * 20)
+
+        with self.assertRaises(BankFormatError):
+            BankFile(path)
+        self.assertTrue(build_bank(ALL)['written'])
+
+    def test_a_missing_file_is_built_by_the_worker(self):
+        responses = [self.client.get('/api/v1/quizzes/questions/bank/all/') for _ in range(3)]
+
+        self.assertEqual([response.status_code for response in responses], [503] * 3)
+        self.assertEqual(responses[0]['Retry-After'], '10')
+        self.assertFalse(os.path.exists(bank_path(ALL)))
+        self.assertEqual(Task.objects.filter(name='quiz.build_question_banks').count(), 1)
+
+        Worker(names=['quiz.build_question_banks']).run(burst=True)
+
+        self.assertEqual(self.client.get('/api/v1/quizzes/questions/bank/all/').status_code, 200)
+
+    def test_the_whole_file_is_downloaded(self):
+        build_bank('easy')
+        response = self.client.get('/api/v1/quizzes/questions/bank/easy/')
+
+        with open(bank_path('easy'), 'rb') as file:
+            content = file.read()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), content)
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+
+    def test_range_requests_get_partial_content(self):
+        build_bank(ALL)
+        with open(bank_path(ALL), 'rb') as file:
+            content = file.read()
+        size = len(content)
+
+        ranges = [
+            ('bytes=0-63', 0, 63),
+            ('bytes=-16', size - 16, size - 1),
+            (f'bytes={size - 10}-', size - 10, size - 1),
+        ]
+        for header, first, last in ranges:
+            response = self.client.get('/api/v1/quizzes/questions/bank/all/', HTTP_RANGE=header)
+            self.assertEqual(response.status_code, 206)
+            self.assertEqual(response['Content-Range'], f'bytes {first}-{last}/{size}')
+            self.assertEqual(response.content, content[first:last + 1])
+
+    def test_ranges_past_the_end_are_not_satisfiable(self):
+        build_bank(ALL)
+        size = os.path.getsize(bank_path(ALL))
+
+        response = self.client.get('/api/v1/quizzes/questions/bank/all/', HTTP_RANGE=f'bytes={size}-')
+
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], f'bytes */{size}')
+
+    def test_a_stale_if_range_gets_the_whole_file(self):
+        build_bank(ALL)
+        response = self.client.get(
+            '/api/v1/quizzes/questions/bank/all/', HTTP_RANGE='bytes=0-63', HTTP_IF_RANGE='"stale"'
+        )
+
+        self.assertEqual(response.status_code, 200)
+
+    def test_conditional_requests_get_not_modified(self):
+        build_bank(ALL)
+        etag = self.client.get('/api/v1/quizzes/questions/bank/all/')['ETag']
+
+        response = self.client.get('/api/v1/quizzes/questions/bank/all/', HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 304)
+
+    def test_unknown_banks_are_not_found(self):
+        self.assertEqual(self.client.get('/api/v1/quizzes/questions/bank/impossible/').status_code, 404)
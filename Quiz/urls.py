@@ -2,13 +2,35 @@ from django.urls import path
 from .views import (
     QuestionListView,
     QuestionDetailView,
+    RecommendedQuestionsView,
+    QuestionSyncView,
+    QuestionSnapshotView,
+    QuestionBankView,
     AnswerSubmissionView,
-    PracticeHistoryView
+    PracticeHistoryView,
+    ExamSessionCreateView,
+    ExamSessionDetailView,
+    ExamAnswersView,
+    ExamSubmitView,
+    LiveSessionCreateView,
+    LiveSessionDetailView,
+    ActivityStatsView
 )
 
 urlpatterns = [
     path('questions/', QuestionListView.as_view(), name='question-list'),
+    path('questions/recommended/', RecommendedQuestionsView.as_view(), name='question-recommended'),
+    path('questions/sync/', QuestionSyncView.as_view(), name='question-sync'),
+    path('questions/snapshot/', QuestionSnapshotView.as_view(), name='question-snapshot'),
+    path('questions/bank/<str:bank>/', QuestionBankView.as_view(), name='question-bank'),
     path('questions/<int:pk>/', QuestionDetailView.as_view(), name='question-detail'),
     path('questions/<int:pk>/submit/', AnswerSubmissionView.as_view(), name='submit-answer'),
     path('practice-history/', PracticeHistoryView.as_view(), name='practice-history'),
+    path('exams/', ExamSessionCreateView.as_view(), name='exam-create'),
+    path('exams/<int:pk>/', ExamSessionDetailView.as_view(), name='exam-detail'),
+    path('exams/<int:pk>/answers/', ExamAnswersView.as_view(), name='exam-answers'),
+    path('exams/<int:pk>/submit/', ExamSubmitView.as_view(), name='exam-submit'),
+    path('live/', LiveSessionCreateView.as_view(), name='live-create'),
+    path('live/<str:code>/', LiveSessionDetailView.as_view(), name='live-detail'),
+    path('stats/activity/', ActivityStatsView.as_view(), name='activity-stats'),
 ]
\ No newline at end of file
@@ -1,16 +1,48 @@
+import os
+from datetime import datetime, timedelta, timezone as dt_timezone
 from rest_framework import generics, status
+from rest_framework.exceptions import APIException
 from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
+from rest_framework.renderers import BrowsableAPIRenderer
+from rest_framework.views import APIView
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Max, Q
+from django.http import FileResponse, Http404, HttpResponse
 from django.shortcuts import get_object_or_404
-from .models import Question, Choice, Practice
+from QuizBit.cache import get_or_compute
+from QuizBit.conditional import ConditionalGetMixin, RangeNotSatisfiable, make_etag, parse_range
+from QuizBit.throttling import UserTokenBucketThrottle
+from .bank import BANKS, bank_path, request_bank_build
+from .cache import question_cache_key
+from .exams import create_exam_session, grade_sessions, record_answers
+from .live import create_live_session
+from .models import Question, Choice, Practice, PracticeArchive, ExamSession, LiveSession
+from .renderers import FastJSONRenderer
 from .serializers import (
     QuestionListSerializer, 
     QuestionDetailSerializer,
     AnswerSubmissionSerializer,
-    PracticeHistorySerializer
+    PracticeHistorySerializer,
+    PracticeHistoryQuerySerializer,
+    ExamSessionCreateSerializer,
+    ExamSessionSerializer,
+    ExamAnswersSerializer,
+    LiveSessionSerializer,
+    RecommendedQuestionSerializer,
+    RecommendedQuestionsQuerySerializer,
+    QuestionSyncQuerySerializer,
+    ActivityStatsQuerySerializer,
+    serialize_question_rows,
+    serialize_practice_rows
 )
+from .ratings import get_user_skill, recommend_questions
+from .rollups import activity_series
+from .signals import practices_recorded
+from .sync import WatermarkExpired, build_snapshot, get_changes
 
-class QuestionListView(generics.ListAPIView):
+class QuestionListView(ConditionalGetMixin, generics.ListAPIView):
     """
     API endpoint that allows viewing a list of questions.
     
@@ -29,21 +61,74 @@ class QuestionListView(generics.ListAPIView):
     
     Example:
         GET /api/v1/quiz/questions/?difficulty=easy
+    
+    Caching:
+        Responses carry an ETag (number of questions and latest `updated_at`)
+        and a Last-Modified header; matching conditional requests get 304.
     """
     queryset = Question.objects.all()
     serializer_class = QuestionListSerializer
+    renderer_classes = [FastJSONRenderer, BrowsableAPIRenderer]
+    cache_control_scope = 'question-list'
     
     def get_queryset(self):
         """
         Optionally filters questions by difficulty level from query parameters.
         """
+        return self.get_questions(self.request.query_params.get('difficulty') or '')
+
+    @staticmethod
+    def get_questions(difficulty):
+        """
+        Questions of the given difficulty level, or all of them for ''.
+        """
         queryset = Question.objects.all()
-        difficulty = self.request.query_params.get('difficulty', None)
         if difficulty:
             queryset = queryset.filter(difficulty=difficulty)
         return queryset
 
-class QuestionDetailView(generics.RetrieveAPIView):
+    def get_validators(self, request, *args, **kwargs):
+        return self.get_list_validators(request.query_params.get('difficulty') or '')
+
+    def get_list_validators(self, difficulty):
+        """
+        Validators of the filtered list, cached with the question content.
+        
+        The count is part of the ETag so that deleting a question, which
+        does not move the latest `updated_at`, still changes it.
+        """
+        count, last_modified = get_or_compute(
+            question_cache_key('list-validators', difficulty),
+            lambda: tuple(self.get_questions(difficulty).aggregate(
+                count=Count('id'), last_modified=Max('updated_at')
+            ).values()),
+            settings.QUIZBIT_QUESTION_CACHE_TIMEOUT
+        )
+        return make_etag('question-list', difficulty, count, last_modified), last_modified
+
+    def list(self, request, *args, **kwargs):
+        return Response(self.get_list_data(request.query_params.get('difficulty') or ''))
+
+    def get_list_data(self, difficulty):
+        """
+        The serialized question list from the shared cache, one entry per difficulty filter.
+        """
+        return get_or_compute(
+            question_cache_key('list', difficulty),
+            lambda: self.serialize_list(difficulty),
+            settings.QUIZBIT_QUESTION_CACHE_TIMEOUT
+        )
+
+    def serialize_list(self, difficulty):
+        """
+        Serialize the filtered questions, through the fast path when enabled.
+        """
+        queryset = self.get_questions(difficulty)
+        if settings.QUIZBIT_FAST_SERIALIZATION:
+            return serialize_question_rows(queryset)
+        return list(self.serializer_class(queryset, many=True).data)
+
+class QuestionDetailView(ConditionalGetMixin, generics.RetrieveAPIView):
     """
     API endpoint that allows viewing detailed information about a specific question.
     
@@ -57,11 +142,262 @@ class QuestionDetailView(generics.RetrieveAPIView):
         - choices
         - created_at
     
+    Caching:
+        Responses carry ETag and Last-Modified headers derived from the
+        question's `updated_at`; matching conditional requests get 304.
+    
     Raises:
         404: If question with given ID does not exist
     """
     queryset = Question.objects.all()
     serializer_class = QuestionDetailSerializer
+    cache_control_scope = 'question-detail'
+
+    def get_validators(self, request, *args, **kwargs):
+        """
+        Validators of one question, cached with the question content.
+        
+        This entry and the detail below are also primed in bulk for the most
+        answered questions by Quiz.warmup.
+        """
+        last_modified = get_or_compute(
+            question_cache_key('detail-validators', kwargs['pk']),
+            lambda: Question.objects.filter(pk=kwargs['pk']).values_list('updated_at', flat=True).first(),
+            settings.QUIZBIT_QUESTION_CACHE_TIMEOUT
+        )
+        if last_modified is None:
+            raise Http404
+        return make_etag('question-detail', kwargs['pk'], last_modified), last_modified
+
+    def retrieve(self, request, *args, **kwargs):
+        """
+        Serve the question detail from the shared cache.
+        """
+        data = get_or_compute(
+            question_cache_key('detail', kwargs['pk']),
+            lambda: dict(self.get_serializer(self.get_object()).data),
+            settings.QUIZBIT_QUESTION_CACHE_TIMEOUT
+        )
+        return Response(data)
+
+class QuestionSyncView(generics.GenericAPIView):
+    """
+    API endpoint for keeping a client-side copy of the question bank current.
+    
+    GET /api/v1/quizzes/questions/sync/
+    
+    Authentication:
+        Required
+    
+    Query Parameters:
+        since (datetime, optional): Watermark returned by the previous sync
+            or by the snapshot. Without it every question is sent, in pages.
+        limit (int): Maximum number of changed questions (default 500, max 1000)
+    
+    Returns:
+        {
+            "watermark": datetime,   (send back as `since` on the next sync)
+            "has_more": bool,        (more changes remain; sync again right away)
+            "questions": [...],      (created or changed questions, as in the detail view)
+            "deleted": {
+                "questions": [ids],
+                "choices": [ids]
+            }
+        }
+    
+    Raises:
+        410: If the watermark is older than QUIZBIT_SYNC_TOMBSTONE_DAYS;
+            download a new snapshot
+    """
+    permission_classes = [IsAuthenticated]
+    renderer_classes = [FastJSONRenderer, BrowsableAPIRenderer]
+    
+    def get(self, request, *args, **kwargs):
+        params = QuestionSyncQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        try:
+            changes = get_changes(**params.validated_data)
+        except WatermarkExpired:
+            return Response(
+                {'error': 'Watermark has expired, download a new snapshot'},
+                status=status.HTTP_410_GONE
+            )
+        return Response(changes)
+
+class QuestionSnapshotView(ConditionalGetMixin, generics.RetrieveAPIView):
+    """
+    API endpoint for downloading the whole question bank at once.
+    
+    GET /api/v1/quizzes/questions/snapshot/
+    
+    Authentication:
+        Required
+    
+    Returns:
+        A gzip-compressed JSON file (application/gzip):
+        {
+            "watermark": datetime,   (pass as `since` to the sync endpoint)
+            "questions": [...]       (every question, as in the detail view)
+        }
+        The watermark is repeated in the X-Sync-Watermark header.
+    
+    Caching:
+        The bundle is built once per change to the question content and
+        served from the shared cache; matching conditional requests get 304.
+    """
+    permission_classes = [IsAuthenticated]
+    cache_control_scope = 'question-snapshot'
+
+    def get_snapshot(self):
+        """The cached (content, watermark, etag) of the current bundle."""
+        def build():
+            content, watermark = build_snapshot()
+            return content, watermark, make_etag('question-snapshot', watermark, len(content))
+        return get_or_compute(question_cache_key('snapshot'), build, settings.QUIZBIT_QUESTION_CACHE_TIMEOUT)
+
+    def get_validators(self, request, *args, **kwargs):
+        return self.get_snapshot()[2], None
+
+    def retrieve(self, request, *args, **kwargs):
+        content, watermark, _ = self.get_snapshot()
+        response = HttpResponse(content, content_type='application/gzip')
+        response['Content-Disposition'] = 'attachment; filename="questions.json.gz"'
+        response['X-Sync-Watermark'] = watermark.isoformat()
+        return response
+
+class BankNotReady(APIException):
+    """The bank file does not exist yet; a worker has been asked to build it."""
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = 'The question bank is being built, retry shortly.'
+    default_code = 'bank_not_ready'
+    wait = 10
+
+class QuestionBankView(ConditionalGetMixin, generics.RetrieveAPIView):
+    """
+    API endpoint for downloading a question-bank file, for exam kiosks and
+    offline clients that memory-map it and look questions up by id.
+    
+    GET /api/v1/quizzes/questions/bank/{bank}/
+    
+    Authentication:
+        Required
+    
+    Parameters:
+        bank (str): all, easy, medium or hard
+    
+    Request Headers:
+        Range (optional): A single byte range, e.g. bytes=0-4095
+        If-Range (optional): Only honour Range if the ETag still matches
+    
+    Returns:
+        The bank file (application/octet-stream); its format is described in
+        Quiz.bank. A Range request gets 206 with just those bytes, so clients
+        can fetch the header and block table first and then only the blocks
+        they need or that changed.
+    
+    Caching:
+        The file is rebuilt in the background after content changes; its
+        ETag changes with it. Matching conditional requests get 304.
+    
+    Raises:
+        404: If the bank does not exist
+        416: If the range starts past the end of the file
+        503: If the file has not been built yet; its build is queued for
+            the task worker (see Retry-After)
+    """
+    permission_classes = [IsAuthenticated]
+    cache_control_scope = 'question-bank'
+
+    def get_bank_path(self):
+        """
+        Path of the requested bank. A missing file is built by the task
+        worker, not in the request, so a burst of first downloads queues a
+        single build.
+        """
+        name = self.kwargs['bank']
+        if name not in BANKS:
+            raise Http404
+        path = bank_path(name)
+        if not os.path.exists(path):
+            request_bank_build()
+            raise BankNotReady()
+        return path
+
+    def get_bank_etag(self, stat):
+        return make_etag('question-bank', self.kwargs['bank'], stat.st_mtime_ns, stat.st_size)
+
+    def get_validators(self, request, *args, **kwargs):
+        stat = os.stat(self.get_bank_path())
+        return self.get_bank_etag(stat), datetime.fromtimestamp(stat.st_mtime, dt_timezone.utc)
+
+    def retrieve(self, request, *args, **kwargs):
+        # Validators come from the open file: the path may be replaced by a
+        # rebuild at any moment.
+        file = open(self.get_bank_path(), 'rb')
+        stat = os.fstat(file.fileno())
+        etag = self.get_bank_etag(stat)
+        filename = f"questions-{self.kwargs['bank']}.qbnk"
+
+        byte_range = None
+        if request.headers.get('If-Range', etag) == etag:
+            try:
+                byte_range = parse_range(request.headers.get('Range'), stat.st_size)
+            except RangeNotSatisfiable:
+                file.close()
+                response = HttpResponse(status=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE)
+                response['Content-Range'] = f'bytes */{stat.st_size}'
+                return response
+
+        if byte_range is None:
+            response = FileResponse(
+                file, as_attachment=True, filename=filename, content_type='application/octet-stream'
+            )
+        else:
+            first, last = byte_range
+            with file:
+                file.seek(first)
+                content = file.read(last - first + 1)
+            response = HttpResponse(
+                content, status=status.HTTP_206_PARTIAL_CONTENT, content_type='application/octet-stream'
+            )
+            response['Content-Range'] = f'bytes {first}-{last}/{stat.st_size}'
+            response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        response['Accept-Ranges'] = 'bytes'
+        response['ETag'] = etag
+        return response
+
+class RecommendedQuestionsView(generics.GenericAPIView):
+    """
+    API endpoint that suggests questions matched to the user's skill.
+    
+    GET /api/v1/quizzes/questions/recommended/
+    
+    Authentication:
+        Required
+    
+    Query Parameters:
+        limit (int): Number of questions to return (default 10, max 50)
+        window (float): Largest rating distance from the user's skill (default 200)
+    
+    Returns:
+        {
+            "skill": float,       (the user's current skill rating)
+            "results": [...]      (questions closest to that skill, closest first)
+        }
+    """
+    permission_classes = [IsAuthenticated]
+    serializer_class = RecommendedQuestionSerializer
+    
+    def get(self, request, *args, **kwargs):
+        params = RecommendedQuestionsQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        
+        skill = get_user_skill(request.user)
+        questions = recommend_questions(skill, **params.validated_data)
+        return Response({
+            'skill': skill,
+            'results': self.get_serializer(questions, many=True).data
+        })
 
 class AnswerSubmissionView(generics.CreateAPIView):
     """
@@ -87,9 +423,12 @@ class AnswerSubmissionView(generics.CreateAPIView):
         400: If choice does not belong to the question
         401: If user is not authenticated
         404: If question or choice not found
+        429: If the user exceeds the 'submit' throttle rate (see Retry-After)
     """
     permission_classes = [IsAuthenticated]
     serializer_class = AnswerSubmissionSerializer
+    throttle_classes = [UserTokenBucketThrottle]
+    throttle_scope = 'submit'
     
     def create(self, request, *args, **kwargs):
         """
@@ -98,7 +437,7 @@ class AnswerSubmissionView(generics.CreateAPIView):
         Validates that:
         1. The choice exists
         2. The choice belongs to the question
-        3. Creates a practice record
+        3. Creates a practice record and updates the ratings
         """
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
@@ -112,12 +451,14 @@ class AnswerSubmissionView(generics.CreateAPIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        practice = Practice.objects.create(
-            user=request.user,
-            question=question,
-            selected_choice=choice,
-            is_correct=choice.is_correct
-        )
+        with transaction.atomic():
+            practice = Practice.objects.create(
+                user=request.user,
+                question=question,
+                selected_choice=choice,
+                is_correct=choice.is_correct
+            )
+            practices_recorded.send(sender=Practice, practices=[practice])
         
         return Response({
             'is_correct': practice.is_correct,
@@ -133,6 +474,12 @@ class PracticeHistoryView(generics.ListAPIView):
     Authentication:
         Required
     
+    Query Parameters:
+        before (optional): Only return attempts made before this ISO 8601 timestamp
+        before_id (optional): With `before`, also return attempts made at that
+            exact timestamp whose id is lower
+        limit (optional): Return at most this many attempts (1-1000)
+    
     Returns:
         List of practice attempts including:
         - id
@@ -141,12 +488,20 @@ class PracticeHistoryView(generics.ListAPIView):
         - correctness
         - timestamp
     
+    Example:
+        GET /api/v1/quiz/practice-history/?limit=50&before=2024-11-21T06:29:00Z&before_id=1234
+    
     Notes:
         - Only returns practice history for the authenticated user
-        - Ordered by most recent first
+        - Ordered by most recent first, then by id
+        - Attempts moved to the archive are included transparently; to page
+          back, pass the `created_at` and `id` of the last attempt received as
+          `before` and `before_id`. Attempts often share a timestamp (bulk
+          inserts, live quizzes), so `before` alone would skip some of them.
     """
     permission_classes = [IsAuthenticated]
     serializer_class = PracticeHistorySerializer
+    renderer_classes = [FastJSONRenderer, BrowsableAPIRenderer]
     
     def get_queryset(self):
         """
@@ -154,3 +509,309 @@ class PracticeHistoryView(generics.ListAPIView):
         """
         return Practice.objects.filter(user=self.request.user)
 
+    def get_history_querysets(self, before=None, before_id=None):
+        """
+        Returns the hot and archived history of the user, newest first.
+        
+        Rows are ordered by (created_at, id), which is also the order the
+        archive moves them in, so archived attempts always come after the hot
+        ones and reading the querysets one after the other keeps the overall
+        order. `before` and `before_id` form a cursor on that order.
+        """
+        querysets = [
+            queryset.order_by('-created_at', '-id')
+            for queryset in (self.get_queryset(), PracticeArchive.objects.filter(user=self.request.user))
+        ]
+        if before is not None:
+            cursor = Q(created_at__lt=before)
+            if before_id is not None:
+                cursor |= Q(created_at=before, id__lt=before_id)
+            querysets = [queryset.filter(cursor) for queryset in querysets]
+        return querysets
+
+    def list(self, request, *args, **kwargs):
+        """
+        Read the hot table first and only fall through to the archive when
+        the requested page reaches past the hot window.
+        """
+        params = PracticeHistoryQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        limit = params.validated_data.get('limit')
+        
+        data = []
+        history = self.get_history_querysets(
+            params.validated_data.get('before'), params.validated_data.get('before_id')
+        )
+        for queryset in history:
+            if limit is not None:
+                if len(data) >= limit:
+                    break
+                queryset = queryset[:limit - len(data)]
+            data.extend(self.serialize_history(queryset))
+        return Response(data)
+
+    def serialize_history(self, queryset):
+        """
+        Serialize history rows, from joined `.values()` rows when the fast path is enabled.
+        """
+        if settings.QUIZBIT_FAST_SERIALIZATION:
+            return serialize_practice_rows(queryset)
+        return self.get_serializer(queryset.select_related('question', 'selected_choice'), many=True).data
+
+class ExamSessionCreateView(generics.CreateAPIView):
+    """
+    API endpoint for starting a timed exam.
+    
+    POST /api/v1/quizzes/exams/
+    
+    Authentication:
+        Required
+    
+    Request Body:
+        {
+            "question_ids": [int, ...],     (optional, fixed question set)
+            "question_count": int,          (random questions when no ids, default 20)
+            "difficulty": string,           (optional filter for random questions)
+            "duration_minutes": int         (default 30)
+        }
+    
+    Returns:
+        The new exam session with its questions and deadline
+    """
+    permission_classes = [IsAuthenticated]
+    serializer_class = ExamSessionCreateSerializer
+    
+    def create(self, request, *args, **kwargs):
+        """
+        Pick the exam questions and start the clock.
+        """
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        
+        session = create_exam_session(
+            request.user,
+            question_count=data['question_count'],
+            duration=timedelta(minutes=data['duration_minutes']),
+            difficulty=data.get('difficulty'),
+            question_ids=data.get('question_ids')
+        )
+        if not session.question_ids:
+            session.delete()
+            return Response(
+                {'error': 'No questions available for this exam'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        return Response(ExamSessionSerializer(session).data, status=status.HTTP_201_CREATED)
+
+class ExamSessionDetailView(generics.RetrieveAPIView):
+    """
+    API endpoint that allows viewing one of the user's exam sessions.
+    
+    GET /api/v1/quizzes/exams/{id}/
+    
+    Authentication:
+        Required
+    
+    Raises:
+        404: If the exam does not exist or belongs to another user
+    """
+    permission_classes = [IsAuthenticated]
+    serializer_class = ExamSessionSerializer
+    
+    def get_queryset(self):
+        """
+        Returns exam sessions of the authenticated user only.
+        """
+        if getattr(self, 'swagger_fake_view', False):
+            return ExamSession.objects.none()
+        return ExamSession.objects.filter(user=self.request.user)
+
+class ExamAnswersView(generics.UpdateAPIView):
+    """
+    API endpoint for saving answers while an exam is running.
+    
+    PUT/PATCH /api/v1/quizzes/exams/{id}/answers/
+    
+    Authentication:
+        Required
+    
+    Request Body:
+        {
+            "answers": {"<question_id>": <choice_id>, ...}
+        }
+    
+    Answers are merged into the ones already saved, so clients can send
+    only what changed.
+    
+    Returns:
+        {
+            "answers": {"<question_id>": <choice_id>, ...}
+        }
+    
+    Raises:
+        400: If the exam is closed or a question is not part of it
+        404: If the exam does not exist or belongs to another user
+    """
+    permission_classes = [IsAuthenticated]
+    serializer_class = ExamAnswersSerializer
+    
+    def get_queryset(self):
+        """
+        Returns exam sessions of the authenticated user only.
+        """
+        if getattr(self, 'swagger_fake_view', False):
+            return ExamSession.objects.none()
+        return ExamSession.objects.filter(user=self.request.user)
+    
+    def update(self, request, *args, **kwargs):
+        """
+        Merge the submitted answers into the session.
+        """
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        
+        try:
+            session = record_answers(kwargs['pk'], request.user, serializer.validated_data['answers'])
+        except ExamSession.DoesNotExist:
+            raise Http404
+        except ValueError as exc:
+            return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        return Response({'answers': session.answers})
+
+class ExamSubmitView(APIView):
+    """
+    API endpoint for finishing and grading an exam.
+    
+    POST /api/v1/quizzes/exams/{id}/submit/
+    
+    Authentication:
+        Required
+    
+    Returns:
+        {
+            "score": int,
+            "total": int,
+            "message": string
+        }
+    
+    Notes:
+        - Grading writes one Practice row per answered question
+        - Submitting an already graded exam returns the existing score
+    
+    Raises:
+        404: If the exam does not exist or belongs to another user
+    """
+    permission_classes = [IsAuthenticated]
+    
+    def post(self, request, *args, **kwargs):
+        """
+        Grade the session in one pass and return the score.
+        """
+        sessions = ExamSession.objects.filter(pk=kwargs['pk'], user=request.user)
+        grade_sessions(sessions)
+        session = get_object_or_404(sessions)
+        
+        return Response({
+            'score': session.score,
+            'total': len(session.question_ids),
+            'message': 'Exam graded successfully'
+        })
+
+class LiveSessionCreateView(generics.CreateAPIView):
+    """
+    API endpoint for opening a live quiz session.
+    
+    POST /api/v1/quizzes/live/
+    
+    Authentication:
+        Required
+    
+    Returns:
+        The new session with its join code. The host and the students then
+        connect to ws://<host>/ws/live/<code>/ with the access token as a
+        subprotocol, see Quiz.consumers.LiveQuizConsumer for the protocol.
+    """
+    permission_classes = [IsAuthenticated]
+    serializer_class = LiveSessionSerializer
+    
+    def create(self, request, *args, **kwargs):
+        session = create_live_session(request.user)
+        return Response(self.get_serializer(session).data, status=status.HTTP_201_CREATED)
+
+class LiveSessionDetailView(generics.RetrieveAPIView):
+    """
+    API endpoint for looking up a live quiz session by its join code.
+    
+    GET /api/v1/quizzes/live/{code}/
+    
+    Authentication:
+        Required
+    
+    Returns:
+        The session, including whether it is still open
+    
+    Raises:
+        404: If no session has this code
+    """
+    permission_classes = [IsAuthenticated]
+    serializer_class = LiveSessionSerializer
+    queryset = LiveSession.objects.all()
+    lookup_field = 'code'
+
+class ActivityStatsView(generics.GenericAPIView):
+    """
+    API endpoint for answer activity over a date range, for dashboards.
+    
+    GET /api/v1/quizzes/stats/activity/
+    
+    Authentication:
+        Required (staff only)
+    
+    Query Parameters:
+        start (date): First day, e.g. 2024-01-01
+        end (date): Last day, included (at most 731 days after start, 31 for hours)
+        difficulty (optional): 'easy', 'medium', 'hard' or 'all' (default)
+        granularity (optional): 'day' (default) or 'hour'
+    
+    Returns:
+        {
+            "difficulty": str,
+            "granularity": str,
+            "totals": {"attempts": int, "correct": int, "correct_rate": float},
+            "results": [
+                {
+                    "day": date,  (or "hour": datetime)
+                    "attempts": int,
+                    "correct": int,
+                    "correct_rate": float,   (null without attempts)
+                    "active_users": int      (daily results only)
+                },
+                ...
+            ]
+        }
+    
+    Raises:
+        400: If the range is invalid or too long
+    """
+    permission_classes = [IsAdminUser]
+    
+    def get(self, request, *args, **kwargs):
+        params = ActivityStatsQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        
+        series = activity_series(**params.validated_data)
+        attempts = sum(entry['attempts'] for entry in series)
+        correct = sum(entry['correct'] for entry in series)
+        return Response({
+            'difficulty': params.validated_data['difficulty'],
+            'granularity': params.validated_data['granularity'],
+            'totals': {
+                'attempts': attempts,
+                'correct': correct,
+                'correct_rate': correct / attempts if attempts else None,
+            },
+            'results': series
+        })
@@ -0,0 +1,44 @@
+"""
+Cache priming for the question endpoints, a QuizBit.warmup step.
+
+Fills the entries the views would otherwise compute on their first
+requests: the question list and its validators for every difficulty filter,
+and for the QUIZBIT_WARMUP_QUESTIONS most answered questions their detail,
+detail validators and live-quiz event with its answer key. The per-question
+entries are loaded with two queries and stored with one `set_many`, with the
+same QUIZBIT_QUESTION_CACHE_TIMEOUT as the views use; the cache must have
+room for them (see QUIZBIT_CACHE_MAX_ENTRIES).
+"""
+from django.conf import settings
+from django.core.cache import cache
+
+from .cache import question_cache_key
+from .live import question_event, question_event_key
+from .models import Question
+from .serializers import QuestionDetailSerializer
+from .views import QuestionListView
+
+
+def prime_question_caches(limit=None):
+    """Prime the question caches; returns the number of questions primed."""
+    limit = settings.QUIZBIT_WARMUP_QUESTIONS if limit is None else limit
+
+    view = QuestionListView()
+    for difficulty in ['', *Question.Difficulty.values]:
+        view.get_list_validators(difficulty)
+        view.get_list_data(difficulty)
+
+    if limit <= 0:
+        return 0
+    questions = list(
+        Question.objects.order_by('-rated_answers', 'pk').prefetch_related('choices')[:limit]
+    )
+    # One serializer for all of them: its fields are built once, not per question.
+    details = QuestionDetailSerializer(questions, many=True).data
+    entries = {}
+    for question, data in zip(questions, details):
+        entries[question_cache_key('detail-validators', question.pk)] = question.updated_at
+        entries[question_cache_key('detail', question.pk)] = dict(data)
+        entries[question_event_key(question.pk)] = question_event(question, data)
+    cache.set_many(entries, settings.QUIZBIT_QUESTION_CACHE_TIMEOUT)
+    return len(questions)
@@ -2,6 +2,8 @@
 ASGI config for QuizBit project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+HTTP requests go to Django; WebSocket connections (live quizzes) are routed
+by Channels.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/3.2/howto/deployment/asgi/
@@ -13,4 +15,19 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'QuizBit.settings')
 
-application = get_asgi_application()
+# Initialize Django before importing code that uses the ORM
+django_asgi_application = get_asgi_application()
+
+from channels.routing import ProtocolTypeRouter, URLRouter  # noqa: E402
+
+from Quiz.routing import websocket_urlpatterns  # noqa: E402
+from QuizBit.ws_auth import JWTAuthMiddleware  # noqa: E402
+
+# WebSockets authenticate with a JWT rather than cookies, so a page from
+# another origin cannot ride on the user's session and no Origin check is
+# applied; the frontend and mobile clients connect cross-origin, as they do
+# to the REST API.
+application = ProtocolTypeRouter({
+    'http': django_asgi_application,
+    'websocket': JWTAuthMiddleware(URLRouter(websocket_urlpatterns)),
+})
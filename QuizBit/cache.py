@@ -0,0 +1,126 @@
+"""
+Cache-aside helpers shared by the QuizBit apps.
+
+Keys are grouped in namespaces. Each namespace has a version number stored
+in the cache itself, and every key built with `versioned_key` embeds the
+current version, so bumping the version invalidates the whole namespace
+without having to know or delete the individual keys.
+
+`get_or_compute` fills a key on a miss with single-flight protection: only
+one thread per worker waits on a local lock and only one worker across the
+deployment holds the recompute lock, everybody else waits for its result.
+
+Features that coordinate workers through the cache check `cache_is_shared()`
+first: with a per-process backend each worker only sees its own entries.
+"""
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+
+_MISSING = object()
+
+# Striped locks keep the number of local locks bounded no matter how many
+# keys are in flight; two keys sharing a stripe only serialise their misses.
+_LOCAL_LOCKS = [threading.Lock() for _ in range(64)]
+
+# How often a waiting worker polls the cache for the value being recomputed.
+_POLL_INTERVAL = 0.05
+
+# Backends whose entries live (or not at all) in the memory of one process.
+PROCESS_LOCAL_BACKENDS = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+def cache_is_shared():
+    """Whether the default cache is shared by all worker processes."""
+    return settings.CACHES['default']['BACKEND'] not in PROCESS_LOCAL_BACKENDS
+
+
+def _version_key(namespace):
+    return f'{namespace}:version'
+
+
+def get_namespace_version(namespace):
+    """
+    Return the current version of a namespace, initialising it if needed.
+
+    The initial version is derived from the clock so that a version counter
+    evicted from the cache never comes back with a number already used by
+    entries that are still stored.
+    """
+    key = _version_key(namespace)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, int(time.time() * 1000), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def bump_namespace(namespace):
+    """Invalidate every key of a namespace by moving it to a new version."""
+    key = _version_key(namespace)
+    try:
+        return cache.incr(key)
+    except ValueError:
+        cache.add(key, int(time.time() * 1000), timeout=None)
+        return cache.get(key)
+
+
+def versioned_key(namespace, *parts):
+    """Build a cache key for `parts` under the current namespace version."""
+    version = get_namespace_version(namespace)
+    return ':'.join([namespace, f'v{version}', *(str(part) for part in parts)])
+
+
+def get_or_compute(key, compute, timeout=DEFAULT_TIMEOUT):
+    """
+    Return the cached value of `key`, computing and storing it on a miss.
+
+    Concurrent misses for the same key trigger a single call to `compute`:
+    threads of the same worker queue on a local lock, and workers of the
+    deployment race for a lock key with the atomic `cache.add`. Losers poll
+    for the winner's result and only compute the value themselves if the
+    winner disappears or exceeds QUIZBIT_CACHE_LOCK_TIMEOUT.
+    """
+    value = cache.get(key, _MISSING)
+    if value is not _MISSING:
+        return value
+
+    with _LOCAL_LOCKS[hash(key) % len(_LOCAL_LOCKS)]:
+        value = cache.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+
+        lock_key = f'{key}:lock'
+        lock_timeout = settings.QUIZBIT_CACHE_LOCK_TIMEOUT
+        owns_lock = cache.add(lock_key, 1, lock_timeout)
+        if not owns_lock:
+            value = _wait_for(key, lock_key, lock_timeout)
+            if value is not _MISSING:
+                return value
+
+        try:
+            value = compute()
+            cache.set(key, value, timeout)
+        finally:
+            if owns_lock:
+                cache.delete(lock_key)
+        return value
+
+
+def _wait_for(key, lock_key, lock_timeout):
+    """Poll for a value another worker is computing; give up with _MISSING."""
+    deadline = time.monotonic() + lock_timeout
+    while time.monotonic() < deadline:
+        time.sleep(_POLL_INTERVAL)
+        value = cache.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+        if cache.get(lock_key) is None:
+            break
+    return cache.get(key, _MISSING)
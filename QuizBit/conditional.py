@@ -0,0 +1,97 @@
+"""
+Conditional GET and Cache-Control support for DRF views.
+
+Views mixing in ConditionalGetMixin describe their current representation
+with `get_validators()` (an ETag and a Last-Modified datetime). A request
+whose If-None-Match / If-Modified-Since still match is answered with 304 Not
+Modified right after authentication and permission checks, before the
+queryset is evaluated or anything is serialized.
+
+The Cache-Control policy is looked up in settings.QUIZBIT_CACHE_CONTROL with
+the view's `cache_control_scope`, in the keyword form accepted by
+django.utils.cache.patch_cache_control, e.g. {'private': True, 'max_age': 60}.
+Responses vary on Authorization, as they depend on who is asking.
+
+`parse_range` reads the Range header of views serving byte ranges of files.
+"""
+import hashlib
+
+from django.conf import settings
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+
+
+def make_etag(*parts):
+    """Build a strong ETag from the string form of `parts`."""
+    digest = hashlib.md5(':'.join(str(part) for part in parts).encode(), usedforsecurity=False)
+    return quote_etag(digest.hexdigest())
+
+
+class RangeNotSatisfiable(Exception):
+    """The requested range starts past the end of the representation."""
+
+
+def parse_range(header, size):
+    """
+    Parse a Range header against a representation of `size` bytes.
+
+    Returns the (first, last) byte positions, both included, of a single
+    `bytes` range, or None when the whole representation should be sent
+    (no header, another unit, several ranges or a malformed one). Raises
+    RangeNotSatisfiable when the range lies entirely past the end.
+    """
+    if not header:
+        return None
+    unit, _, spec = header.partition('=')
+    if unit.strip().lower() != 'bytes' or ',' in spec:
+        return None
+    first, _, last = spec.strip().partition('-')
+    try:
+        if not first:
+            suffix = int(last)
+            if suffix <= 0 or size == 0:
+                raise RangeNotSatisfiable(header)
+            return max(size - suffix, 0), size - 1
+        first, last = int(first), int(last) if last else None
+    except ValueError:
+        return None
+    if first < 0 or (last is not None and last < first):
+        return None
+    if first >= size:
+        raise RangeNotSatisfiable(header)
+    return first, size - 1 if last is None else min(last, size - 1)
+
+
+class ConditionalGetMixin:
+    """
+    Short-circuit GET requests with 304 Not Modified and add caching headers.
+    """
+    cache_control_scope = None
+
+    def get_validators(self, request, *args, **kwargs):
+        """
+        Return (etag, last_modified) for the representation `get` would produce.
+
+        Either may be None. May raise Http404 when the object does not exist.
+        """
+        raise NotImplementedError('.get_validators() must be overridden')
+
+    def get(self, request, *args, **kwargs):
+        etag, last_modified = self.get_validators(request, *args, **kwargs)
+        last_modified_timestamp = int(last_modified.timestamp()) if last_modified else None
+
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified_timestamp
+        )
+        if response is None:
+            response = super().get(request, *args, **kwargs)
+
+        if etag:
+            response.headers.setdefault('ETag', etag)
+        if last_modified_timestamp is not None:
+            response.headers.setdefault('Last-Modified', http_date(last_modified_timestamp))
+        patch_vary_headers(response, ['Authorization'])
+        policy = settings.QUIZBIT_CACHE_CONTROL.get(self.cache_control_scope)
+        if policy:
+            patch_cache_control(response, **policy)
+        return response
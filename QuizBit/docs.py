@@ -0,0 +1,108 @@
+"""
+API documentation views.
+
+drf_yasg is an optional dependency and is only imported when a docs page is
+first requested, so it costs nothing at worker boot. The OpenAPI document
+itself is generated at build time with `manage.py generate_schema` and
+served straight from QUIZBIT_OPENAPI_SCHEMA; drf_yasg only introspects the
+serializers on the fly when that file has not been generated.
+"""
+import functools
+import importlib.util
+from pathlib import Path
+
+from django.conf import settings
+from django.http import FileResponse, Http404
+from rest_framework.views import APIView
+
+DRF_YASG_AVAILABLE = importlib.util.find_spec('drf_yasg') is not None
+
+
+def get_api_info():
+    """The openapi.Info object describing the QuizBit API."""
+    from drf_yasg import openapi
+
+    return openapi.Info(
+        title="QuizBit API",
+        default_version='v1',
+        description="API documentation for QuizBit platform",
+        contact=openapi.Contact(email="contact@quizbit.com"),
+        license=openapi.License(name="MIT License"),
+    )
+
+
+def build_schema():
+    """Generate the OpenAPI document and return it encoded as JSON bytes."""
+    from drf_yasg.codecs import OpenAPICodecJson
+    from drf_yasg.generators import OpenAPISchemaGenerator
+
+    schema = OpenAPISchemaGenerator(get_api_info()).get_schema(request=None, public=True)
+    return OpenAPICodecJson(validators=[]).encode(schema)
+
+
+def write_schema(path=None):
+    """Write the OpenAPI document to `path` (QUIZBIT_OPENAPI_SCHEMA by default)."""
+    path = Path(path or settings.QUIZBIT_OPENAPI_SCHEMA)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(build_schema())
+    return path
+
+
+def precomputed_schema_response():
+    """Serve the generated OpenAPI document, or None if it was not generated."""
+    path = Path(settings.QUIZBIT_OPENAPI_SCHEMA)
+    if not path.exists():
+        return None
+    return FileResponse(path.open('rb'), content_type='application/json')
+
+
+@functools.lru_cache(maxsize=None)
+def get_schema_view():
+    """
+    Build the drf_yasg schema view class on first use.
+
+    Requests for the JSON document are answered from the precomputed file
+    when it exists; the UI page and YAML output still come from drf_yasg.
+    """
+    from drf_yasg.views import get_schema_view as yasg_get_schema_view
+
+    base_view = yasg_get_schema_view(get_api_info(), public=True)
+
+    class PrecomputedSchemaView(base_view):
+        def get(self, request, version='', format=None):
+            if request.accepted_renderer.format in ('openapi', 'json'):
+                response = precomputed_schema_response()
+                if response is not None:
+                    return response
+            return super().get(request, version, format)
+
+    return PrecomputedSchemaView
+
+
+@functools.lru_cache(maxsize=None)
+def get_ui_view(renderer):
+    """The 'swagger' or 'redoc' UI view, built on first use."""
+    return get_schema_view().with_ui(renderer, cache_timeout=0)
+
+
+def swagger_ui(request, *args, **kwargs):
+    if not DRF_YASG_AVAILABLE:
+        raise Http404('API documentation requires drf_yasg')
+    return get_ui_view('swagger')(request, *args, **kwargs)
+
+
+def redoc(request, *args, **kwargs):
+    if not DRF_YASG_AVAILABLE:
+        raise Http404('API documentation requires drf_yasg')
+    return get_ui_view('redoc')(request, *args, **kwargs)
+
+
+class OpenAPISchemaView(APIView):
+    """
+    The precomputed OpenAPI document, available without drf_yasg installed.
+    """
+    def get(self, request, *args, **kwargs):
+        response = precomputed_schema_response()
+        if response is None:
+            raise Http404('Run `manage.py generate_schema` to build the API schema')
+        return response
@@ -0,0 +1,76 @@
+"""
+Paginators for very large tables.
+"""
+import json
+
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator that trusts the database's row estimate for large querysets.
+
+    An exact COUNT(*) over a table with millions of rows takes seconds on
+    PostgreSQL and MySQL, and the admin changelist runs it on every page.
+    The planner's estimate is used instead as long as it is above
+    `exact_count_threshold`: the table statistics for an unfiltered
+    queryset, the EXPLAIN row estimate for a filtered one (such as the
+    soft-delete filter of the Question and Choice managers, or a changelist
+    filter). Small results and databases without statistics (SQLite) get an
+    exact count.
+    """
+    exact_count_threshold = 100000
+
+    @cached_property
+    def count(self):
+        query = getattr(self.object_list, 'query', None)
+        if query is not None:
+            if query.where:
+                estimate = self.estimate_query_rows(self.object_list)
+            else:
+                estimate = self.estimate_table_rows(self.object_list)
+            if estimate is not None and estimate > self.exact_count_threshold:
+                return estimate
+        return super().count
+
+    @staticmethod
+    def estimate_table_rows(queryset):
+        """Row estimate of the queryset's table from planner statistics, or None."""
+        connection = connections[queryset.db]
+        table = queryset.model._meta.db_table
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                cursor.execute('SELECT reltuples::bigint FROM pg_class WHERE relname = %s', [table])
+            elif connection.vendor == 'mysql':
+                cursor.execute(
+                    'SELECT table_rows FROM information_schema.tables '
+                    'WHERE table_schema = DATABASE() AND table_name = %s',
+                    [table]
+                )
+            else:
+                return None
+            row = cursor.fetchone()
+        return int(row[0]) if row and row[0] is not None and row[0] >= 0 else None
+
+    @staticmethod
+    def estimate_query_rows(queryset):
+        """Planner estimate of the rows the queryset returns, or None."""
+        connection = connections[queryset.db]
+        if connection.vendor not in ('postgresql', 'mysql'):
+            return None
+        sql, params = queryset.order_by().select_related(None).query.get_compiler(queryset.db).as_sql()
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+                plan = cursor.fetchone()[0]
+                if isinstance(plan, str):
+                    plan = json.loads(plan)
+                return int(plan[0]['Plan']['Plan Rows'])
+            cursor.execute(f'EXPLAIN {sql}', params)
+            columns = [column[0] for column in cursor.description]
+            row = dict(zip(columns, cursor.fetchone()))
+        if row.get('rows') is None:
+            return None
+        return int(row['rows'] * float(row.get('filtered') or 100) / 100)
@@ -12,7 +12,9 @@ https://docs.djangoproject.com/en/3.2/ref/settings/
 
 from pathlib import Path
 from django.conf import settings
+import importlib.util
 import os
+import tempfile
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -23,12 +25,17 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 # See https://docs.djangoproject.com/en/3.2/howto/deployment/checklist/
 
 # SECURITY WARNING: keep the secret key used in production secret!
-SECRET_KEY = 'django-insecure-d^%wgk7mo9f0#h1acdx$w2ab&i*)yem=0fl-8zp$_^q6sy3l$t'
+SECRET_KEY = os.environ.get(
+    'QUIZBIT_SECRET_KEY',
+    'django-insecure-d^%wgk7mo9f0#h1acdx$w2ab&i*)yem=0fl-8zp$_^q6sy3l$t'
+)
 
 # SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = True
+# gunicorn.conf.py turns it off unless QUIZBIT_DEBUG is set explicitly.
+DEBUG = os.environ.get('QUIZBIT_DEBUG', 'true').lower() in ('1', 'true', 'yes')
 
-ALLOWED_HOSTS = []
+# Comma-separated host names, e.g. "quizbit.com,api.quizbit.com"
+ALLOWED_HOSTS = [host.strip() for host in os.environ.get('QUIZBIT_ALLOWED_HOSTS', '').split(',') if host.strip()]
 
 
 # Application definition
@@ -42,15 +49,17 @@ INSTALLED_APPS = [
     'django.contrib.staticfiles',
     'rest_framework',
     'rest_framework_simplejwt',
+    'rest_framework_simplejwt.token_blacklist',
     'corsheaders',
-    'drf_yasg',
     'Authentication',
     'Quiz',
+    'Tasks',
 ]
 
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',  # Add this line at the top
     'django.middleware.security.SecurityMiddleware',
+    'whitenoise.middleware.WhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -61,6 +70,9 @@ MIDDLEWARE = [
 
 ROOT_URLCONF = 'QuizBit.urls'
 
+# WebSocket support for live quizzes, see QuizBit/asgi.py
+ASGI_APPLICATION = 'QuizBit.asgi.application'
+
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
@@ -77,6 +89,17 @@ TEMPLATES = [
     },
 ]
 
+# drf_yasg is optional and only imported by QuizBit.docs when a docs page is
+# first requested. Listing it in INSTALLED_APPS would import it (and its
+# pkg_resources scan) at every worker boot, so only its templates and static
+# files are registered here.
+_DRF_YASG_SPEC = importlib.util.find_spec('drf_yasg')
+STATICFILES_DIRS = []
+if _DRF_YASG_SPEC is not None:
+    _DRF_YASG_DIR = Path(_DRF_YASG_SPEC.origin).parent
+    TEMPLATES[0]['DIRS'].append(_DRF_YASG_DIR / 'templates')
+    STATICFILES_DIRS.append(_DRF_YASG_DIR / 'static')
+
 WSGI_APPLICATION = 'QuizBit.wsgi.application'
 
 
@@ -91,6 +114,56 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+#
+# QUIZBIT_CACHE_BACKEND selects the cache shared by the application workers:
+#   locmem - per-process memory, fine for development and tests
+#   file   - a directory shared by every worker on the host (local stand-in for Redis)
+#   redis  - a Redis server at QUIZBIT_REDIS_URL
+
+QUIZBIT_CACHE_BACKEND = os.environ.get('QUIZBIT_CACHE_BACKEND', 'locmem')
+
+_CACHE_BACKENDS = {
+    'locmem': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'quizbit',
+    },
+    'file': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.environ.get('QUIZBIT_CACHE_DIR', os.path.join(tempfile.gettempdir(), 'quizbit_cache')),
+    },
+    'redis': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.environ.get('QUIZBIT_REDIS_URL', 'redis://127.0.0.1:6379/1'),
+    },
+}
+
+CACHES = {
+    'default': {
+        **_CACHE_BACKENDS[QUIZBIT_CACHE_BACKEND],
+        'KEY_PREFIX': 'quizbit',
+        'TIMEOUT': int(os.environ.get('QUIZBIT_CACHE_TIMEOUT', 300)),
+    }
+}
+
+# The locmem and file backends evict entries beyond MAX_ENTRIES (300 by
+# default, fewer than the warm-up alone stores, see QUIZBIT_WARMUP_QUESTIONS).
+if QUIZBIT_CACHE_BACKEND in ('locmem', 'file'):
+    CACHES['default']['OPTIONS'] = {
+        'MAX_ENTRIES': int(os.environ.get('QUIZBIT_CACHE_MAX_ENTRIES', 10000)),
+    }
+
+# Seconds question content stays cached by the read endpoints, the live
+# quizzes and the warm-up. Edits invalidate it right away (see Quiz.cache), so
+# the timeout only bounds how long unused entries linger.
+QUIZBIT_QUESTION_CACHE_TIMEOUT = int(os.environ.get('QUIZBIT_QUESTION_CACHE_TIMEOUT', 24 * 60 * 60))
+
+# Seconds a worker may hold the recompute lock of a cache key before other
+# workers give up waiting for it and compute the value themselves.
+QUIZBIT_CACHE_LOCK_TIMEOUT = 10
+
+
 # Password validation
 # https://docs.djangoproject.com/en/3.2/ref/settings/#auth-password-validators
 
@@ -102,7 +175,7 @@ AUTH_PASSWORD_VALIDATORS = [
         'NAME': 'django.contrib.auth.password_validation.MinimumLengthValidator',
     },
     {
-        'NAME': 'django.contrib.auth.password_validation.CommonPasswordValidator',
+        'NAME': 'Authentication.password_validation.PreloadedCommonPasswordValidator',
     },
     {
         'NAME': 'django.contrib.auth.password_validation.NumericPasswordValidator',
@@ -127,6 +200,23 @@ USE_TZ = True
 # https://docs.djangoproject.com/en/3.2/howto/static-files/
 
 STATIC_URL = '/static/'
+STATIC_ROOT = os.environ.get('QUIZBIT_STATIC_ROOT', os.path.join(BASE_DIR, 'staticfiles'))
+
+# WhiteNoise serves the files gathered by `collectstatic` (admin and API docs)
+# from the application workers. In production they are stored under hashed
+# names with pre-compressed gzip copies, so they can be cached forever; that
+# needs `collectstatic` to have run, which development setups skip.
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': (
+            'django.contrib.staticfiles.storage.StaticFilesStorage' if DEBUG
+            else 'whitenoise.storage.CompressedManifestStaticFilesStorage'
+        ),
+    },
+}
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/3.2/ref/settings/#default-auto-field
@@ -146,8 +236,9 @@ from datetime import timedelta
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=60),
     'REFRESH_TOKEN_LIFETIME': timedelta(days=1),
-    'ROTATE_REFRESH_TOKENS': False,
+    'ROTATE_REFRESH_TOKENS': True,
     'BLACKLIST_AFTER_ROTATION': True,
+    'TOKEN_REFRESH_SERIALIZER': 'Authentication.serializers.RotatingTokenRefreshSerializer',
     'ALGORITHM': 'HS256',
     'SIGNING_KEY': SECRET_KEY,
     'VERIFYING_KEY': None,
@@ -158,6 +249,46 @@ SIMPLE_JWT = {
     'TOKEN_TYPE_CLAIM': 'token_type',
 }
 
+# Channel layer used to fan live-quiz messages out to the WebSocket clients.
+# The in-process layer only reaches clients of the same process, which is
+# enough for a single server process and for tests; set QUIZBIT_CHANNEL_LAYER
+# to 'redis' (requires channels_redis) to span several processes or hosts.
+QUIZBIT_CHANNEL_LAYER = os.environ.get('QUIZBIT_CHANNEL_LAYER', 'memory')
+
+_CHANNEL_LAYERS = {
+    'memory': {
+        'BACKEND': 'QuizBit.channel_layers.LocalChannelLayer',
+    },
+    'redis': {
+        'BACKEND': 'channels_redis.core.RedisChannelLayer',
+        'CONFIG': {'hosts': [os.environ.get('QUIZBIT_REDIS_URL', 'redis://127.0.0.1:6379/1')]},
+    },
+}
+
+CHANNEL_LAYERS = {
+    'default': _CHANNEL_LAYERS[QUIZBIT_CHANNEL_LAYER],
+}
+
+# Live-quiz answers are written to Practice in batches of this many rows, or
+# after this many seconds, whichever comes first.
+QUIZBIT_LIVE_FLUSH_SIZE = 500
+QUIZBIT_LIVE_FLUSH_INTERVAL = 1.0
+
+# Seconds a background task may run before its worker is presumed dead and
+# the task is queued again (see Tasks.worker).
+QUIZBIT_TASK_LOCK_TIMEOUT = 600
+
+# Seconds a running deletion job may go without progress before its worker is
+# presumed dead and another one may take the job over (see Quiz.deletion).
+# Below QUIZBIT_TASK_LOCK_TIMEOUT, so the re-queued task finds it claimable.
+QUIZBIT_DELETION_LEASE = 300
+
+# Refresh-token revocation, see Authentication.revocation: expected number of
+# live revoked tokens the in-memory filter is sized for, and how often (in
+# seconds) expired tokens are pruned from the blacklist tables.
+QUIZBIT_REVOCATION_FILTER_CAPACITY = 100000
+QUIZBIT_REVOCATION_PRUNE_INTERVAL = 3600
+
 # Add REST Framework settings
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
@@ -165,5 +296,62 @@ REST_FRAMEWORK = {
     ),
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
-    ]
+    ],
+    # Token-bucket rates per view `throttle_scope`, see QuizBit.throttling
+    'DEFAULT_THROTTLE_RATES': {
+        'submit': os.environ.get('QUIZBIT_THROTTLE_SUBMIT', '60/min'),
+        'login': os.environ.get('QUIZBIT_THROTTLE_LOGIN', '10/min'),
+    },
 }
+
+# Serve the high-volume list endpoints (questions, practice history) from
+# `.values()` rows instead of ModelSerializer instances. The output is the same.
+QUIZBIT_FAST_SERIALIZATION = True
+
+# Cache-Control policies per view `cache_control_scope`, see QuizBit.conditional.
+# The question endpoints require authentication, so their responses may only
+# be stored by the client's own cache, never by shared caches (CDNs, proxies)
+# that could replay them to other clients.
+QUIZBIT_CACHE_CONTROL = {
+    'question-list': {'private': True, 'max_age': 60},
+    'question-detail': {'private': True, 'max_age': 300},
+    'question-snapshot': {'private': True, 'max_age': 300},
+    'question-bank': {'private': True, 'max_age': 300},
+}
+
+# Question delta sync, see Quiz.sync: changes younger than this many seconds
+# are left for the next sync, so that slow transactions are not skipped; and
+# tombstones of deleted questions and choices are kept this many days, after
+# which clients with an older watermark must download a new snapshot.
+QUIZBIT_SYNC_SAFETY_MARGIN = int(os.environ.get('QUIZBIT_SYNC_SAFETY_MARGIN', 10))
+QUIZBIT_SYNC_TOMBSTONE_DAYS = int(os.environ.get('QUIZBIT_SYNC_TOMBSTONE_DAYS', 90))
+
+# Question-bank files for offline and exam clients, see Quiz.bank: the
+# directory they are written to (shared by the task workers and the web
+# servers), and the seconds a rebuild waits after a content change, so that a
+# burst of edits is rebuilt once.
+QUIZBIT_BANK_DIR = os.environ.get('QUIZBIT_BANK_DIR', os.path.join(BASE_DIR, 'banks'))
+QUIZBIT_BANK_REBUILD_DELAY = int(os.environ.get('QUIZBIT_BANK_REBUILD_DELAY', 60))
+
+# Seconds between recording an answer and the task that adds it to the
+# activity rollups, see Quiz.rollups: the answers of that window are counted
+# together, with one write per rollup row.
+QUIZBIT_ROLLUP_DELAY = int(os.environ.get('QUIZBIT_ROLLUP_DELAY', 10))
+
+# Practice rows older than this many days are moved to the archive table by
+# `manage.py archive_practice`; the practice history endpoint reads both.
+QUIZBIT_PRACTICE_HOT_DAYS = int(os.environ.get('QUIZBIT_PRACTICE_HOT_DAYS', 180))
+
+# Worker warm-up, see QuizBit.warmup: the steps run before a worker takes
+# traffic, and how many of the most answered questions get their detail and
+# live-quiz answer key cached (three cache entries each).
+QUIZBIT_WARMUP_STEPS = [
+    'QuizBit.warmup.load_urlconf',
+    'Authentication.warmup.load_token_backend',
+    'Quiz.warmup.prime_question_caches',
+]
+QUIZBIT_WARMUP_QUESTIONS = int(os.environ.get('QUIZBIT_WARMUP_QUESTIONS', 1000))
+
+# OpenAPI document generated at build time by `manage.py generate_schema` and
+# served by the docs views instead of introspecting the serializers per worker.
+QUIZBIT_OPENAPI_SCHEMA = os.environ.get('QUIZBIT_OPENAPI_SCHEMA', os.path.join(BASE_DIR, 'openapi.json'))
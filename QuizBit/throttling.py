@@ -0,0 +1,126 @@
+"""
+Token-bucket throttles backed by the shared cache.
+
+DRF's SimpleRateThrottle keeps a list of request timestamps per client and
+rewrites it on every request, which is O(rate) work and not atomic across
+workers. These throttles implement the token bucket as GCRA (generic cell
+rate algorithm): the whole bucket is one integer, the "theoretical arrival
+time" (TAT) of the next request in milliseconds, moved forward with the
+cache's atomic `incr`. A check costs a constant number of cache operations
+(`incr` plus a `touch` to extend the key's lifetime, and an `add` and one
+more `incr` after the client was idle) whatever the rate.
+
+Rates come from REST_FRAMEWORK['DEFAULT_THROTTLE_RATES'][view.throttle_scope]
+in the usual DRF format, e.g. '30/min': the bucket holds 30 tokens and
+refills at 30 per minute.
+
+`incr` is atomic on the locmem and Redis backends but not on the file-based
+one, where concurrent requests from the same client may occasionally slip
+an extra request through.
+"""
+import time
+
+from rest_framework.throttling import SimpleRateThrottle
+
+
+class TokenBucketThrottle(SimpleRateThrottle):
+    """
+    Base token-bucket throttle scoped by the view's `throttle_scope`.
+
+    Subclasses choose what identifies a client by implementing `get_ident_for`.
+    """
+    scope_attr = 'throttle_scope'
+    cache_format = 'throttle_bucket_%(scope)s_%(ident)s'
+
+    def __init__(self):
+        # The rate depends on the view's scope, which is only known once
+        # allow_request() is called, as with DRF's ScopedRateThrottle.
+        self._wait = None
+
+    def get_ident_for(self, request):
+        raise NotImplementedError('.get_ident_for() must be overridden')
+
+    def get_cache_key(self, request, view):
+        return self.cache_format % {
+            'scope': self.scope,
+            'ident': self.get_ident_for(request)
+        }
+
+    def allow_request(self, request, view):
+        self.scope = getattr(view, self.scope_attr, None)
+        if not self.scope:
+            return True
+
+        self.rate = self.get_rate()
+        self.num_requests, self.duration = self.parse_rate(self.rate)
+        if self.rate is None:
+            return True
+
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        now = int(self.timer() * 1000)
+        # Each request moves the TAT forward by one token's worth of time;
+        # a full bucket lets the TAT run `capacity` tokens ahead of now.
+        interval = max(self.duration * 1000 // self.num_requests, 1)
+        capacity = interval * self.num_requests
+
+        tat = self._advance(now, interval)
+        if tat - now > capacity:
+            # Give the token back so that rejected requests do not push the
+            # client's next allowed request further away.
+            self.cache.decr(self.key, interval)
+            self._wait = (tat - now - capacity) / 1000
+            return False
+        return True
+
+    def _advance(self, now, interval):
+        """Atomically consume one token and return the new TAT."""
+        try:
+            tat = self.cache.incr(self.key, interval)
+        except ValueError:
+            # First request from this client, or its bucket expired.
+            if self.cache.add(self.key, now + interval, self.duration):
+                return now + interval
+            tat = self.cache.incr(self.key, interval)
+
+        if tat - interval < now:
+            # The bucket refilled completely since the last request: move the
+            # TAT up to now instead of crediting the idle time beyond
+            # capacity. Only the first of concurrent requests finding the
+            # bucket idle claims the reset, and it applies it with `incr` so
+            # that tokens taken by the others in the meantime still count;
+            # overwriting the TAT would hand those tokens out again.
+            if self.cache.add(f'{self.key}:reset:{now // 1000}', 1, 2):
+                tat = self.cache.incr(self.key, now - (tat - interval))
+        # `incr` keeps the original expiry; a stored TAT is never more than
+        # `duration` ahead, so this lifetime never drops live state.
+        self.cache.touch(self.key, self.duration)
+        return tat
+
+    def wait(self):
+        """Seconds until the next token is available, used for Retry-After."""
+        return self._wait
+
+    def timer(self):
+        return time.time()
+
+
+class UserTokenBucketThrottle(TokenBucketThrottle):
+    """
+    One bucket per authenticated user, falling back to the client IP for
+    anonymous requests.
+    """
+    def get_ident_for(self, request):
+        if request.user and request.user.is_authenticated:
+            return f'user-{request.user.pk}'
+        return f'ip-{self.get_ident(request)}'
+
+
+class IPTokenBucketThrottle(TokenBucketThrottle):
+    """
+    One bucket per client IP, regardless of authentication.
+    """
+    def get_ident_for(self, request):
+        return f'ip-{self.get_ident(request)}'
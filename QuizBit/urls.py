@@ -17,28 +17,18 @@ from django.contrib import admin
 from django.urls import path, include
 from django.conf.urls.static import static
 from django.conf import settings
-from drf_yasg.views import get_schema_view
-from drf_yasg import openapi
-
-schema_view = get_schema_view(
-    openapi.Info(
-        title="QuizBit API",
-        default_version='v1',
-        description="API documentation for QuizBit platform",
-        contact=openapi.Contact(email="contact@quizbit.com"),
-        license=openapi.License(name="MIT License"),
-    ),
-    public=True,
-)
+from .docs import OpenAPISchemaView, redoc, swagger_ui
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/v1/auth/', include('Authentication.urls')),
     path('api/v1/quizzes/', include('Quiz.urls')),
+    path('api/v1/tasks/', include('Tasks.urls')),
     
-    # API Documentation endpoints
-    path('docs/', schema_view.with_ui('swagger', cache_timeout=0), name='schema-swagger-ui'),
-    path('redoc/', schema_view.with_ui('redoc', cache_timeout=0), name='schema-redoc'),
+    # API Documentation endpoints (drf_yasg is imported on first request)
+    path('docs/', swagger_ui, name='schema-swagger-ui'),
+    path('redoc/', redoc, name='schema-redoc'),
+    path('openapi.json', OpenAPISchemaView.as_view(), name='schema-json'),
 ]
 
 if settings.DEBUG:
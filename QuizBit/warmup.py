@@ -0,0 +1,51 @@
+"""
+Worker warm-up.
+
+A fresh worker spends its first requests importing the views behind the
+URLconf, compiling the URL patterns and filling the question caches, which
+makes them several times slower than the ones that follow. `warm_up()` runs
+the QUIZBIT_WARMUP_STEPS (dotted paths to callables taking no arguments)
+before the worker takes traffic instead.
+
+Under gunicorn with preload_app it runs once in the master, before workers
+are forked (see gunicorn.conf.py): workers start warm and share those pages
+with the master copy-on-write. A failing step is logged and skipped, so a
+missing table or an unreachable cache never keeps the server from starting.
+"""
+import logging
+import time
+
+from django.conf import settings
+from django.db import connections
+from django.urls import get_resolver
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+
+def load_urlconf():
+    """Import every view module and compile the URL patterns."""
+    # Populating the reverse lookup walks (and compiles) every pattern.
+    get_resolver().reverse_dict
+
+
+def warm_up(steps=None):
+    """
+    Run the warm-up steps and return {step: seconds} for those that succeeded.
+
+    Database connections opened by the steps are closed afterwards, so none
+    is inherited by forked workers.
+    """
+    timings = {}
+    try:
+        for path in settings.QUIZBIT_WARMUP_STEPS if steps is None else steps:
+            started = time.perf_counter()
+            try:
+                import_string(path)()
+            except Exception:
+                logger.exception('Warm-up step %s failed', path)
+                continue
+            timings[path] = time.perf_counter() - started
+    finally:
+        connections.close_all()
+    return timings
@@ -0,0 +1,45 @@
+"""
+JWT authentication for WebSocket connections.
+
+Browsers cannot set an Authorization header on a WebSocket handshake, and a
+token in the URL ends up in access logs, so clients offer it as a subprotocol
+instead: new WebSocket(url, ['quizbit.jwt', accessToken]). It travels in the
+Sec-WebSocket-Protocol header and is validated exactly like the REST API's
+bearer tokens; the server selects only the 'quizbit.jwt' marker.
+"""
+from channels.db import database_sync_to_async
+from channels.middleware import BaseMiddleware
+from django.contrib.auth.models import AnonymousUser
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+
+AUTH_SUBPROTOCOL = 'quizbit.jwt'
+
+
+@database_sync_to_async
+def get_user_for_token(raw_token):
+    """The user an access token belongs to, or AnonymousUser."""
+    authentication = JWTAuthentication()
+    try:
+        return authentication.get_user(authentication.get_validated_token(raw_token))
+    except (InvalidToken, AuthenticationFailed):
+        return AnonymousUser()
+
+
+def get_token(scope):
+    """The access token offered after the AUTH_SUBPROTOCOL marker, if any."""
+    subprotocols = list(scope.get('subprotocols') or ())
+    if AUTH_SUBPROTOCOL in subprotocols[:-1]:
+        return subprotocols[subprotocols.index(AUTH_SUBPROTOCOL) + 1]
+    return None
+
+
+class JWTAuthMiddleware(BaseMiddleware):
+    """
+    Set scope['user'] from the access token offered as a subprotocol.
+    """
+    async def __call__(self, scope, receive, send):
+        token = get_token(scope)
+        scope = dict(scope, user=await get_user_for_token(token) if token else AnonymousUser())
+        return await super().__call__(scope, receive, send)
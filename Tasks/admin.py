@@ -0,0 +1,20 @@
+from django.contrib import admin
+from django.utils import timezone
+from .models import Task
+
+@admin.register(Task)
+class TaskAdmin(admin.ModelAdmin):
+    list_display = ('name', 'status', 'attempts', 'max_attempts', 'run_after', 'locked_by', 'created_at')
+    list_filter = ('status', 'name')
+    readonly_fields = [field.name for field in Task._meta.fields]
+    actions = ['retry_tasks']
+
+    @admin.action(description='Retry selected failed tasks')
+    def retry_tasks(self, request, queryset):
+        retried = queryset.filter(status=Task.Status.FAILED).update(
+            status=Task.Status.QUEUED, attempts=0, run_after=timezone.now(), finished_at=None
+        )
+        self.message_user(request, f'{retried} task(s) queued again.')
+
+    def has_add_permission(self, request):
+        return False
@@ -0,0 +1,66 @@
+import json
+import signal
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from Tasks.queue import queue_stats
+from Tasks.worker import Worker
+
+
+class Command(BaseCommand):
+    """
+    Start background task workers (see Tasks.queue).
+
+    With --processes N the command supervises N worker processes, each
+    running this command; SIGINT/SIGTERM let every worker finish its current
+    batch before exiting.
+    """
+    help = 'Run background task workers'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=1, help='Number of worker processes')
+        parser.add_argument('--batch-size', type=int, default=100, help='Tasks of one name claimed at a time')
+        parser.add_argument('--interval', type=float, default=1.0, help='Seconds to sleep when the queue is empty')
+        parser.add_argument('--task', action='append', dest='names', help='Only run tasks with this name (repeatable)')
+        parser.add_argument('--burst', action='store_true', help='Exit once the queue is empty')
+        parser.add_argument('--stats', action='store_true', help='Print queue-depth metrics and exit')
+
+    def handle(self, *args, **options):
+        if options['stats']:
+            self.stdout.write(json.dumps(queue_stats(), indent=2))
+            return
+        if options['processes'] > 1:
+            self._supervise(options)
+            return
+
+        worker = Worker(batch_size=options['batch_size'], names=options['names'])
+        signal.signal(signal.SIGTERM, worker.stop)
+        signal.signal(signal.SIGINT, worker.stop)
+        self.stdout.write(f'Worker {worker.id} started')
+        processed = worker.run(interval=options['interval'], burst=options['burst'])
+        self.stdout.write(f'Worker {worker.id} stopped after {processed} task(s)')
+
+    def _supervise(self, options):
+        command = [
+            sys.executable, '-m', 'django', 'run_task_worker',
+            '--batch-size', str(options['batch_size']),
+            '--interval', str(options['interval']),
+        ]
+        for name in options['names'] or []:
+            command += ['--task', name]
+        if options['burst']:
+            command.append('--burst')
+
+        children = [subprocess.Popen(command, cwd=settings.BASE_DIR) for _ in range(options['processes'])]
+
+        def forward(signum, frame):
+            for child in children:
+                child.send_signal(signum)
+
+        signal.signal(signal.SIGTERM, forward)
+        signal.signal(signal.SIGINT, forward)
+        for child in children:
+            child.wait()
@@ -0,0 +1,50 @@
+from django.db import models
+from django.utils import timezone
+
+class Task(models.Model):
+    """
+    Model to represent a unit of background work waiting in the queue.
+
+    Rows are inserted by `Tasks.queue.enqueue` and claimed by workers started
+    with `manage.py run_task_worker`. Completed tasks are deleted; failed
+    ones are kept for inspection in the admin.
+
+    Fields:
+        name (CharField): Registered name of the task function
+        payload (JSONField): Keyword arguments for the task function
+        status (CharField): queued, running or failed
+        attempts (PositiveIntegerField): Times a worker has started the task
+        max_attempts (PositiveIntegerField): Attempts before the task is marked failed
+        run_after (DateTimeField): Earliest time the task may run
+        locked_by (CharField): Worker currently running the task
+        locked_at (DateTimeField): When that worker claimed it
+        last_error (TextField): Error of the last failed attempt
+        created_at (DateTimeField): When the task was queued
+        finished_at (DateTimeField): When the task failed for good
+    """
+    class Status(models.TextChoices):
+        QUEUED = 'queued', 'Queued'
+        RUNNING = 'running', 'Running'
+        FAILED = 'failed', 'Failed'
+
+    name = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=20, choices=Status.choices, default=Status.QUEUED)
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=3)
+    run_after = models.DateTimeField(default=timezone.now)
+    locked_by = models.CharField(max_length=100, blank=True)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['run_after', 'id']
+        indexes = [
+            # Workers look for due tasks by status and run_after, then by name
+            models.Index(fields=['status', 'run_after', 'name']),
+        ]
+
+    def __str__(self):
+        return f"{self.name} ({self.status})"
@@ -0,0 +1,163 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.test import TestCase
+from django.utils import timezone
+
+from .models import Task
+from .queue import TaskSpec, enqueue, registry
+from .worker import Worker, claim_tasks, requeue_stale_tasks, run_tasks
+
+
+class WorkerTests(TestCase):
+    """Workers claim due tasks, run them, and retry failures with backoff."""
+
+    def setUp(self):
+        self.calls = []
+        self.failures = 0
+        specs = [
+            TaskSpec('tests.record', self.record),
+            TaskSpec('tests.flaky', self.flaky, max_attempts=3, retry_delay=10.0),
+            TaskSpec('tests.batch', self.record_batch, batch=True),
+        ]
+        patcher = mock.patch.dict(registry, {spec.name: spec for spec in specs})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.worker = Worker(batch_size=10)
+
+    def record(self, **payload):
+        self.calls.append(payload)
+
+    def flaky(self, **payload):
+        if self.failures:
+            self.failures -= 1
+            raise RuntimeError('try again')
+        self.calls.append(payload)
+
+    def record_batch(self, payloads):
+        self.calls.append(payloads)
+        if self.failures:
+            raise RuntimeError('batch failed')
+
+    def make_due(self, task):
+        Task.objects.filter(pk=task.pk).update(run_after=timezone.now() - timedelta(seconds=1))
+
+    def test_succeeded_tasks_are_deleted(self):
+        enqueue('tests.record', {'n': 1})
+
+        self.assertEqual(self.worker.run_once(), 1)
+
+        self.assertEqual(self.calls, [{'n': 1}])
+        self.assertFalse(Task.objects.exists())
+
+    def test_tasks_wait_for_run_after(self):
+        enqueue('tests.record', {'n': 1}, run_after=timezone.now() + timedelta(minutes=5))
+
+        self.assertEqual(self.worker.run_once(), 0)
+        self.assertEqual(self.calls, [])
+
+    def test_failures_are_retried_with_exponential_backoff(self):
+        self.failures = 2
+        task = enqueue('tests.flaky', {'n': 1})
+        delays = []
+
+        for _ in range(2):
+            before = timezone.now()
+            with self.assertLogs('Tasks.worker', 'ERROR'):
+                self.worker.run_once()
+            task.refresh_from_db()
+            self.assertEqual(task.status, Task.Status.QUEUED)
+            self.assertIn('try again', task.last_error)
+            self.assertEqual(task.locked_by, '')
+            delays.append(round((task.run_after - before).total_seconds()))
+            self.assertEqual(self.worker.run_once(), 0)  # not due yet
+            self.make_due(task)
+
+        self.assertEqual(delays, [10, 20])
+        self.assertEqual(self.worker.run_once(), 1)
+        self.assertEqual(self.calls, [{'n': 1}])
+        self.assertFalse(Task.objects.exists())
+
+    def test_tasks_fail_for_good_after_max_attempts(self):
+        self.failures = 3
+        task = enqueue('tests.flaky', {'n': 1})
+
+        for _ in range(3):
+            self.make_due(task)
+            with self.assertLogs('Tasks.worker', 'ERROR'):
+                self.worker.run_once()
+
+        task.refresh_from_db()
+        self.assertEqual((task.status, task.attempts), (Task.Status.FAILED, 3))
+        self.assertIsNotNone(task.finished_at)
+        self.make_due(task)
+        self.assertEqual(self.worker.run_once(), 0)
+
+    def test_batch_tasks_get_every_claimed_payload_at_once(self):
+        for n in range(3):
+            enqueue('tests.batch', {'n': n})
+
+        self.assertEqual(self.worker.run_once(), 3)
+
+        self.assertEqual(self.calls, [[{'n': 0}, {'n': 1}, {'n': 2}]])
+
+    def test_a_failed_batch_retries_all_of_its_tasks(self):
+        self.failures = 1
+        for n in range(2):
+            enqueue('tests.batch', {'n': n})
+
+        with self.assertLogs('Tasks.worker', 'ERROR'):
+            self.worker.run_once()
+
+        self.assertEqual(
+            list(Task.objects.values_list('status', 'attempts')),
+            [(Task.Status.QUEUED, 1), (Task.Status.QUEUED, 1)]
+        )
+
+    def test_a_claim_takes_tasks_of_the_oldest_name_only(self):
+        enqueue('tests.batch', {'n': 0}, run_after=timezone.now() - timedelta(minutes=1))
+        enqueue('tests.record', {'n': 1})
+        enqueue('tests.batch', {'n': 2})
+
+        tasks = claim_tasks('worker-1')
+
+        self.assertEqual([task.payload for task in tasks], [{'n': 0}, {'n': 2}])
+        self.assertEqual([task.payload for task in claim_tasks('worker-2')], [{'n': 1}])
+
+    def test_claimed_tasks_are_not_claimed_again(self):
+        enqueue('tests.record', {'n': 1})
+
+        first, second = claim_tasks('worker-1'), claim_tasks('worker-2')
+
+        self.assertEqual(len(first), 1)
+        self.assertEqual(second, [])
+
+    def test_tasks_of_dead_workers_are_released(self):
+        retried = enqueue('tests.record', {'n': 1})
+        exhausted = enqueue('tests.record', {'n': 2})
+        claim_tasks('dead-worker')
+        Task.objects.update(locked_at=timezone.now() - timedelta(hours=1))
+        Task.objects.filter(pk=exhausted.pk).update(attempts=3)
+
+        self.assertEqual(requeue_stale_tasks(timedelta(minutes=10)), 2)
+
+        retried.refresh_from_db()
+        exhausted.refresh_from_db()
+        self.assertEqual((retried.status, retried.locked_by), (Task.Status.QUEUED, ''))
+        self.assertEqual(exhausted.status, Task.Status.FAILED)
+
+    def test_unknown_tasks_fail(self):
+        task = Task.objects.create(name='tests.missing')
+        tasks = claim_tasks('worker-1')
+
+        self.assertEqual(run_tasks(tasks), (0, 1))
+
+        task.refresh_from_db()
+        self.assertEqual(task.status, Task.Status.FAILED)
+
+    def test_burst_runs_until_the_queue_is_empty(self):
+        for n in range(25):
+            enqueue('tests.record', {'n': n})
+
+        self.assertEqual(self.worker.run(burst=True), 25)
+        self.assertEqual(len(self.calls), 25)
@@ -0,0 +1,6 @@
+from django.urls import path
+from .views import QueueMetricsView
+
+urlpatterns = [
+    path('metrics/', QueueMetricsView.as_view(), name='task-metrics'),
+]
@@ -0,0 +1,25 @@
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from .queue import queue_stats
+
+class QueueMetricsView(APIView):
+    """
+    API endpoint for background task queue depth.
+    
+    GET /api/v1/tasks/metrics/
+    
+    Authentication:
+        Required (staff only)
+    
+    Returns:
+        {
+            "totals": {"queued": int, "running": int, "failed": int},
+            "by_name": {task_name: {status: int}},
+            "oldest_due_seconds": float   (how long the oldest due task has waited)
+        }
+    """
+    permission_classes = [IsAdminUser]
+    
+    def get(self, request, *args, **kwargs):
+        return Response(queue_stats())
@@ -0,0 +1,163 @@
+"""
+Task worker: claims due tasks from the Task table and runs them.
+
+Claiming is a single conditional UPDATE (queued -> running, stamped with the
+worker's id), so several worker processes can poll the same table without
+row locks or SELECT ... SKIP LOCKED, which SQLite does not have. A worker
+claims up to `batch_size` due tasks of one name at a time; batch tasks get
+them in one call, others are run one after another.
+"""
+import logging
+import os
+import socket
+import time
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Task
+from .queue import registry
+
+logger = logging.getLogger(__name__)
+
+
+def requeue_stale_tasks(timeout):
+    """
+    Release tasks whose worker died while running them.
+
+    A task running for longer than `timeout` is queued again, or marked
+    failed when it has no attempts left. Returns the number released.
+    """
+    stale = Task.objects.filter(status=Task.Status.RUNNING, locked_at__lt=timezone.now() - timeout)
+    failed = stale.filter(attempts__gte=F('max_attempts')).update(
+        status=Task.Status.FAILED,
+        last_error='Worker stopped while running the task',
+        finished_at=timezone.now()
+    )
+    requeued = stale.update(status=Task.Status.QUEUED, locked_by='', locked_at=None)
+    return failed + requeued
+
+
+def claim_tasks(worker_id, batch_size=100, names=None):
+    """
+    Claim up to `batch_size` due tasks sharing the name of the oldest due task.
+
+    Returns the claimed Task rows, already marked running with their attempt
+    counted; an empty list when nothing is due.
+    """
+    now = timezone.now()
+    due = Task.objects.filter(status=Task.Status.QUEUED, run_after__lte=now)
+    if names:
+        due = due.filter(name__in=names)
+    name = due.order_by('run_after', 'id').values_list('name', flat=True).first()
+    if name is None:
+        return []
+
+    ids = list(due.filter(name=name).order_by('run_after', 'id').values_list('id', flat=True)[:batch_size])
+    Task.objects.filter(id__in=ids, status=Task.Status.QUEUED).update(
+        status=Task.Status.RUNNING,
+        locked_by=worker_id,
+        locked_at=now,
+        attempts=F('attempts') + 1
+    )
+    return list(Task.objects.filter(id__in=ids, status=Task.Status.RUNNING, locked_by=worker_id))
+
+
+def run_tasks(tasks):
+    """
+    Run claimed tasks of one name and record the outcome.
+
+    Succeeded tasks are deleted. Failed ones are queued again with backoff,
+    or marked failed once out of attempts. Returns (succeeded, failed).
+    """
+    spec = registry.get(tasks[0].name)
+    if spec is None:
+        error = f'Unknown task {tasks[0].name!r}'
+        _record_failures(tasks, {task.pk: error for task in tasks}, None)
+        return 0, len(tasks)
+
+    errors = {}
+    if spec.batch:
+        try:
+            spec.func([task.payload for task in tasks])
+        except Exception as exc:
+            logger.exception('Batch of %d %s tasks failed', len(tasks), spec.name)
+            errors = {task.pk: repr(exc) for task in tasks}
+    else:
+        for task in tasks:
+            try:
+                spec.func(**task.payload)
+            except Exception as exc:
+                logger.exception('Task %s (%s) failed', task.pk, spec.name)
+                errors[task.pk] = repr(exc)
+
+    Task.objects.filter(id__in=[task.pk for task in tasks if task.pk not in errors]).delete()
+    _record_failures([task for task in tasks if task.pk in errors], errors, spec)
+    return len(tasks) - len(errors), len(errors)
+
+
+def _record_failures(tasks, errors, spec):
+    now = timezone.now()
+    for task in tasks:
+        task.last_error = errors[task.pk]
+        task.locked_by, task.locked_at = '', None
+        if spec is None or task.attempts >= task.max_attempts:
+            task.status = Task.Status.FAILED
+            task.finished_at = now
+        else:
+            task.status = Task.Status.QUEUED
+            task.run_after = now + timedelta(seconds=spec.backoff(task.attempts))
+    Task.objects.bulk_update(
+        tasks, ['status', 'last_error', 'locked_by', 'locked_at', 'run_after', 'finished_at']
+    )
+
+
+class Worker:
+    """
+    Polling loop of one worker process.
+    """
+    def __init__(self, batch_size=100, names=None, lock_timeout=None):
+        self.id = f'{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}'
+        self.batch_size = batch_size
+        self.names = names
+        self.lock_timeout = timedelta(seconds=lock_timeout or settings.QUIZBIT_TASK_LOCK_TIMEOUT)
+        self.stopping = False
+
+    def run_once(self):
+        """Claim and run one batch; return the number of tasks processed."""
+        close_old_connections()
+        requeue_stale_tasks(self.lock_timeout)
+        tasks = claim_tasks(self.id, self.batch_size, self.names)
+        if not tasks:
+            return 0
+        started = time.perf_counter()
+        succeeded, failed = run_tasks(tasks)
+        logger.info(
+            '%s: ran %d %s task(s) in %.3fs, %d failed',
+            self.id, len(tasks), tasks[0].name, time.perf_counter() - started, failed
+        )
+        return succeeded + failed
+
+    def run(self, interval=1.0, burst=False):
+        """
+        Process tasks until stopped, sleeping `interval` seconds whenever the
+        queue is empty. With `burst`, return as soon as it is empty instead.
+        """
+        processed = 0
+        while not self.stopping:
+            count = self.run_once()
+            processed += count
+            if count:
+                continue
+            if burst:
+                break
+            time.sleep(interval)
+        return processed
+
+    def stop(self, *args):
+        """Finish the current batch, then leave `run`."""
+        self.stopping = True
@@ -0,0 +1,76 @@
+"""
+Gunicorn configuration of the production profile:
+
+    gunicorn -c gunicorn.conf.py QuizBit.wsgi
+
+The application is imported once, in the master (preload_app), and warmed
+up there (see QuizBit.warmup) before any worker is forked. Workers start with
+the views imported and the question caches primed, and share those memory
+pages with the master copy-on-write instead of each building its own copy.
+Live quizzes use WebSockets and are served by an ASGI server instead:
+`daphne QuizBit.asgi:application`.
+
+Settings come from QUIZBIT_GUNICORN_* environment variables; DEBUG is off
+unless QUIZBIT_DEBUG is set. The workers must share a cache (QUIZBIT_CACHE_BACKEND
+file or redis): with per-process locmem, cache invalidation, throttling and
+token revocation would each only reach one worker, so the server refuses to
+start.
+"""
+import gc
+import multiprocessing
+import os
+
+
+def _flag(name, default):
+    return os.environ.get(name, default).lower() in ('1', 'true', 'yes')
+
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'QuizBit.settings')
+os.environ.setdefault('QUIZBIT_DEBUG', 'false')
+
+bind = os.environ.get('QUIZBIT_GUNICORN_BIND', '0.0.0.0:8000')
+workers = int(os.environ.get('QUIZBIT_GUNICORN_WORKERS', multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.environ.get('QUIZBIT_GUNICORN_THREADS', 1))
+timeout = int(os.environ.get('QUIZBIT_GUNICORN_TIMEOUT', 30))
+max_requests = int(os.environ.get('QUIZBIT_GUNICORN_MAX_REQUESTS', 0))
+max_requests_jitter = max_requests // 10
+preload_app = _flag('QUIZBIT_GUNICORN_PRELOAD', 'true')
+accesslog = os.environ.get('QUIZBIT_GUNICORN_ACCESS_LOG') or None
+
+# Run QuizBit.warmup before serving: in the master with preload_app, else in
+# every worker after it loads the application.
+warmup = _flag('QUIZBIT_GUNICORN_WARMUP', 'true')
+
+
+def on_starting(server):
+    """Refuse to start without a cache shared by the workers."""
+    from QuizBit.cache import cache_is_shared
+
+    if not cache_is_shared():
+        raise RuntimeError(
+            'The gunicorn workers need a shared cache: set QUIZBIT_CACHE_BACKEND to file or redis'
+        )
+
+
+def when_ready(server):
+    """Warm the preloaded application up in the master, before the first fork."""
+    if preload_app:
+        if warmup:
+            _warm_up(server.log)
+        # Exempt everything allocated so far from garbage collection: a
+        # collection in a worker would otherwise write to these objects'
+        # GC headers and un-share the pages they live on.
+        gc.freeze()
+
+
+def post_worker_init(worker):
+    """Without preload_app, every worker warms its own copy up."""
+    if warmup and not preload_app:
+        _warm_up(worker.log)
+
+
+def _warm_up(log):
+    from QuizBit.warmup import warm_up
+
+    timings = warm_up()
+    log.info('Warm-up done: %s', ', '.join(f'{step} {seconds * 1000:.0f}ms' for step, seconds in timings.items()))